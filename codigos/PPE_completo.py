@@ -23,6 +23,7 @@ OUTPUTS_DIR.mkdir(exist_ok=True)
 
 # --- Importa os módulos existentes (cotações e prêmios) ---
 import cotacoes_tradingview_cepea as cot
+from ppe_engine import PRODUTOS  # fatores c$/bu -> $/ton compartilhados com o motor e a paridade
 # import premios_export_soja_milho as premios  # (importado agora; integração virá nas próximas etapas)
 
 # --- Define mapeamentos fixos de código de mês (letra) -> número e meses listados por ativo ---
@@ -506,8 +507,8 @@ df_ppe_milho = df_ppe_milho[["Ativo","Vencimento","Preço","Premio","NDF", "NDFF
 
 df_ppe_soja ["FOB (c$/bu)"] = df_ppe_soja["Preço"] + df_ppe_soja["Premio"]
 df_ppe_milho ["FOB (c$/bu)"] = df_ppe_milho["Preço"] + df_ppe_milho["Premio"]
-df_ppe_soja ["FOB ($/ton)"] = df_ppe_soja["FOB (c$/bu)"] * 0.367437
-df_ppe_milho ["FOB ($/ton)"] = df_ppe_milho["FOB (c$/bu)"] * 0.393687
+df_ppe_soja ["FOB ($/ton)"] = df_ppe_soja["FOB (c$/bu)"] * PRODUTOS["soja"]["fator"]
+df_ppe_milho ["FOB ($/ton)"] = df_ppe_milho["FOB (c$/bu)"] * PRODUTOS["milho"]["fator"]
 df_ppe_soja["FOB (R$/ton)"] = df_ppe_soja["FOB ($/ton)"] * df_ppe_soja["NDF"] 
 df_ppe_milho["FOB (R$/ton)"] = df_ppe_milho["FOB ($/ton)"] * df_ppe_milho["NDF"]
 df_ppe_soja["Sobre rodas"] = df_ppe_soja["FOB (R$/ton)"] - fobbings
@@ -527,7 +528,7 @@ df_ppe_milho.to_excel(OUTPUTS_DIR  / "PPE_MILHO.xlsx", index=False)
 # PPE PORTO, CFR CHINA
 #==============================================================
 cfr_chinabrasil_milho = df_ppe_milho ["FOB ($/ton)"] + frete_int_santos_asia     # $/ton
-basiscfr_chinabrasil_milho = cfr_chinabrasil_milho/0.393683 - df_ppe_milho["Preço"]  #c$/bu
+basiscfr_chinabrasil_milho = cfr_chinabrasil_milho/PRODUTOS["milho"]["fator"] - df_ppe_milho["Preço"]  #c$/bu
 
 # =============================================================================
 # DESCRIÇÃO DO SCRIPT PPE_UNDERLINE_COMPLETO.PY
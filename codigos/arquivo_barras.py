@@ -0,0 +1,115 @@
+"""
+Arquivo histórico de barras CBOT/B3
+Guarda um Parquet por símbolo (dados/barras/<bolsa>/<intervalo>/<símbolo>.parquet) e, a cada
+atualização, pede ao TradingView só as barras posteriores à última já gravada.
+Leituras históricas (gráficos, backtest, ReplayProvider) usam os arquivos locais, sem rede.
+O get_hist só devolve as últimas MAX_BARRAS barras: um arquivo parado há mais tempo que isso fica
+com um buraco que não dá para preencher depois; atualizar() detecta e avisa (log e status "lacuna").
+"""
+
+import logging
+import math
+from pathlib import Path
+
+import pandas as pd
+
+import cotacoes_tradingview_cepea as cot
+import limitador
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARQUIVO_DIR = BASE_DIR / "dados" / "barras"
+
+MAX_BARRAS = 5000  # limite de barras por chamada do get_hist
+
+MINUTOS_INTERVALO = {
+    "in_1_minute": 1, "in_5_minute": 5, "in_15_minute": 15, "in_30_minute": 30,
+    "in_1_hour": 60, "in_4_hour": 240, "in_daily": 1440, "in_weekly": 10080,
+}
+
+COLUNAS = ["symbol", "open", "high", "low", "close", "volume"]
+
+log = logging.getLogger(__name__)
+
+
+def caminho_simbolo(symbol: str, exchange: str = "CBOT", intervalo: str = "in_15_minute", raiz=ARQUIVO_DIR) -> Path:
+    nome = symbol.replace("!", "_cont")  # "ZC1!" -> "ZC1_cont.parquet"
+    return Path(raiz) / exchange / intervalo / f"{nome}.parquet"
+
+
+def ler(symbol: str, exchange: str = "CBOT", intervalo: str = "in_15_minute", raiz=ARQUIVO_DIR,
+        inicio=None, fim=None) -> pd.DataFrame:
+    """Barras arquivadas do símbolo (índice datetime), opcionalmente recortadas em [inicio, fim]."""
+    arq = caminho_simbolo(symbol, exchange, intervalo, raiz)
+    if not arq.exists():
+        return pd.DataFrame(columns=COLUNAS, index=pd.DatetimeIndex([], name="datetime"))
+    df = pd.read_parquet(arq)
+    if inicio is not None or fim is not None:
+        df = df.loc[inicio:fim]
+    return df
+
+
+def barras_necessarias(ultima, agora=None, intervalo: str = "in_15_minute") -> int:
+    """Quantas barras pedir para cobrir de 'ultima' até agora (com folga), limitado a MAX_BARRAS."""
+    if ultima is None:
+        return MAX_BARRAS
+    agora = pd.Timestamp.now() if agora is None else pd.Timestamp(agora)
+    minutos = (agora - pd.Timestamp(ultima)).total_seconds() / 60
+    return max(2, min(MAX_BARRAS, math.ceil(minutos / MINUTOS_INTERVALO[intervalo]) + 2))
+
+
+def _gravar(df: pd.DataFrame, arq: Path):
+    arq.parent.mkdir(parents=True, exist_ok=True)
+    tmp = arq.with_suffix(".parquet.tmp")
+    df.to_parquet(tmp)
+    tmp.replace(arq)  # troca atômica: leitores nunca veem arquivo pela metade
+
+
+def atualizar(symbol: str, exchange: str = "CBOT", intervalo: str = "in_15_minute", raiz=ARQUIVO_DIR,
+              agora=None, cliente=None, lacunas: list | None = None) -> int:
+    """
+    Busca só as barras novas do símbolo e acrescenta ao arquivo.
+    A última barra do get_hist ainda está em formação, então não é gravada.
+
+    Args:
+        lacunas: lista opcional que recebe (última barra arquivada, primeira barra recebida) quando as
+            barras novas não alcançam o arquivo (parado há mais de MAX_BARRAS barras)
+
+    Returns:
+        número de barras acrescentadas
+    """
+    arq = caminho_simbolo(symbol, exchange, intervalo, raiz)
+    atual = pd.read_parquet(arq) if arq.exists() else None
+    ultima = atual.index[-1] if atual is not None and not atual.empty else None
+
+    n_bars = barras_necessarias(ultima, agora, intervalo)
+    df = cot.fetch_hist(symbol, exchange, intervalo=intervalo, n_bars=n_bars, cliente=cliente)
+    df = df.iloc[:-1][COLUNAS]
+    df.index.name = "datetime"
+    if ultima is not None:
+        if not df.empty and df.index[0] > ultima:
+            # Nenhuma barra recebida encosta no arquivo: o que houve entre as duas se perdeu
+            log.warning("Lacuna no arquivo de %s:%s (%s): sem barras entre %s e %s",
+                        exchange, symbol, intervalo, ultima, df.index[0])
+            if lacunas is not None:
+                lacunas.append((ultima, df.index[0]))
+        df = df[df.index > ultima]
+    if df.empty:
+        return 0
+
+    novo = df if atual is None else pd.concat([atual, df])
+    _gravar(novo, arq)
+    return len(df)
+
+
+def atualizar_varios(symbols, exchange: str = "CBOT", intervalo: str = "in_15_minute", raiz=ARQUIVO_DIR) -> pd.DataFrame:
+    """Atualiza vários símbolos (prioridade de fundo); falhas não interrompem os demais."""
+    linhas = []
+    with limitador.prioridade(limitador.PRIORIDADE_FUNDO):
+        for sym in symbols:
+            lacunas = []
+            try:
+                n = atualizar(sym, exchange, intervalo, raiz, lacunas=lacunas)
+                linhas.append([sym, n, "lacuna" if lacunas else "ok"])
+            except Exception:
+                linhas.append([sym, 0, "erro"])
+    return pd.DataFrame(linhas, columns=["Ticker", "Novas barras", "Status"])
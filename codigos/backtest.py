@@ -0,0 +1,237 @@
+"""
+Backtest histórico do PPE
+Recalcula a curva de PPE de cada dia de um período a partir do arquivo local de barras CBOT
+(arquivo_barras) e dos históricos de prêmio e NDF, sem rede e sem relógio.
+Cada dia tem sua própria grade de meses e seus próprios contratos (rolagem por data), mas todas as
+datas são calculadas juntas em arrays (data x vencimento); períodos longos podem ser divididos
+entre processos.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import arquivo_barras
+import ppe_engine
+from ppe_engine import PRODUTOS, HORIZONTE_PADRAO, TON_POR_SACA, LB_POR_KG, asof_curva
+from rotulos_mes import parse_rotulos, chave_mm_yyyy
+
+DATAS_POR_BLOCO = 260  # ~1 ano de pregões por processo
+
+COLUNAS_BACKTEST = ["Data", "Produto", "Ativo", "Ano", "MesNum", "Vencimento", "Preço", "Premio", "NDF",
+                    "FOB (c$/bu)", "FOB ($/ton)", "FOB (R$/ton)", "Sobre rodas", "EXW",
+                    "PPE Preço saca origem (R$/sc)", "Basis Praça-CBOT (c$/bu)"]
+
+
+# ---------- Entradas ----------
+def contratos_periodo(ativo: str, datas, n_contratos: int) -> list:
+    """Todos os contratos do ativo que alguma data do período pode usar, em ordem de vencimento."""
+    ini = pd.Timestamp(min(datas))
+    meses_periodo = (pd.Timestamp(max(datas)).year - ini.year) * 12 + pd.Timestamp(max(datas)).month - ini.month
+    n = n_contratos + ppe_engine.contratos_para_horizonte(meses_periodo + 1, [ativo], ini.year, ini.month)[ativo]
+    return ppe_engine.generate_explicit_tickers(ativo, ini.year, ini.month, n)
+
+
+def fechamentos_asof(tickers, datas, raiz=arquivo_barras.ARQUIVO_DIR, intervalo: str = "in_15_minute") -> np.ndarray:
+    """Fechamento da última barra arquivada até o fim de cada data (data x ticker); NaN sem barra."""
+    limites = (pd.DatetimeIndex(datas).normalize() + pd.Timedelta(days=1)).to_numpy(dtype="datetime64[ns]")
+    out = np.full((len(limites), len(tickers)), np.nan)
+    for k, tk in enumerate(tickers):
+        df = arquivo_barras.ler(tk, "CBOT", intervalo, raiz)
+        if df.empty:
+            continue
+        tempos = pd.DatetimeIndex(df.index).tz_localize(None).to_numpy(dtype="datetime64[ns]")
+        i = np.searchsorted(tempos, limites, side="left") - 1
+        ok = i >= 0
+        out[ok, k] = df["close"].to_numpy(dtype=float)[i[ok]]
+    return out
+
+
+def _historico(df: pd.DataFrame, col_rotulo: str, col_valor: str):
+    """Histórico (Data, rótulo, valor) -> nós (datas distintas, curva com Ano/MesNum/Chave/valor/Snap)."""
+    rot = parse_rotulos(df[col_rotulo])
+    ok = rot["MesNum"].notna().to_numpy() & df[col_valor].notna().to_numpy()
+    datas = pd.to_datetime(df["Data"]).dt.normalize().to_numpy(dtype="datetime64[ns]")[ok]
+    snaps, snap_idx = np.unique(datas, return_inverse=True)
+    anos = rot["Ano"].to_numpy()[ok].astype(np.int64)
+    meses = rot["MesNum"].to_numpy()[ok].astype(np.int64)
+    curva = pd.DataFrame({
+        "Ano": anos,
+        "MesNum": meses,
+        "Chave": chave_mm_yyyy(anos, meses).to_numpy(),
+        col_valor: pd.to_numeric(df[col_valor], errors="coerce").to_numpy(dtype=float)[ok],
+        "Snap": snap_idx.astype(np.int64),
+    })
+    return snaps, curva
+
+
+def _snapshot(snaps: np.ndarray, datas: np.ndarray) -> np.ndarray:
+    """Índice do último retrato publicado até cada data (-1 se nenhum)."""
+    return np.searchsorted(snaps, datas, side="right") - 1
+
+
+# ---------- Cálculo por bloco de datas ----------
+def _precos_por_data(ords: np.ndarray, precos: np.ndarray, listed, ord_datas: np.ndarray,
+                     horizonte: int, n_contratos: int) -> np.ndarray:
+    """
+    Mesma regra de build_monthly_series (contrato do mês, senão o próximo cotado, senão o último
+    mês listado já visto), para todas as datas: (data x horizonte).
+    """
+    n_datas, n_k = precos.shape
+    k = np.arange(n_k)
+    # Cada data só enxerga os n_contratos a partir do próprio mês (os que o motor buscaria naquele dia)
+    inicio = np.searchsorted(ords, ord_datas, side="left")
+    valido = ~np.isnan(precos) & (k >= inicio[:, None]) & (k < (inicio + n_contratos)[:, None])
+    # Próximo contrato válido a partir de cada posição (n_k = nenhum)
+    prox_valido = np.minimum.accumulate(np.where(valido, k, n_k)[:, ::-1], axis=1)[:, ::-1]
+    prox_valido = np.concatenate([prox_valido, np.full((n_datas, 1), n_k)], axis=1)
+
+    alvo = ord_datas[:, None] + np.arange(horizonte)[None, :]
+    i = np.searchsorted(ords, alvo, side="left")
+    j = np.take_along_axis(prox_valido, i, axis=1)
+    tem_prox = j < n_k
+    jj = np.minimum(j, n_k - 1)
+    prox = np.where(tem_prox, np.take_along_axis(precos, jj, axis=1), np.nan)
+
+    exato = tem_prox & (ords[jj] == alvo) & np.isin((alvo - 1) % 12 + 1, listed)
+    h = np.arange(horizonte)
+    ultimo = np.maximum.accumulate(np.where(exato, h, -1), axis=1)
+    carry = np.where(ultimo >= 0, np.take_along_axis(prox, np.maximum(ultimo, 0), axis=1), np.nan)
+    return np.where(tem_prox, prox, carry)
+
+
+def _bloco(datas, produtos, contratos, precos, hist_premios, hist_ndf, fobbings, frete_dom, horizonte, n_contratos):
+    """PPE de um bloco de datas (executável em outro processo)."""
+    datas = pd.DatetimeIndex(datas)
+    n_datas, n_prod = len(datas), len(produtos)
+    ord_datas = (datas.year * 12 + datas.month).to_numpy(dtype=np.int64)
+    dias = datas.normalize().to_numpy(dtype="datetime64[ns]")
+
+    # Eixos achatados na ordem (data, produto, mês do horizonte)
+    forma = (n_datas, n_prod, horizonte)
+    d_idx, p_idx, h_idx = (a.reshape(-1) for a in np.indices(forma))
+    alvo = ord_datas[d_idx] + h_idx
+    anos, meses = (alvo - 1) // 12, (alvo - 1) % 12 + 1
+
+    preco = np.stack([
+        _precos_por_data(contratos[p][0], precos[p], PRODUTOS[p]["meses"], ord_datas, horizonte, n_contratos[p])
+        for p in produtos
+    ], axis=1).reshape(-1)
+
+    # Prêmio: retrato vigente na data (por produto), depois "próximo ou último" vencimento
+    premio = np.full(len(alvo), np.nan)
+    for j, p in enumerate(produtos):
+        if p not in hist_premios:
+            continue
+        snaps, curva = hist_premios[p]
+        sel = p_idx == j
+        snap = _snapshot(snaps, dias)[d_idx[sel]]
+        premio[sel], _ = asof_curva(anos[sel], meses[sel], curva, "Premio", grupos=snap, col_grupo="Snap")
+
+    snaps, curva = hist_ndf
+    ndf, _ = asof_curva(anos, meses, curva, "NDF", grupos=_snapshot(snaps, dias)[d_idx], col_grupo="Snap")
+
+    fator = np.array([PRODUTOS[p]["fator"] for p in produtos])[p_idx]
+    fob_cbu = preco + premio
+    fob_usd = fob_cbu * fator
+    fob_rs = fob_usd * ndf
+    sobre_rodas = fob_rs - fobbings
+    exw = sobre_rodas - frete_dom
+    saca = exw * TON_POR_SACA
+    return pd.DataFrame({
+        "Data": datas[d_idx],
+        "Produto": np.asarray(produtos, dtype=object)[p_idx],
+        "Ativo": np.asarray([PRODUTOS[p]["ativo"] for p in produtos], dtype=object)[p_idx],
+        "Ano": anos,
+        "MesNum": meses,
+        "Vencimento": chave_mm_yyyy(anos, meses).to_numpy(),
+        "Preço": preco,
+        "Premio": premio,
+        "NDF": ndf,
+        "FOB (c$/bu)": fob_cbu,
+        "FOB ($/ton)": fob_usd,
+        "FOB (R$/ton)": fob_rs,
+        "Sobre rodas": sobre_rodas,
+        "EXW": exw,
+        "PPE Preço saca origem (R$/sc)": saca,
+        "Basis Praça-CBOT (c$/bu)": ((saca / ndf) / LB_POR_KG - preco/100)*100,
+    })
+
+
+def _bloco_args(args):
+    return _bloco(*args)
+
+
+# ---------- API ----------
+def backtest_ppe(inicio, fim, hist_premios: dict, hist_ndf: pd.DataFrame, fobbings=40.0, frete_dom=342.0,
+                 horizonte: int = HORIZONTE_PADRAO, n_contratos: int | dict | None = None, datas=None,
+                 raiz=arquivo_barras.ARQUIVO_DIR, intervalo: str = "in_15_minute",
+                 processos: int | None = None) -> pd.DataFrame:
+    """
+    PPE de cada dia útil entre inicio e fim, como o motor teria calculado naquele dia.
+
+    Args:
+        hist_premios: {"soja": df, "milho": df} com colunas "Data" (publicação), "Mes", "Premio"
+        hist_ndf: DataFrame com "Data", "Vencimento", "NDF"
+        n_contratos: contratos por símbolo, único ou {ativo: n} (padrão: os que cobrem o horizonte em cada ativo)
+        datas: datas explícitas (padrão: dias úteis de inicio a fim)
+        processos: >1 divide o período em blocos de DATAS_POR_BLOCO datas entre processos
+
+    Returns:
+        tabela longa (COLUNAS_BACKTEST), uma linha por data x produto x vencimento
+    """
+    datas = pd.bdate_range(inicio, fim) if datas is None else pd.DatetimeIndex(datas)
+    produtos = list(hist_premios)
+    if len(datas) == 0:
+        return pd.DataFrame(columns=COLUNAS_BACKTEST)
+    ativos = [PRODUTOS[p]["ativo"] for p in produtos]
+    if n_contratos is None:
+        n_contratos = ppe_engine.contratos_para_horizonte(horizonte, ativos)
+    elif not isinstance(n_contratos, dict):
+        n_contratos = dict.fromkeys(ativos, n_contratos)
+    n_por_produto = {p: int(n_contratos[PRODUTOS[p]["ativo"]]) for p in produtos}
+
+    # Contratos do período e fechamentos as-of de todos eles para todas as datas (uma leitura por arquivo)
+    contratos, precos = {}, {}
+    for p in produtos:
+        tickers = contratos_periodo(PRODUTOS[p]["ativo"], datas, n_por_produto[p])
+        ords = np.array([y * 12 + m for _, y, m in map(ppe_engine.parse_explicit_ticker, tickers)], dtype=np.int64)
+        contratos[p] = (ords, tickers)
+        precos[p] = fechamentos_asof(tickers, datas, raiz, intervalo)
+
+    curvas_premio = {p: _historico(df, "Mes", "Premio") for p, df in hist_premios.items()}
+    curva_ndf = _historico(hist_ndf, "Vencimento", "NDF")
+
+    blocos = [slice(i, i + DATAS_POR_BLOCO) for i in range(0, len(datas), DATAS_POR_BLOCO)]
+    args = [
+        (datas[b], produtos, contratos, {p: precos[p][b] for p in produtos}, curvas_premio, curva_ndf,
+         float(fobbings), float(frete_dom), int(horizonte), n_por_produto)
+        for b in blocos
+    ]
+    if processos is not None and processos > 1 and len(blocos) > 1:
+        with ProcessPoolExecutor(max_workers=min(processos, len(blocos))) as pool:
+            partes = list(pool.map(_bloco_args, args))
+    else:
+        partes = [_bloco(*a) for a in args]
+    return pd.concat(partes, ignore_index=True)[COLUNAS_BACKTEST]
+
+
+def backtest_pracas(df_bt: pd.DataFrame, df_pracas: pd.DataFrame) -> pd.DataFrame:
+    """Expande o backtest para cada praça (frete e fobbings próprios): data x praça x produto x vencimento."""
+    n_linhas, n_pracas = len(df_bt), len(df_pracas)
+    linha = np.tile(np.arange(n_linhas), n_pracas)
+    praca = np.repeat(np.arange(n_pracas), n_linhas)
+
+    fob_rs = df_bt["FOB (R$/ton)"].to_numpy(dtype=float)[linha]
+    ndf = df_bt["NDF"].to_numpy(dtype=float)[linha]
+    preco = df_bt["Preço"].to_numpy(dtype=float)[linha]
+    exw = fob_rs - (df_pracas["Fobbings"].to_numpy(dtype=float) + df_pracas["Frete"].to_numpy(dtype=float))[praca]
+    saca = exw * TON_POR_SACA
+
+    out = df_bt[["Data", "Produto", "Vencimento"]].iloc[linha].reset_index(drop=True)
+    out.insert(1, "Praça", df_pracas["Praça"].to_numpy(dtype=object)[praca])
+    out["EXW"] = exw
+    out["PPE Preço saca origem (R$/sc)"] = saca
+    out["Basis Praça-CBOT (c$/bu)"] = ((saca / ndf) / LB_POR_KG - preco/100)*100
+    return out
@@ -0,0 +1,479 @@
+"""
+Benchmarks do sistema PPE (rodar com: python codigos/benchmarks.py)
+Cada função mede um ponto de desempenho e imprime o resultado; nenhuma acessa a rede.
+"""
+
+import functools
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CODIGOS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(CODIGOS_DIR))
+
+_MESES_PT = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+_MESES_EXTENSO = ["janeiro", "fevereiro", "março", "abril", "maio", "junho", "julho",
+                  "agosto", "setembro", "outubro", "novembro", "dezembro"]
+
+
+def _cache_temporario(fn):
+    """Roda o benchmark com o cache em disco do motor numa pasta temporária (não suja cache/resultados)."""
+    @functools.wraps(fn)
+    def rodar(*args, **kwargs):
+        import ppe_engine
+
+        cache = ppe_engine.cache_ppe
+        original = cache.diretorio
+        with tempfile.TemporaryDirectory() as tmp:
+            cache.diretorio = Path(tmp) / cache.nome
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                cache.diretorio = original
+                ppe_engine.grafo_ppe.limpar()  # estágios calculados contra a pasta temporária
+    return rodar
+
+
+def dados_sinteticos(data_ref="2025-10-15", n_meses: int = 18, seed: int = 0):
+    """
+    Monta entradas realistas para o motor sem Google Sheets nem TradingView:
+    prêmios soja/milho ("Set/25"), NDF ("setembro/2025") e barras gravadas de ZC/ZS.
+    """
+    import ppe_engine
+
+    rng = np.random.default_rng(seed)
+    ref = pd.Timestamp(data_ref)
+    meses = [ppe_engine.add_months(ref.year, ref.month, i) for i in range(n_meses)]
+
+    df_soja = pd.DataFrame({
+        "Mes": [f"{_MESES_PT[m - 1]}/{y % 100:02d}" for y, m in meses],
+        "Premio": rng.integers(40, 120, n_meses).astype(float),
+    })
+    df_milho = pd.DataFrame({
+        "Mes": [f"{_MESES_PT[m - 1]}/{y % 100:02d}" for y, m in meses],
+        "Premio": rng.integers(20, 90, n_meses).astype(float),
+    })
+    df_ndf = pd.DataFrame({
+        "Vencimento": [f"{_MESES_EXTENSO[m - 1]}/{y}" for y, m in meses],
+        "NDF": np.round(5.40 + 0.03 * np.arange(n_meses), 2),
+    })
+
+    tickers = (ppe_engine.generate_explicit_tickers("ZC", ref.year, ref.month, 12)
+               + ppe_engine.generate_explicit_tickers("ZS", ref.year, ref.month, 12))
+    tempos = pd.date_range(end=ref, periods=8, freq="15min")
+    df_barras = pd.DataFrame([
+        {"datetime": t, "symbol": f"CBOT:{tk}", "close": (430.0 if tk.startswith("ZC") else 1050.0) + rng.normal(0, 5)}
+        for tk in tickers for t in tempos
+    ])
+    return df_soja, df_milho, df_ndf, df_barras
+
+
+# Script executado num processo limpo: bloqueia sockets e mede só o import do módulo
+# (pandas é pré-carregado porque o ppe_engine já paga esse custo de qualquer forma)
+_SCRIPT_IMPORT = r"""
+import socket, sys, time
+import pandas
+
+def _sem_rede(*args, **kwargs):
+    raise RuntimeError("acesso à rede durante o import")
+socket.socket.connect = _sem_rede
+socket.create_connection = _sem_rede
+
+sys.path.insert(0, {codigos!r})
+t0 = time.perf_counter()
+import {modulo}
+print((time.perf_counter() - t0) * 1000)
+"""
+
+def bench_import_cotacoes(repeticoes: int = 5):
+    """Tempo de import (ms) do cotacoes_tradingview_cepea, sem rede e sem login."""
+    tempos = []
+    for _ in range(repeticoes):
+        script = _SCRIPT_IMPORT.format(codigos=str(CODIGOS_DIR), modulo="cotacoes_tradingview_cepea")
+        out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        tempos.append(float(out.stdout.strip().splitlines()[-1]))
+    print(f"import cotacoes_tradingview_cepea: min {min(tempos):.1f} ms | max {max(tempos):.1f} ms")
+    return tempos
+
+
+@_cache_temporario
+def bench_calcular_ppe_replay(n_execucoes: int = 200):
+    """
+    Execuções/s do calcular_ppe completo usando o ReplayProvider (sem rede).
+    Medido: ~1.000 execuções/s (~1 ms cada) numa máquina de 1 CPU; o que sobra é o hash das planilhas
+    de prêmio/NDF (chave do cache) e a montagem das tabelas.
+    """
+    import ppe_engine
+    from provedores import ReplayProvider
+
+    df_soja, df_milho, df_ndf, df_barras = dados_sinteticos()
+    provedor = ReplayProvider(df_barras)
+    ppe_engine.calcular_ppe(df_soja, df_milho, df_ndf, provedor=provedor, data_ref="2025-10-15")
+
+    t0 = time.perf_counter()
+    for _ in range(n_execucoes):
+        ppe_engine.calcular_ppe(df_soja, df_milho, df_ndf, provedor=provedor, data_ref="2025-10-15")
+    dt = time.perf_counter() - t0
+    print(f"calcular_ppe (replay): {n_execucoes / dt:,.0f} execuções/s ({dt / n_execucoes * 1000:.2f} ms cada)")
+    return dt
+
+
+def bench_nucleo_cache(n_execucoes: int = 2000):
+    """Núcleo puro do PPE: cálculo completo x resultado vindo do cache (memória e disco)."""
+    import ppe_engine
+    from cache_resultados import CacheResultados, chave_conteudo
+
+    df_soja, df_milho, df_ndf, _ = dados_sinteticos()
+    curva_premios = pd.concat([
+        ppe_engine._curva_com_chave(df_soja, "Mes", "Premio").assign(Produto="soja"),
+        ppe_engine._curva_com_chave(df_milho, "Mes", "Premio").assign(Produto="milho"),
+    ], ignore_index=True)
+    curva_ndf = ppe_engine._curva_com_chave(df_ndf, "Vencimento", "NDF")
+    tickers = ppe_engine.contratos_cbot(2025, 10, ppe_engine.NUM_CONTRACTS_PER_SYMBOL, ("ZS", "ZC"))
+    price_map, _ = ppe_engine.build_price_map_from_explicit({tk: 1000.0 + i for i, tk in enumerate(tickers)})
+    args = (2025, 10, price_map, curva_premios, curva_ndf, 40.0, 342.0, ("soja", "milho"))
+
+    t0 = time.perf_counter()
+    for _ in range(50):
+        ppe_engine.nucleo_ppe(*args)
+    dt_calc = (time.perf_counter() - t0) / 50
+
+    # Mesmo caminho do estágio "mercado" do grafo: chave por conteúdo das entradas, CacheResultados
+    chave = chave_conteudo(*args)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CacheResultados("ppe", diretorio=tmp)
+        cache.obter(chave, ppe_engine.nucleo_ppe, *args)
+        t0 = time.perf_counter()
+        for _ in range(n_execucoes):
+            cache.obter(chave, ppe_engine.nucleo_ppe, *args)
+        dt_mem = (time.perf_counter() - t0) / n_execucoes
+
+        cache = CacheResultados("ppe", diretorio=tmp)  # processo "novo": só o disco
+        t0 = time.perf_counter()
+        cache.obter(chave, ppe_engine.nucleo_ppe, *args)
+        dt_disco = time.perf_counter() - t0
+
+    print(f"nucleo_ppe: cálculo {dt_calc * 1000:.2f} ms | hit memória {dt_mem * 1e6:.0f} µs | "
+          f"hit disco {dt_disco * 1000:.2f} ms")
+    return dt_calc, dt_mem, dt_disco
+
+
+def bench_horizonte(horizontes=(12, 36, 60, 120, 240), repeticoes: int = 20):
+    """base_mercado para horizontes crescentes (faixa completa de contratos ZS/ZC): o custo por mês deve ficar estável."""
+    import ppe_engine
+
+    df_soja, df_milho, df_ndf, _ = dados_sinteticos(n_meses=max(horizontes))
+    curva_premios = pd.concat([
+        ppe_engine._curva_com_chave(df_soja, "Mes", "Premio").assign(Produto="soja"),
+        ppe_engine._curva_com_chave(df_milho, "Mes", "Premio").assign(Produto="milho"),
+    ], ignore_index=True)
+    curva_ndf = ppe_engine._curva_com_chave(df_ndf, "Vencimento", "NDF")
+
+    tempos = []
+    for h in horizontes:
+        n = ppe_engine.contratos_para_horizonte(h, ano=2025, mes=10)
+        tickers = ppe_engine.contratos_cbot(2025, 10, n, ("ZS", "ZC"))
+        price_map, _ = ppe_engine.build_price_map_from_explicit({tk: 1000.0 + i for i, tk in enumerate(tickers)})
+        ppe_engine.base_mercado(2025, 10, price_map, curva_premios, curva_ndf, horizonte=h)
+        t0 = time.perf_counter()
+        for _ in range(repeticoes):
+            ppe_engine.base_mercado(2025, 10, price_map, curva_premios, curva_ndf, horizonte=h)
+        dt = (time.perf_counter() - t0) / repeticoes
+        tempos.append(dt)
+        print(f"base_mercado horizonte {h:>3} meses ({n} contratos/símbolo): {dt * 1000:.2f} ms "
+              f"({dt / h * 1e6:.0f} µs/mês)")
+    return tempos
+
+
+def arquivo_sintetico(raiz, inicio="2023-01-01", fim="2025-12-31", seed: int = 0):
+    """
+    Grava em 'raiz' um arquivo de barras (formato arquivo_barras) de contratos ZS/ZC negociados no período
+    e devolve históricos sintéticos de prêmio ({"soja": df, "milho": df}) e de NDF publicados todo mês.
+    """
+    import arquivo_barras
+    import ppe_engine
+
+    rng = np.random.default_rng(seed)
+    ini, fim = pd.Timestamp(inicio), pd.Timestamp(fim)
+    n_anos = fim.year - ini.year + 3
+    for ativo, base in (("ZS", 1050.0), ("ZC", 430.0)):
+        for tk in ppe_engine.generate_explicit_tickers(ativo, ini.year, ini.month, 7 * n_anos):
+            _, y, m = ppe_engine.parse_explicit_ticker(tk)
+            tempos = pd.date_range(pd.Timestamp(y - 2, m, 1), pd.Timestamp(y, m, 14), freq="8h", name="datetime")
+            df = pd.DataFrame({
+                "symbol": f"CBOT:{tk}", "open": base, "high": base, "low": base,
+                "close": base + rng.normal(0, 2, len(tempos)).cumsum(), "volume": 1.0,
+            }, index=tempos)
+            arquivo_barras._gravar(df, arquivo_barras.caminho_simbolo(tk, raiz=raiz))
+
+    def historico(col_rotulo, rotulo, col_valor, lo, hi):
+        linhas = []
+        for d in pd.date_range(ini, fim, freq="MS"):
+            for i in range(12):
+                y, m = ppe_engine.add_months(d.year, d.month, i)
+                linhas.append({"Data": d, col_rotulo: rotulo(y, m), col_valor: float(rng.uniform(lo, hi))})
+        return pd.DataFrame(linhas)
+
+    hist_premios = {
+        p: historico("Mes", lambda y, m: f"{_MESES_PT[m - 1]}/{y % 100:02d}", "Premio", 20, 120)
+        for p in ("soja", "milho")
+    }
+    hist_ndf = historico("Vencimento", lambda y, m: f"{_MESES_EXTENSO[m - 1]}/{y}", "NDF", 4.8, 6.0)
+    return hist_premios, hist_ndf
+
+
+def bench_backtest(inicio="2023-02-01", fim="2025-11-30", n_amostra: int = 10):
+    """Backtest vetorizado de vários anos x um nucleo_ppe por data (estimado por amostra)."""
+    import arquivo_barras
+    import backtest
+    import ppe_engine
+
+    with tempfile.TemporaryDirectory() as raiz:
+        hist_premios, hist_ndf = arquivo_sintetico(raiz)
+        t0 = time.perf_counter()
+        df_bt = backtest.backtest_ppe(inicio, fim, hist_premios, hist_ndf, raiz=raiz)
+        dt = time.perf_counter() - t0
+        n_datas = df_bt["Data"].nunique()
+
+        # Referência: uma rodada do motor por data (leitura do arquivo + nucleo_ppe)
+        datas = pd.bdate_range(inicio, fim)
+        amostra = datas[:: max(1, len(datas) // n_amostra)][:n_amostra]
+        t0 = time.perf_counter()
+        for d in amostra:
+            tickers = ppe_engine.contratos_cbot(d.year, d.month, ppe_engine.contratos_para_horizonte(ppe_engine.HORIZONTE_PADRAO, ano=d.year, mes=d.month))
+            precos = {}
+            for tk in tickers:
+                barras = arquivo_barras.ler(tk, raiz=raiz).loc[: d.normalize() + pd.Timedelta(hours=23, minutes=59)]
+                if len(barras):
+                    precos[tk] = float(barras["close"].iloc[-1])
+            price_map, _ = ppe_engine.build_price_map_from_explicit(precos)
+
+            def retrato(h):
+                return h[h["Data"] == h["Data"][h["Data"] <= d].max()]
+            curva_premios = pd.concat([
+                ppe_engine._curva_com_chave(retrato(h), "Mes", "Premio").assign(Produto=p) for p, h in hist_premios.items()
+            ], ignore_index=True)
+            curva_ndf = ppe_engine._curva_com_chave(retrato(hist_ndf), "Vencimento", "NDF")
+            ppe_engine.nucleo_ppe(d.year, d.month, price_map, curva_premios, curva_ndf, 40.0, 342.0, tuple(hist_premios))
+        dt_loop = (time.perf_counter() - t0) / len(amostra) * n_datas
+
+    print(f"backtest_ppe: {n_datas} datas ({len(df_bt):,} linhas) em {dt * 1000:.0f} ms | "
+          f"uma rodada por data (estimado): {dt_loop:.1f} s ({dt_loop / dt:,.0f}x)")
+    return dt, dt_loop
+
+
+def bench_montecarlo(n_caminhos: int = 1_000_000, processos: int = 4):
+    """Monte Carlo do PPE com covariância de um backtest sintético: caminhos por segundo, com e sem processos."""
+    import backtest
+    import cenarios
+    import montecarlo
+
+    with tempfile.TemporaryDirectory() as raiz:
+        hist_premios, hist_ndf = arquivo_sintetico(raiz)
+        df_bt = backtest.backtest_ppe("2024-01-01", "2025-06-30", hist_premios, hist_ndf, raiz=raiz)
+    cov = montecarlo.covariancia_historica(df_bt)
+    mercado = cenarios.mercado_de_longo(df_bt[df_bt["Data"] == df_bt["Data"].max()])
+
+    for proc in (None, processos):
+        t0 = time.perf_counter()
+        sim = montecarlo.simular_ppe(mercado, cov, n_caminhos, semente=42, processos=proc)
+        dt_sim = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        montecarlo.bandas_ppe(sim)
+        dt_bandas = time.perf_counter() - t0
+        print(f"montecarlo (processos={proc}): {n_caminhos:,} caminhos x {sim['saca'].shape[1]} vencimentos "
+              f"x {sim['saca'].shape[2]} produtos em {dt_sim * 1000:.0f} ms + percentis {dt_bandas * 1000:.0f} ms")
+
+
+@_cache_temporario
+def bench_cubo_sensibilidade(n_fatias: int = 1000):
+    """Cubo CBOT x prêmio x NDF x frete x fobbings: montagem, hit do cache e fatias 2-D."""
+    import cenarios
+    import ppe_engine
+    import sensibilidade
+    from provedores import ReplayProvider
+
+    df_soja, df_milho, df_ndf, barras = dados_sinteticos()
+    df_longo = ppe_engine.calcular_ppe_longo({"soja": df_soja, "milho": df_milho}, df_ndf,
+                                             provedor=ReplayProvider(barras))
+    mercado = cenarios.mercado_de_longo(df_longo)
+    eixos = {"CBOT": np.arange(-100, 101, 10), "Premio": np.arange(-50, 51, 10), "NDF": np.arange(-0.5, 0.51, 0.05),
+             "frete_dom": np.arange(250, 451, 20), "fobbings": np.arange(30, 51, 5)}
+    sensibilidade.cache_cubos.limpar()
+
+    t0 = time.perf_counter()
+    cubo = sensibilidade.cubo_sensibilidade(mercado, eixos)
+    dt_cubo = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    sensibilidade.cubo_sensibilidade(mercado, eixos)
+    dt_hit = time.perf_counter() - t0
+    pares = [("CBOT", "NDF"), ("Vencimento", "frete_dom"), ("Premio", "fobbings"), ("NDF", "Produto")]
+    t0 = time.perf_counter()
+    for i in range(n_fatias):
+        cubo.fatia(*pares[i % len(pares)])
+    dt_fatia = (time.perf_counter() - t0) / n_fatias
+    print(f"cubo_sensibilidade: {cubo.valores.size:,} células em {dt_cubo * 1000:.0f} ms | "
+          f"hit {dt_hit * 1000:.2f} ms | fatia 2-D {dt_fatia * 1e6:.0f} µs")
+    return dt_cubo, dt_hit, dt_fatia
+
+
+def bench_cache_planilha(n_reruns: int = 200):
+    """Reruns do app lendo soja/milho/ndf: leitura + processamento a cada rerun x CachePlanilha (PlanilhaLocal)."""
+    from cache_planilha import CachePlanilha, PlanilhaLocal
+    from premios_export_soja_milho import process_soja, process_milho, process_ndf
+
+    df_soja, df_milho, df_ndf, _ = dados_sinteticos()
+    abas = {"soja": (df_soja, process_soja), "milho": (df_milho, process_milho), "ndf": (df_ndf, process_ndf)}
+    with tempfile.TemporaryDirectory() as pasta:
+        for aba, (df, _) in abas.items():
+            df.to_csv(Path(pasta) / f"{aba}.csv", index=False)
+        local = PlanilhaLocal(pasta)
+
+        t0 = time.perf_counter()
+        for _ in range(n_reruns):
+            for aba, (_, processar) in abas.items():
+                processar(local.ler(aba))
+        dt_sem = (time.perf_counter() - t0) / n_reruns
+
+        local.leituras = 0
+        cache = CachePlanilha(local.ler, local.versao, ttl=0)  # TTL zero: confere a versão em todo rerun
+        t0 = time.perf_counter()
+        for _ in range(n_reruns):
+            for aba, (_, processar) in abas.items():
+                cache.ler(aba, processar)
+        dt_com = (time.perf_counter() - t0) / n_reruns
+
+    print(f"cache_planilha: sem cache {dt_sem * 1000:.2f} ms e {len(abas)} leituras por rerun | "
+          f"com cache {dt_com * 1000:.3f} ms, {local.leituras} leituras em {n_reruns} reruns")
+    return dt_sem, dt_com
+
+
+@_cache_temporario
+def bench_custo_incremental(n_execucoes: int = 100):
+    """calcular_ppe_longo quando só frete_dom muda: o grafo reaproveita cotações, curvas e base de mercado."""
+    import ppe_engine
+    from provedores import ReplayProvider
+
+    df_soja, df_milho, df_ndf, df_barras = dados_sinteticos()
+    premios = {"soja": df_soja, "milho": df_milho}
+    provedor = ReplayProvider(df_barras)
+
+    ppe_engine.grafo_ppe.limpar()  # memória do grafo; a base pode vir do cache em disco
+    t0 = time.perf_counter()
+    ppe_engine.calcular_ppe_longo(premios, df_ndf, frete_dom=300.0, provedor=provedor, data_ref="2025-10-15")
+    dt_frio = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i in range(n_execucoes):
+        ppe_engine.calcular_ppe_longo(premios, df_ndf, frete_dom=301.0 + i, provedor=provedor, data_ref="2025-10-15")
+    dt_custo = (time.perf_counter() - t0) / n_execucoes
+    print(f"calcular_ppe_longo: primeira chamada {dt_frio * 1000:.1f} ms | só frete_dom mudou {dt_custo * 1000:.2f} ms")
+    return dt_frio, dt_custo
+
+
+@_cache_temporario
+def bench_cenarios(n_cenarios: int = 200_000):
+    """Células (cenário x vencimento x produto) por segundo do motor de cenários sobre um retrato do mercado."""
+    import ppe_engine
+    import cenarios
+    from provedores import ReplayProvider
+
+    df_soja, df_milho, df_ndf, df_barras = dados_sinteticos()
+    df_longo = ppe_engine.calcular_ppe_longo({"soja": df_soja, "milho": df_milho}, df_ndf,
+                                             provedor=ReplayProvider(df_barras), data_ref="2025-10-15")
+    mercado = cenarios.mercado_de_longo(df_longo)
+    grade = cenarios.grade_cenarios(fobbings=np.linspace(20, 60, n_cenarios // 400),
+                                    frete_dom=np.linspace(200, 450, 200), ajuste_premio=[-10.0, 10.0])
+
+    t0 = time.perf_counter()
+    resultado = cenarios.avaliar_cenarios(mercado, **grade)
+    dt = time.perf_counter() - t0
+    celulas = resultado["EXW"].size
+    print(f"avaliar_cenarios: {len(grade['fobbings']):,} cenários, {celulas:,} células em {dt * 1000:.1f} ms "
+          f"({celulas / dt / 1e6:,.1f} M células/s)")
+    return dt
+
+
+def _lookup_mascaras(anos, meses, curva_sorted: pd.DataFrame, col_valor: str):
+    """Implementação antiga (duas máscaras booleanas por mês do grid), mantida só como referência."""
+    vals, srcs = [], []
+    for y, m in zip(anos, meses):
+        fut = curva_sorted[(curva_sorted["Ano"] > y) | ((curva_sorted["Ano"] == y) & (curva_sorted["MesNum"] >= m))]
+        if not fut.empty:
+            row = fut.iloc[0]
+            vals.append(row[col_valor]); srcs.append(row["Chave"])
+            continue
+        past = curva_sorted[(curva_sorted["Ano"] < y) | ((curva_sorted["Ano"] == y) & (curva_sorted["MesNum"] <= m))]
+        row = past.iloc[-1]
+        vals.append(row[col_valor]); srcs.append(row["Chave"])
+    return vals, srcs
+
+def bench_asof_curva(n_nos: int = 500, n_grid: int = 120, seed: int = 0):
+    """Busca próximo-ou-último: máscaras por linha x searchsorted, em curvas com centenas de nós."""
+    import ppe_engine
+
+    rng = np.random.default_rng(seed)
+    ords = np.sort(rng.choice(np.arange(24000, 24000 + 3 * n_nos), n_nos, replace=False))
+    curva = pd.DataFrame({"Ano": ords // 12, "MesNum": ords % 12 + 1, "Premio": rng.normal(60, 20, n_nos)})
+    curva["Chave"] = curva["MesNum"].map(lambda x: f"{x:02d}") + "/" + curva["Ano"].astype(str)
+    alvo = rng.integers(ords[0] - 12, ords[-1] + 12, n_grid)  # inclui alvos após o último nó (fallback)
+    anos, meses = alvo // 12, alvo % 12 + 1
+
+    t0 = time.perf_counter()
+    _lookup_mascaras(anos, meses, curva, "Premio")
+    t_ant = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    ppe_engine.asof_curva(anos, meses, curva, "Premio")
+    t_novo = time.perf_counter() - t0
+
+    print(f"asof_curva ({n_nos} nós x {n_grid} meses): máscaras {t_ant * 1000:.1f} ms | "
+          f"searchsorted {t_novo * 1000:.2f} ms ({t_ant / t_novo:,.0f}x)")
+    return t_ant, t_novo
+
+
+def bench_parse_rotulos(n_linhas: int = 100_000, seed: int = 0):
+    """Throughput do parser vetorizado de rótulos de mês (três formatos misturados) x apply por linha."""
+    from rotulos_mes import parse_rotulos
+
+    rng = np.random.default_rng(seed)
+    anos = rng.integers(2024, 2031, n_linhas)
+    meses = rng.integers(1, 13, n_linhas)
+    formato = rng.integers(0, 3, n_linhas)
+    rotulos = pd.Series([
+        f"{_MESES_PT[m - 1]}/{a % 100:02d}" if f == 0 else (f"{m:02d}/{a}" if f == 1 else f"{_MESES_EXTENSO[m - 1]}/{a}")
+        for a, m, f in zip(anos, meses, formato)
+    ])
+
+    t0 = time.perf_counter()
+    parse_rotulos(rotulos)
+    dt = time.perf_counter() - t0
+
+    # Referência: um pd.Series por linha, como o motor fazia com .apply(lambda s: pd.Series(...))
+    amostra = rotulos.iloc[:5000]
+    t0 = time.perf_counter()
+    amostra.apply(lambda s: pd.Series(s.split("/")))
+    dt_apply = (time.perf_counter() - t0) * n_linhas / len(amostra)
+
+    print(f"parse_rotulos ({n_linhas:,} linhas): {dt * 1000:.1f} ms ({n_linhas / dt:,.0f} linhas/s) | "
+          f"apply por linha (estimado): {dt_apply * 1000:,.0f} ms")
+    return dt
+
+
+if __name__ == "__main__":
+    bench_import_cotacoes()
+    bench_calcular_ppe_replay()
+    bench_nucleo_cache()
+    bench_horizonte()
+    bench_custo_incremental()
+    bench_backtest()
+    bench_cache_planilha()
+    bench_cenarios()
+    bench_cubo_sensibilidade()
+    bench_montecarlo()
+    bench_asof_curva()
+    bench_parse_rotulos()
@@ -0,0 +1,141 @@
+"""
+Cache de cotações com validade por barra
+Chave: (bolsa, símbolo, fechamento da barra). Um preço buscado por qualquer sessão ou processo
+vale até a próxima barra de 15 min fechar; depois disso a chave muda e a cotação é buscada de novo.
+Duas camadas: LRU em memória (por processo) e SQLite em disco (compartilhado entre processos).
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CAMINHO_PADRAO = BASE_DIR / "cache" / "cotacoes.sqlite"
+
+INTERVALO_BARRA = 15 * 60  # segundos (Interval.in_15_minute)
+
+
+def fechamento_barra(agora: float | None = None, intervalo: int = INTERVALO_BARRA) -> int:
+    """Horário (epoch, s) em que fechou a última barra completa: a chave de validade do cache."""
+    agora = time.time() if agora is None else agora
+    return int(agora // intervalo) * intervalo
+
+
+class CacheCotacoes:
+    def __init__(self, caminho=CAMINHO_PADRAO, max_itens: int = 1024, intervalo: int = INTERVALO_BARRA):
+        self.caminho = Path(caminho) if caminho is not None else None
+        self.max_itens = max_itens
+        self.intervalo = intervalo
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self._schema_ok = False
+        self._podado_em = None  # última barra em que este processo apagou as vencidas
+        self.hits_memoria = 0
+        self.hits_disco = 0
+        self.misses = 0
+
+    # ---------- SQLite ----------
+    def _conectar(self):
+        con = sqlite3.connect(self.caminho, timeout=5)
+        if not self._schema_ok:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS cotacoes ("
+                " exchange TEXT, symbol TEXT, fechamento INTEGER, preco REAL, barra TEXT,"
+                " PRIMARY KEY (exchange, symbol, fechamento))"
+            )
+            self._schema_ok = True
+        return con
+
+    def _ler_disco(self, chave):
+        if self.caminho is None or not self.caminho.exists():
+            return None
+        con = self._conectar()
+        try:
+            row = con.execute(
+                "SELECT preco, barra FROM cotacoes WHERE exchange=? AND symbol=? AND fechamento=?", chave
+            ).fetchone()
+        finally:
+            con.close()
+        return tuple(row) if row else None
+
+    def _gravar_disco(self, chave, valor):
+        if self.caminho is None:
+            return
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        # Barras vencidas não servem mais para ninguém: apaga uma vez por barra, não a cada put
+        with self._lock:
+            podar = self._podado_em is None or chave[2] > self._podado_em
+            if podar:
+                self._podado_em = chave[2]
+        con = self._conectar()
+        try:
+            with con:
+                con.execute("INSERT OR REPLACE INTO cotacoes VALUES (?, ?, ?, ?, ?)", (*chave, *valor))
+                if podar:
+                    con.execute("DELETE FROM cotacoes WHERE fechamento < ?", (chave[2] - self.intervalo,))
+        finally:
+            con.close()
+
+    # ---------- LRU ----------
+    def _lembrar(self, chave, valor):
+        with self._lock:
+            self._memoria[chave] = valor
+            self._memoria.move_to_end(chave)
+            while len(self._memoria) > self.max_itens:
+                self._memoria.popitem(last=False)
+
+    # ---------- API ----------
+    def chave_barra(self, agora: float | None = None) -> int:
+        return fechamento_barra(agora, self.intervalo)
+
+    def get(self, exchange: str, symbol: str, fechamento: int | None = None):
+        """Retorna (preço, barra ISO) se já houver cotação para a barra atual; senão None."""
+        fechamento = self.chave_barra() if fechamento is None else fechamento
+        chave = (exchange, symbol, fechamento)
+        with self._lock:
+            valor = self._memoria.get(chave)
+            if valor is not None:
+                self._memoria.move_to_end(chave)
+                self.hits_memoria += 1
+                return valor
+        valor = self._ler_disco(chave)
+        if valor is not None:
+            self._lembrar(chave, valor)
+            with self._lock:
+                self.hits_disco += 1
+            return valor
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, exchange: str, symbol: str, preco: float, barra, fechamento: int | None = None):
+        fechamento = self.chave_barra() if fechamento is None else fechamento
+        chave = (exchange, symbol, fechamento)
+        valor = (float(preco), None if barra is None else str(barra))
+        self._lembrar(chave, valor)
+        self._gravar_disco(chave, valor)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            total = self.hits_memoria + self.hits_disco + self.misses
+            return {
+                "hits_memoria": self.hits_memoria,
+                "hits_disco": self.hits_disco,
+                "misses": self.misses,
+                "taxa_acerto": (self.hits_memoria + self.hits_disco) / total if total else 0.0,
+                "itens_memoria": len(self._memoria),
+            }
+
+    def limpar(self):
+        with self._lock:
+            self._memoria.clear()
+        if self.caminho is not None and self.caminho.exists():
+            con = self._conectar()
+            try:
+                with con:
+                    con.execute("DELETE FROM cotacoes")
+            finally:
+                con.close()
@@ -0,0 +1,172 @@
+"""
+Cache de leituras da planilha (Google Sheets) com detecção de mudança
+Uma instância por processo, compartilhada por todas as sessões do app. Dentro do TTL nenhuma
+chamada é feita; vencido o TTL, uma consulta barata à versão do arquivo (modifiedTime/version do
+Drive) decide se as abas precisam ser relidas. As curvas processadas só são refeitas quando o
+conteúdo da aba mudou de fato. PlanilhaLocal (CSVs numa pasta) faz o papel da API em testes.
+"""
+
+import re
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from cache_resultados import chave_conteudo
+from singleflight import SingleFlight
+
+TTL_PADRAO = 60  # segundos sem consultar o Drive
+URL_DRIVE = "https://www.googleapis.com/drive/v3/files/{id}"
+
+
+def id_planilha(url: str) -> str:
+    """ID do arquivo a partir da URL da planilha (.../spreadsheets/d/<id>/...)."""
+    m = re.search(r"/d/([A-Za-z0-9_-]+)", url)
+    return m.group(1) if m else url
+
+
+def versao_drive(sessao, planilha_id: str, timeout: float = 10.0) -> str:
+    """
+    Versão do arquivo no Drive (muda a cada edição), numa chamada só de metadados.
+
+    Args:
+        sessao: sessão HTTP autorizada (ex.: AuthorizedSession do gspread), com .get(url, params=..., timeout=...)
+    """
+    r = sessao.get(URL_DRIVE.format(id=planilha_id),
+                   params={"fields": "version,modifiedTime", "supportsAllDrives": "true"}, timeout=timeout)
+    r.raise_for_status()
+    meta = r.json()
+    return f"{meta.get('version')}|{meta.get('modifiedTime')}"
+
+
+class PlanilhaLocal:
+    """Substituto local da planilha: uma aba = um CSV em 'diretorio'; versão = mtime/tamanho dos arquivos."""
+
+    def __init__(self, diretorio):
+        self.diretorio = Path(diretorio)
+        self.leituras = 0
+
+    def ler(self, aba: str) -> pd.DataFrame:
+        self.leituras += 1
+        return pd.read_csv(self.diretorio / f"{aba}.csv", dtype=str)
+
+    def versao(self) -> str:
+        return "|".join(
+            f"{p.name}:{p.stat().st_mtime_ns}:{p.stat().st_size}" for p in sorted(self.diretorio.glob("*.csv"))
+        )
+
+
+class _Aba:
+    __slots__ = ("versao", "conferida_em", "hash", "bruto", "erro", "processados")
+
+    def __init__(self):
+        self.versao = None
+        self.conferida_em = float("-inf")
+        self.hash = None
+        self.bruto = None
+        self.erro = None
+        self.processados = {}
+
+
+class CachePlanilha:
+    def __init__(self, leitor, versao=None, ttl: float = TTL_PADRAO, relogio=time.monotonic):
+        """
+        Args:
+            leitor: leitor(aba) -> DataFrame bruto (ex.: conn.read(worksheet=aba, ttl=0))
+            versao: versao() -> str barata (ex.: versao_drive); None = só TTL e hash do conteúdo
+        """
+        self.leitor = leitor
+        self.fn_versao = versao
+        self.ttl = ttl
+        self.relogio = relogio
+        self._abas = {}
+        self._versao = (float("-inf"), None)  # (consultada em, valor): uma consulta por TTL para todas as abas
+        self._lock = threading.Lock()
+        self._voo = SingleFlight("planilha", copiar=False)
+        self.leituras = 0
+        self.erro_versao = None  # última falha ao consultar a versão (detecção de mudança desligada)
+        self.consultas_versao = 0
+        self.reprocessamentos = 0
+
+    def _versao_atual(self, agora: float):
+        if self.fn_versao is None:
+            return None
+        with self._lock:
+            consultada_em, valor = self._versao
+        if agora - consultada_em < self.ttl:
+            return valor
+        try:
+            valor, erro = self.fn_versao(), None
+        except Exception as e:
+            valor, erro = None, f"{type(e).__name__}: {e}"  # sem Drive: cai no TTL + hash do conteúdo
+        with self._lock:
+            self.consultas_versao += 1
+            self.erro_versao = erro
+            self._versao = (agora, valor)
+        return valor
+
+    def _atualizar(self, aba: str) -> _Aba:
+        agora = self.relogio()
+        with self._lock:
+            ent = self._abas.setdefault(aba, _Aba())
+        if agora - ent.conferida_em < self.ttl:
+            return ent
+
+        versao = self._versao_atual(agora)
+        if versao is not None and versao == ent.versao:
+            ent.conferida_em = agora  # arquivo não mudou: nada a ler
+            return ent
+
+        try:
+            bruto = self.leitor(aba)
+            erro = None
+        except Exception as e:
+            bruto, erro = None, e  # aba ausente/erro também fica guardado até a próxima conferência
+        with self._lock:
+            self.leituras += 1
+        h = None if erro is not None else chave_conteudo(bruto)
+        if erro is not None or h != ent.hash:
+            ent.bruto, ent.hash, ent.erro, ent.processados = bruto, h, erro, {}
+        ent.versao, ent.conferida_em = versao, agora
+        return ent
+
+    def ler(self, aba: str, processar=None, *args):
+        """
+        Conteúdo da aba (bruto, ou processar(bruto, *args)), do cache sempre que possível.
+
+        Returns:
+            DataFrame bruto ou o resultado de processar; compartilhado entre sessões (não alterar)
+        """
+        ent = self._voo.do(aba, self._atualizar, aba)
+        if ent.erro is not None:
+            raise ent.erro
+        if processar is None:
+            return ent.bruto
+        chave = (getattr(processar, "__module__", None), getattr(processar, "__qualname__", repr(processar)),
+                 chave_conteudo(list(args)))
+        processados = ent.processados
+        if chave not in processados:
+            resultado = processar(ent.bruto, *args)
+            with self._lock:
+                processados[chave] = resultado
+                self.reprocessamentos += 1
+        return processados[chave]
+
+    def invalidar(self):
+        """Força a próxima leitura a conferir a versão (ex.: botão "recarregar planilha")."""
+        with self._lock:
+            self._versao = (float("-inf"), None)
+            for ent in self._abas.values():
+                ent.conferida_em = float("-inf")
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "abas": len(self._abas),
+                "deteccao_mudanca": self.fn_versao is not None and self.erro_versao is None,
+                "erro_versao": self.erro_versao,
+                "leituras": self.leituras,
+                "consultas_versao": self.consultas_versao,
+                "reprocessamentos": self.reprocessamentos,
+            }
@@ -0,0 +1,183 @@
+"""
+Cache de resultados endereçado por conteúdo
+Chave: hash (blake2b) das entradas de uma função pura. Entradas iguais -> mesma chave -> mesmo
+resultado, não importa a sessão que pediu. Duas camadas: LRU em memória (por processo) e, opcional,
+um Parquet por chave em disco (compartilhado entre processos e reinícios). O disco sobrevive a
+mudanças de código, por isso os arquivos levam a 'versao' do cache no nome.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DIR_PADRAO = BASE_DIR / "cache" / "resultados"
+
+_ESCALARES = (int, float, str, bool, type(None), np.number)
+
+
+def _alimentar(h, obj):
+    """Serializa obj de forma canônica dentro do hash (tipos entram junto para não colidir)."""
+    if isinstance(obj, pd.DataFrame):
+        h.update(b"D")
+        for col in obj.columns:
+            _alimentar(h, str(col))
+            _alimentar(h, obj[col].to_numpy())
+    elif isinstance(obj, pd.Series):
+        _alimentar(h, obj.to_numpy())
+    elif isinstance(obj, np.ndarray):
+        if obj.dtype.kind in "biuf":
+            h.update(b"A" + obj.dtype.str.encode() + str(obj.shape).encode())
+            h.update(np.ascontiguousarray(obj).tobytes())
+        else:
+            h.update(b"O" + str(len(obj)).encode())
+            h.update("\x1f".join(map(repr, obj.tolist())).encode())
+    elif isinstance(obj, dict):
+        itens = sorted(obj.items(), key=lambda kv: repr(kv[0]))
+        if all(isinstance(v, _ESCALARES) for _, v in itens):
+            h.update(b"M" + repr(itens).encode())  # caso comum (mapa de preços): uma atualização só
+        else:
+            h.update(b"N" + str(len(itens)).encode())
+            for k, v in itens:
+                _alimentar(h, k)
+                _alimentar(h, v)
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"L" + str(len(obj)).encode())
+        for item in obj:
+            _alimentar(h, item)
+    else:
+        h.update(b"S" + repr(obj).encode() + b"\x1e")
+
+
+def _raso(obj):
+    """Cópia rasa de DataFrame/Series (copy-on-write, padrão no pandas >= 3 fixado no requirements.txt:
+    quem alterar não mexe no cache); outros objetos (ex.: resultados com arrays somente leitura) são
+    guardados como estão."""
+    return obj.copy(deep=False) if isinstance(obj, (pd.DataFrame, pd.Series)) else obj
+
+
+def chave_conteudo(*partes) -> str:
+    """Hash hexadecimal das partes (DataFrames, arrays, dicts, tuplas, escalares)."""
+    h = hashlib.blake2b(digest_size=16)
+    for parte in partes:
+        _alimentar(h, parte)
+    return h.hexdigest()
+
+
+class CacheResultados:
+    def __init__(self, nome: str, max_itens: int = 256, diretorio=None, max_arquivos: int = 2000, versao=0):
+        self.nome = nome
+        self.versao = versao  # sal das chaves em disco (versão das fórmulas/layout de quem usa o cache)
+        self.max_itens = max_itens
+        self.diretorio = Path(diretorio) / nome if diretorio is not None else None
+        self.max_arquivos = max_arquivos
+        self._n_arquivos = None  # arquivos na pasta (contados na 1ª gravação; depois só incrementa)
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_memoria = 0
+        self.hits_disco = 0
+        self.misses = 0
+
+    # ---------- Disco ----------
+    def _arquivo(self, chave: str) -> Path:
+        return self.diretorio / f"v{self.versao}-{chave}.parquet"
+
+    def _ler_disco(self, chave: str):
+        if self.diretorio is None:
+            return None
+        arq = self._arquivo(chave)
+        try:
+            return pd.read_parquet(arq)
+        except (FileNotFoundError, OSError, ValueError):
+            return None  # ausente ou gravação interrompida: recalcula
+
+    def _gravar_disco(self, chave: str, df: pd.DataFrame):
+        if self.diretorio is None or not isinstance(df, pd.DataFrame):
+            return
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        arq = self._arquivo(chave)
+        novo = not arq.exists()
+        tmp = arq.with_suffix(f".{threading.get_ident()}.tmp")
+        df.to_parquet(tmp, index=False)
+        tmp.replace(arq)  # troca atômica
+        with self._lock:
+            if self._n_arquivos is None:
+                self._n_arquivos = sum(1 for _ in self.diretorio.glob("*.parquet"))
+            elif novo:
+                self._n_arquivos += 1
+            if self._n_arquivos <= self.max_arquivos:
+                return
+        self._podar_disco()
+
+    def _podar_disco(self):
+        """Apaga os arquivos mais antigos até 90% de max_arquivos (a folga evita varrer a pasta a cada put)."""
+        arquivos = list(self.diretorio.glob("*.parquet"))
+        manter = int(self.max_arquivos * 0.9)
+        if len(arquivos) > manter:
+            for velho in sorted(arquivos, key=lambda p: p.stat().st_mtime)[: len(arquivos) - manter]:
+                velho.unlink(missing_ok=True)
+        with self._lock:
+            self._n_arquivos = min(len(arquivos), manter)  # outros processos podem ter gravado: recontado na próxima poda
+
+    # ---------- LRU ----------
+    def _lembrar(self, chave: str, df: pd.DataFrame):
+        with self._lock:
+            self._memoria[chave] = df
+            self._memoria.move_to_end(chave)
+            while len(self._memoria) > self.max_itens:
+                self._memoria.popitem(last=False)
+
+    # ---------- API ----------
+    def get(self, chave: str):
+        """Resultado guardado para a chave (cópia), ou None."""
+        with self._lock:
+            df = self._memoria.get(chave)
+            if df is not None:
+                self._memoria.move_to_end(chave)
+                self.hits_memoria += 1
+                return _raso(df)
+        df = self._ler_disco(chave)
+        if df is not None:
+            self._lembrar(chave, df)
+            with self._lock:
+                self.hits_disco += 1
+            return _raso(df)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, chave: str, df: pd.DataFrame):
+        self._lembrar(chave, _raso(df))
+        self._gravar_disco(chave, df)
+
+    def obter(self, chave: str, fn, *args, **kwargs) -> pd.DataFrame:
+        """Devolve o resultado guardado para a chave ou calcula fn(*args) e guarda."""
+        df = self.get(chave)
+        if df is None:
+            df = fn(*args, **kwargs)
+            self.put(chave, df)
+        return df
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            total = self.hits_memoria + self.hits_disco + self.misses
+            return {
+                "nome": self.nome,
+                "hits_memoria": self.hits_memoria,
+                "hits_disco": self.hits_disco,
+                "misses": self.misses,
+                "taxa_acerto": (self.hits_memoria + self.hits_disco) / total if total else 0.0,
+                "itens_memoria": len(self._memoria),
+            }
+
+    def limpar(self):
+        with self._lock:
+            self._memoria.clear()
+            self._n_arquivos = None
+        if self.diretorio is not None and self.diretorio.exists():
+            for arq in self.diretorio.glob("*.parquet"):
+                arq.unlink(missing_ok=True)
@@ -0,0 +1,114 @@
+"""
+Motor de cenários do PPE
+Avalia milhares de combinações de custos (fobbings, frete doméstico) e ajustes de prêmio sobre
+um único retrato do mercado (preços CBOT, prêmios e NDF já buscados), sem rede e sem laços:
+o resultado sai como arrays (cenário x vencimento x produto) por broadcasting do NumPy.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from ppe_engine import PRODUTOS, TON_POR_SACA, LB_POR_KG
+from rotulos_mes import parse_rotulos
+
+SAIDAS = ["FOB (R$/ton)", "EXW", "PPE Preço saca origem (R$/sc)", "Basis Praça-CBOT (c$/bu)"]
+
+
+def mercado_de_longo(df_longo: pd.DataFrame) -> dict:
+    """
+    Retrato do mercado a partir da tabela longa do motor (calcular_ppe_longo / nucleo_ppe).
+
+    Returns:
+        dict com "produtos", "vencimentos" (MM/YYYY), "anos"/"meses" dos vencimentos e arrays (vencimento x produto) "preco",
+        "premio", "ndf", além de "fator" (c$/bu -> $/ton) por produto
+    """
+    produtos = list(pd.unique(df_longo["Produto"]))
+    largo = df_longo.pivot(index=["Ano", "MesNum"], columns="Produto", values=["Preço", "Premio", "NDF"])
+    largo = largo.sort_index()
+    return {
+        "produtos": produtos,
+        "vencimentos": [f"{m:02d}/{a}" for a, m in largo.index],
+        "anos": largo.index.get_level_values("Ano").to_numpy(dtype=np.int64),
+        "meses": largo.index.get_level_values("MesNum").to_numpy(dtype=np.int64),
+        "preco": largo["Preço"][produtos].to_numpy(dtype=float),
+        "premio": largo["Premio"][produtos].to_numpy(dtype=float),
+        "ndf": largo["NDF"][produtos].to_numpy(dtype=float),
+        "fator": np.array([PRODUTOS[p]["fator"] for p in produtos]),
+    }
+
+
+def mercado_de_tabelas(tabelas: dict) -> dict:
+    """Retrato do mercado a partir das tabelas por produto ({"soja": df_ppe_soja, ...}, Vencimento "MM/YYYY")."""
+    partes = []
+    for produto, df in tabelas.items():
+        rot = parse_rotulos(df["Vencimento"])
+        partes.append(pd.DataFrame({
+            "Produto": produto,
+            "Ano": rot["Ano"].to_numpy(dtype=np.int64),
+            "MesNum": rot["MesNum"].to_numpy(dtype=np.int64),
+            "Preço": df["Preço"].to_numpy(dtype=float),
+            "Premio": df["Premio"].to_numpy(dtype=float),
+            "NDF": df["NDF"].to_numpy(dtype=float),
+        }))
+    return mercado_de_longo(pd.concat(partes, ignore_index=True))
+
+
+def grade_cenarios(**eixos) -> dict:
+    """
+    Produto cartesiano dos valores de cada parâmetro (ex.: fobbings=[30, 40], frete_dom=range(250, 400, 10)).
+
+    Returns:
+        dict parâmetro -> array 1-D com um valor por cenário
+    """
+    nomes = list(eixos)
+    combos = np.array(list(itertools.product(*(np.atleast_1d(eixos[n]) for n in nomes))), dtype=float)
+    return {n: combos[:, i] for i, n in enumerate(nomes)}
+
+
+def avaliar_cenarios(mercado: dict, fobbings=40.0, frete_dom=342.0, ajuste_premio=0.0) -> dict:
+    """
+    PPE de todos os cenários de uma vez.
+
+    Args:
+        mercado: retrato de mercado_de_longo
+        fobbings, frete_dom: R$/ton, escalar ou array com um valor por cenário
+        ajuste_premio: c$/bu somados ao prêmio da curva (escalar, por cenário ou (cenário, vencimento, produto))
+
+    Returns:
+        dict saída -> array (cenário x vencimento x produto), saídas em SAIDAS
+    """
+    fobbings, frete_dom = np.broadcast_arrays(np.atleast_1d(np.asarray(fobbings, dtype=float)),
+                                              np.atleast_1d(np.asarray(frete_dom, dtype=float)))
+    ajuste = np.asarray(ajuste_premio, dtype=float)
+    if ajuste.ndim == 1:
+        ajuste = ajuste[:, None, None]
+
+    preco, ndf = mercado["preco"], mercado["ndf"]
+    # R$/ton por c$/bu em cada vencimento x produto: a cadeia inteira vira um fator só
+    rs_por_cbu = mercado["fator"] * ndf
+    fob_rs = (preco + mercado["premio"] + ajuste) * rs_por_cbu
+    if fob_rs.ndim == 2:
+        fob_rs = np.broadcast_to(fob_rs, (len(fobbings),) + fob_rs.shape)
+
+    exw = fob_rs - (fobbings + frete_dom)[:, None, None]
+    saca = exw * TON_POR_SACA
+    basis = saca * (100 / (ndf * LB_POR_KG)) - preco
+    return dict(zip(SAIDAS, (fob_rs, exw, saca, basis)))
+
+
+def tabela_cenarios(mercado: dict, resultado: dict, parametros: dict | None = None) -> pd.DataFrame:
+    """Achata o resultado em tabela longa (uma linha por cenário x vencimento x produto) para exibir/exportar."""
+    n_cen, n_venc, n_prod = resultado[SAIDAS[0]].shape
+    cen, venc, prod = np.indices((n_cen, n_venc, n_prod)).reshape(3, -1)
+    df = pd.DataFrame({
+        "Cenário": cen,
+        "Vencimento": np.asarray(mercado["vencimentos"], dtype=object)[venc],
+        "Produto": np.asarray(mercado["produtos"], dtype=object)[prod],
+    })
+    for nome, valores in (parametros or {}).items():
+        df[nome] = np.broadcast_to(np.asarray(valores, dtype=float), (n_cen,))[cen]
+    for saida in SAIDAS:
+        df[saida] = resultado[saida].reshape(-1)
+    return df
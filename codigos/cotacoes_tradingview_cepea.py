@@ -1,108 +1,295 @@
 # tabela_cmdty.py
 # pip install --upgrade --no-cache-dir git+https://github.com/rongardF/tvdatafeed.git
 # pip install python-dotenv
-import pandas as pd, requests, io, time
-from tvDatafeed import TvDatafeed, Interval
-from datetime import date
-from dotenv import load_dotenv
+import pandas as pd, time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 import os
 
+from cache_cotacoes import CacheCotacoes
+import resiliencia
+from resiliencia import CircuitoAberto, PoliticaRetry, SemDados
+from singleflight import SingleFlight
+import limitador
+from limitador import TokenBucket
 
-# ---------- B3 Futures ----------
-# cria a sessão autenticada
 
-import streamlit as st
+# ---------- Sessão TradingView ----------
+# Nada de rede no import: o login só acontece na primeira busca de cotação.
 
-# Tenta carregar do Streamlit Secrets (Cloud) ou .env (local)
-try:
-    TV_USERNAME = st.secrets["tradingview"]["TV_USERNAME"]
-    TV_PASSWORD = st.secrets["tradingview"]["TV_PASSWORD"]
-except Exception:
-    # Fallback para desenvolvimento local
-    load_dotenv(dotenv_path=os.path.join("configs", ".env"))
-    TV_USERNAME = os.getenv("TV_USERNAME")
-    TV_PASSWORD = os.getenv("TV_PASSWORD")
+def _carregar_credenciais():
+    # Tenta carregar do Streamlit Secrets (Cloud) ou .env (local)
+    try:
+        import streamlit as st
+        return st.secrets["tradingview"]["TV_USERNAME"], st.secrets["tradingview"]["TV_PASSWORD"]
+    except Exception:
+        # Fallback para desenvolvimento local
+        from dotenv import load_dotenv
+        load_dotenv(dotenv_path=os.path.join("configs", ".env"))
+        return os.getenv("TV_USERNAME"), os.getenv("TV_PASSWORD")
 
-# Validação simples das credenciais
-if not TV_USERNAME or not TV_PASSWORD:
-    raise RuntimeError("Credenciais do TradingView não encontradas. Preencha configs/.env com TV_USERNAME e TV_PASSWORD.")
+class SessaoTradingView:
+    """Sessão autenticada no TradingView, criada sob demanda e reaproveitada pelo processo."""
 
-tv = TvDatafeed(username=TV_USERNAME, password=TV_PASSWORD)
-max_attempts = 3
-delay = 2
+    def __init__(self, username=None, password=None):
+        self._username = username
+        self._password = password
+        self._tv = None
+        self._lock = threading.Lock()
+
+    @property
+    def conectada(self):
+        return self._tv is not None
+
+    def cliente(self):
+        if self._tv is None:
+            with self._lock:
+                if self._tv is None:
+                    username, password = self._username, self._password
+                    if not username or not password:
+                        username, password = _carregar_credenciais()
+                    # Validação simples das credenciais
+                    if not username or not password:
+                        raise RuntimeError("Credenciais do TradingView não encontradas. Preencha configs/.env com TV_USERNAME e TV_PASSWORD.")
+                    from tvDatafeed import TvDatafeed
+                    self._tv = TvDatafeed(username=username, password=password)
+        return self._tv
+
+    @property
+    def token(self):
+        return self.cliente().token
+
+sessao = SessaoTradingView()
+
+# Retry com backoff exponencial + jitter; cada bolsa tem seu circuit breaker (resiliencia.breaker)
+politica = PoliticaRetry(max_tentativas=3, base=0.5, fator=2.0, teto=4.0)
+
+# Busca em lote: número de conexões simultâneas e prazo total (segundos) do lote
+MAX_WORKERS = 8
+PRAZO_LOTE = 20.0
+
+# Limite de requisições get_hist à conta TradingView (por processo). Para valer entre processos:
+# TokenBucket(taxa=5, capacidade=10, caminho=BASE_DIR / "cache" / "limitador.sqlite")
+limitador_tv = TokenBucket(taxa=5, capacidade=10)
+
+# Cache por barra de 15 min compartilhado entre sessões/processos (None desliga)
+cache = CacheCotacoes()
+
+# Lotes idênticos pedidos ao mesmo tempo (vários "Recalcular") viram uma única busca
+voo_cotacoes = SingleFlight("cotações")
+
+_local = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+
+def _tv_thread():
+    # O TvDatafeed guarda o websocket em self.ws, então cada thread usa sua própria
+    # instância (sem login) reaproveitando o token da sessão autenticada.
+    cliente = getattr(_local, "tv", None)
+    if cliente is None:
+        from tvDatafeed import TvDatafeed
+        cliente = TvDatafeed()
+        cliente.token = sessao.token
+        _local.tv = cliente
+    return cliente
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="tv")
+        return _executor
+
+def _derrubar(cliente):
+    """Fecha o websocket em uso pelo cliente: o get_hist preso no recv retorna e libera a thread do pool."""
+    ws = getattr(cliente, "ws", None)
+    if ws is None:
+        return
+    try:
+        # abort() derruba o socket sem esperar o handshake de fechamento (o recv está em outra thread)
+        (getattr(ws, "abort", None) or ws.close)()
+    except Exception:
+        pass
+
+def _intervalo(nome):
+    from tvDatafeed import Interval
+    return getattr(Interval, nome)
+
+def _fetch_barra(symbol, exchange, cliente=None, ate=None, prioridade=None):
+    """Retorna (preço, horário da barra) da última barra de 15 min fechada."""
+    intervalo = _intervalo("in_15_minute")
+    cliente = cliente or sessao.cliente()
+
+    def _tentar():
+        limitador_tv.adquirir(prioridade, ate)
+        df = cliente.get_hist(symbol=symbol, exchange=exchange, interval=intervalo, n_bars=4)
+        if df is None or df.empty or len(df) < 2:
+            raise SemDados(f"Sem barras para {symbol}")  # contrato não listado/ilíquido: não é a bolsa fora do ar
+        return df.iloc[-2, 4].round(1), df.index[-2]
+
+    try:
+        return politica.executar(_tentar, breaker=resiliencia.breaker(exchange), ate=ate)
+    except (CircuitoAberto, SemDados):
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Falha ao obter dados do símbolo {symbol}") from e
+
+def fetch_hist(symbol, exchange='CBOT', intervalo='in_15_minute', n_bars=4, cliente=None):
+    """Barras completas do get_hist (índice datetime; colunas symbol, open, high, low, close, volume)."""
+    interval = _intervalo(intervalo)
+    cliente = cliente or sessao.cliente()
+
+    def _tentar():
+        limitador_tv.adquirir()
+        df = cliente.get_hist(symbol=symbol, exchange=exchange, interval=interval, n_bars=n_bars)
+        if df is None or df.empty:
+            raise SemDados(f"Sem barras para {symbol}")
+        return df
+
+    try:
+        return politica.executar(_tentar, breaker=resiliencia.breaker(exchange))
+    except (CircuitoAberto, SemDados):
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Falha ao obter histórico do símbolo {symbol}") from e
+
+def _cotacao(symbol, exchange, cliente=None, ate=None, fechamento=None):
+    """Como _fetch_barra, mas passa antes pelo cache da barra atual."""
+    if cache is None:
+        return _fetch_barra(symbol, exchange, cliente, ate)
+    fechamento = cache.chave_barra() if fechamento is None else fechamento
+    hit = cache.get(exchange, symbol, fechamento)
+    if hit is not None:
+        preco, barra = hit
+        return preco, (pd.Timestamp(barra) if barra is not None else None)
+    preco, barra = _fetch_barra(symbol, exchange, cliente, ate)
+    cache.put(exchange, symbol, preco, barra, fechamento)
+    return preco, barra
 
 def fetch_b3(symbol):
-    for _ in range(max_attempts):
-        try:
-            df = tv.get_hist(symbol=symbol, exchange='BMFBOVESPA', interval=Interval.in_15_minute, n_bars=4)
-            if df is not None and not df.empty and len(df) >= 2:
-                return df.iloc[-2, 4].round(1)
-        except Exception:
-            time.sleep(delay)
-    raise RuntimeError(f"Falha ao obter dados do símbolo {symbol}")
+    return _cotacao(symbol, 'BMFBOVESPA')[0]
 
 def fetch_eua(symbol):
-    for _ in range(max_attempts):
-        try:
-            df = tv.get_hist(symbol=symbol, exchange='CBOT', interval=Interval.in_15_minute, n_bars=4)
-            if df is not None and not df.empty and len(df) >= 2:
-                return df.iloc[-2, 4].round(1)
-        except Exception:
-            time.sleep(delay)
-    raise RuntimeError(f"Falha ao obter dados do símbolo {symbol}")
-
-
-# Escolher os tickers que desejar baixar, basta apenas adicionar ou remover da lista
-ccm = fetch_b3('CCMN2025')
-sjc = fetch_b3('SJC1!')
-zc1 = fetch_eua('ZC1!')
-zc2 = fetch_eua('ZC2!')
-zc3 = fetch_eua('ZCH2026')
-zc4 = fetch_eua('ZCK2026')
-zc5 = fetch_eua('ZCN2026')
-zc6 = fetch_eua('ZCU2026')
-zs1 = fetch_eua('ZS1!')
-zs2 = fetch_eua('ZS2!')
-zs3 = fetch_eua('ZSF2026')
-zs4 = fetch_eua('ZSH2026') 
-zs5 = fetch_eua('ZSK2026')
-zs6 = fetch_eua('ZSN2026')
-
-# ---------- Monta DataFrame ----------
-dados = [
-    ["(SJC)",  sjc,         "US$/sc"],
-    ["(CCM)",  ccm,      "R$/sc"],
-    ["(ZC1)", zc1,         "c$/bu"],
-    ["(ZC2)", zc2,         "c$/bu"],
-    ["(ZC3)",  zc3,         "c$/bu"],
-    ["(ZC4)", zc4,         "c$/bu"],
-    ["(ZC5)", zc5,         "c$/bu"],
-    ["(ZC6)", zc6,        "c$/bu"],
-    ["(ZS1)", zs1,         "c$/bu"],
-    ["(ZS2)", zs2,         "c$/bu"],
-    ["(ZS3)", zs3,         "c$/bu"],
-    ["(ZS4)", zs4,         "c$/bu"],
-    ["(ZS5)", zs5,         "c$/bu"],
-    ["(ZS6)", zs6,         "c$/bu"],
+    return _cotacao(symbol, 'CBOT')[0]
+
+def fetch_many(symbols, exchange='CBOT', prazo=PRAZO_LOTE):
+    """
+    Busca vários símbolos em paralelo (até MAX_WORKERS conexões simultâneas).
+    Cotações já em cache para a barra atual não vão para a rede, e um lote idêntico já em
+    andamento em outra sessão é aguardado em vez de repetido.
+    Tickers que não respondem dentro do 'prazo' (segundos) saem com status "timeout";
+    com o breaker da bolsa aberto, saem na hora com status "circuito aberto"; contratos sem barras
+    (não listados) saem com "sem dados" e não contam para o breaker.
+
+    Returns:
+        DataFrame com colunas ["Ticker", "Preço", "Barra", "Status"], na ordem de 'symbols'
+    """
+    symbols = list(dict.fromkeys(symbols))
+    return voo_cotacoes.do((exchange, tuple(symbols)), _fetch_many, symbols, exchange, prazo)
+
+def _fetch_many(symbols, exchange, prazo):
+    # O prazo do lote nunca passa do orçamento de latência corrente (resiliencia.orcamento)
+    restante = resiliencia.prazo_restante()
+    prazo = prazo if restante is None else min(prazo, restante)
+    ate = time.monotonic() + prazo
+    fechamento = cache.chave_barra() if cache is not None else None
+
+    resultados = {}
+    pendentes = []
+    for sym in symbols:
+        hit = cache.get(exchange, sym, fechamento) if cache is not None else None
+        if hit is not None:
+            resultados[sym] = [sym, float(hit[0]), pd.Timestamp(hit[1]) if hit[1] else None, "ok"]
+        else:
+            pendentes.append(sym)
+
+    if pendentes:
+        # As threads do pool não herdam o contexto: a prioridade vai explícita
+        prio = limitador.prioridade_atual()
+        em_curso = {}  # símbolo -> cliente da thread que está buscando
+        lock = threading.Lock()
+
+        def _buscar(sym):
+            cliente = _tv_thread()
+            with lock:
+                em_curso[sym] = cliente
+            try:
+                return _fetch_barra(sym, exchange, cliente, ate, prio)
+            finally:
+                with lock:
+                    em_curso.pop(sym, None)
+
+        executor = _get_executor()
+        futuros = {sym: executor.submit(_buscar, sym) for sym in pendentes}
+        wait(futuros.values(), timeout=prazo)
+
+        for sym, fut in futuros.items():
+            if not fut.done():
+                # cancel() só tira da fila; quem já está na rede tem a conexão derrubada para
+                # não prender uma das MAX_WORKERS threads além do prazo
+                if not fut.cancel():
+                    with lock:
+                        if sym in em_curso:
+                            _derrubar(em_curso[sym])
+                resultados[sym] = [sym, None, None, "timeout"]
+            elif isinstance(fut.exception(), CircuitoAberto):
+                resultados[sym] = [sym, None, None, "circuito aberto"]
+            elif isinstance(fut.exception(), SemDados):
+                resultados[sym] = [sym, None, None, "sem dados"]
+            elif fut.exception() is not None:
+                resultados[sym] = [sym, None, None, "erro"]
+            else:
+                preco, barra = fut.result()
+                if cache is not None:
+                    cache.put(exchange, sym, preco, barra, fechamento)
+                resultados[sym] = [sym, float(preco), barra, "ok"]
+
+    linhas = [resultados[sym] for sym in symbols]
+    return pd.DataFrame(linhas, columns=["Ticker", "Preço", "Barra", "Status"])
+
+
+# ---------- Tabela de cotações ----------
+# (Produto, símbolo, bolsa, unidade): basta adicionar ou remover da lista
+ATIVOS_PADRAO = [
+    ("(SJC)", "SJC1!", "BMFBOVESPA", "US$/sc"),
+    ("(CCM)", "CCM1!", "BMFBOVESPA", "R$/sc"),
+    ("(ZC1)", "ZC1!", "CBOT", "c$/bu"),
+    ("(ZC2)", "ZC2!", "CBOT", "c$/bu"),
+    ("(ZS1)", "ZS1!", "CBOT", "c$/bu"),
+    ("(ZS2)", "ZS2!", "CBOT", "c$/bu"),
 ]
 
-df_cmdty = pd.DataFrame(dados, columns=[ "Produto", "Preço", "Unidade"])
+def tabela_cmdty(ativos=None):
+    """Baixa os ativos (uma busca em lote por bolsa) e monta a tabela Produto/Preço/Unidade."""
+    ativos = ativos or ATIVOS_PADRAO
+    precos = {}
+    for exchange in dict.fromkeys(a[2] for a in ativos):
+        simbolos = [a[1] for a in ativos if a[2] == exchange]
+        df_cot = fetch_many(simbolos, exchange)
+        precos.update({(exchange, tk): px for tk, px in zip(df_cot["Ticker"], df_cot["Preço"])})
+
+    dados = [[produto, precos.get((exchange, simbolo)), unidade] for produto, simbolo, exchange, unidade in ativos]
+    df_cmdty = pd.DataFrame(dados, columns=["Produto", "Preço", "Unidade"])
+    return df_cmdty.round(2)
 
-df = df_cmdty.round(2)
-#Se quiser printas do dados = []
-#print(df.to_string(index=False))
+#Se quiser printar a tabela:
+#print(tabela_cmdty().to_string(index=False))
 
 
 # =================================================
 #DESCRIÇÃO DO SCRIPT
 
 # 1. FAZ O lOGIN COM USERNAME E SENHA NO TRADINGVIEW USANDO OS DADOS NO ARQUIVO CONFIG/.ENV
-# 2. Entra no trading view e baixa cotações de ativos financeiros
+#    (só na primeira busca; importar o módulo não acessa a rede)
+# 2. Entra no trading view e baixa cotações de ativos financeiros (fetch_b3, fetch_eua, fetch_many, tabela_cmdty)
 
 # O QUE O USUÁRIO PODE MUDAR:
 # - Colocar suas credenciais do trading view no arquivo configs/.env
-# - Escolher os ativos pra pegar as informações: Mudar os símbolos dos ativos na função fetch_b3 e fetch_eua
-# - Mudar o número de tentativas e o delay entre elas (max_attempts e delay)
+# - Escolher os ativos da tabela: Mudar a lista ATIVOS_PADRAO (ou passar outra lista para tabela_cmdty)
+# - Mudar o número de tentativas e o backoff entre elas (politica = PoliticaRetry(...))
+# - Mudar o paralelismo e o prazo da busca em lote (MAX_WORKERS e PRAZO_LOTE, usados por fetch_many)
+# - Mudar o limite de requisições ao TradingView (limitador_tv) e a prioridade (limitador.prioridade)
+# - Desligar o cache de cotações (cache = None) ou consultar acertos/erros com cache.estatisticas()
 # - Mudar o intervalo de tempo (Interval.in_15_minute) e o número de barras (n_bars=4) dentro da def fetch_b3 e fetch_eua
 # - Mudar o formato do DataFrame final (colunas, arredondamento, etc)
 # =========================================================================
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""
+Grafo de estágios com resultados intermediários em cache
+Cada estágio declara de quais entradas (externas ou de outros estágios) depende. A versão de um
+estágio é o hash das versões das suas entradas; se nenhuma mudou, o resultado guardado é
+reaproveitado. Assim, mudar só um custo recalcula apenas os estágios abaixo dele.
+Estágios voláteis (ex.: cotações) rodam sempre, mas a versão vem do conteúdo do resultado:
+se a cotação não mudou, nada abaixo é recalculado.
+"""
+
+import threading
+from collections import OrderedDict
+
+from cache_resultados import chave_conteudo
+
+
+class _Estagio:
+    __slots__ = ("nome", "fn", "entradas", "volatil", "persistir", "execucoes", "reaproveitados")
+
+    def __init__(self, nome, fn, entradas, volatil, persistir):
+        self.nome = nome
+        self.fn = fn
+        self.entradas = list(entradas)
+        self.volatil = volatil
+        self.persistir = persistir
+        self.execucoes = 0
+        self.reaproveitados = 0
+
+
+class GrafoEstagios:
+    def __init__(self, nome: str, max_itens: int = 64):
+        self.nome = nome
+        self.max_itens = max_itens  # resultados guardados por estágio
+        self._estagios = {}
+        self._memoria = {}
+        self._lock = threading.Lock()
+
+    def estagio(self, nome: str, fn, entradas, volatil: bool = False, persistir=None):
+        """
+        Registra um estágio: fn(*valores das entradas, na ordem).
+
+        Args:
+            volatil: roda sempre (depende do mundo externo); a versão vem do resultado
+            persistir: CacheResultados opcional (resultado DataFrame) para guardar o estágio em disco
+        """
+        self._estagios[nome] = _Estagio(nome, fn, entradas, volatil, persistir)
+        self._memoria[nome] = OrderedDict()
+        return self
+
+    def _guardar(self, estagio: _Estagio, versao: str, valor):
+        mem = self._memoria[estagio.nome]
+        with self._lock:
+            mem[versao] = valor
+            mem.move_to_end(versao)
+            while len(mem) > self.max_itens:
+                mem.popitem(last=False)
+
+    def _resolver(self, nome: str, externos: dict, versoes: dict, valores: dict):
+        if nome in versoes:
+            return
+        if nome not in self._estagios:
+            if nome not in externos:
+                raise KeyError(f"Entrada '{nome}' não informada para o grafo {self.nome}")
+            valores[nome] = externos[nome]
+            versoes[nome] = chave_conteudo(externos[nome])
+            return
+
+        est = self._estagios[nome]
+        for entrada in est.entradas:
+            self._resolver(entrada, externos, versoes, valores)
+        args = [valores[e] for e in est.entradas]
+
+        if est.volatil:
+            valor = est.fn(*args)
+            with self._lock:
+                est.execucoes += 1
+            valores[nome], versoes[nome] = valor, chave_conteudo(nome, valor)
+            return
+
+        versao = chave_conteudo(nome, [versoes[e] for e in est.entradas])
+        mem = self._memoria[nome]
+        with self._lock:
+            valor = mem.get(versao)
+            if valor is not None:
+                mem.move_to_end(versao)
+                est.reaproveitados += 1
+        if valor is None and est.persistir is not None:
+            valor = est.persistir.get(versao)
+            if valor is not None:
+                self._guardar(est, versao, valor)
+                with self._lock:
+                    est.reaproveitados += 1
+        if valor is None:
+            valor = est.fn(*args)
+            self._guardar(est, versao, valor)
+            if est.persistir is not None:
+                est.persistir.put(versao, valor)
+            with self._lock:
+                est.execucoes += 1
+        valores[nome], versoes[nome] = valor, versao
+
+    def calcular(self, alvo: str, versoes_externas=None, **externos):
+        """
+        Valor do estágio 'alvo', recalculando só o que depende de entradas alteradas.
+
+        Args:
+            versoes_externas: {entrada: chave_conteudo(valor)} já calculadas pelo chamador (evita
+                refazer o hash de DataFrames que ele já hasheou)
+        """
+        versoes = dict(versoes_externas or {})
+        valores = {nome: externos[nome] for nome in versoes}
+        self._resolver(alvo, externos, versoes, valores)
+        return valores[alvo]
+
+    def estatisticas(self) -> list:
+        with self._lock:
+            return [
+                {"Estágio": e.nome, "Execuções": e.execucoes, "Reaproveitados": e.reaproveitados,
+                 "Guardados": len(self._memoria[e.nome])}
+                for e in self._estagios.values()
+            ]
+
+    def limpar(self):
+        with self._lock:
+            for mem in self._memoria.values():
+                mem.clear()
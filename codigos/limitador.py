@@ -0,0 +1,155 @@
+"""
+Limitador de taxa (token bucket) para as requisições ao TradingView
+Toda chamada get_hist passa por aqui. Pedidos esperam numa fila por prioridade: recálculos
+interativos (prioridade 0) passam na frente de atualizações de fundo (arquivo de barras etc.).
+Com 'caminho' o balde (os tokens) fica num SQLite e vale para todos os processos da máquina; a fila
+de prioridade é por processo: entre processos, quem chega ao SQLite primeiro leva o token.
+"""
+
+import contextvars
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from resiliencia import PrazoEsgotado
+
+PRIORIDADE_INTERATIVA = 0
+PRIORIDADE_FUNDO = 10
+
+_prioridade = contextvars.ContextVar("prioridade", default=PRIORIDADE_INTERATIVA)
+
+@contextmanager
+def prioridade(valor: int):
+    """Define a prioridade das requisições feitas dentro do bloco (menor = mais urgente)."""
+    token = _prioridade.set(valor)
+    try:
+        yield
+    finally:
+        _prioridade.reset(token)
+
+def prioridade_atual() -> int:
+    return _prioridade.get()
+
+
+class TokenBucket:
+    """
+    Balde de 'capacidade' tokens repostos a 'taxa' por segundo, com fila por prioridade.
+    A prioridade só ordena os pedidos deste processo; no modo SQLite os processos disputam o
+    mesmo balde sem ordem entre si.
+    """
+
+    def __init__(self, taxa: float, capacidade: float, caminho=None, nome: str = "tradingview"):
+        self.taxa = taxa              # tokens por segundo
+        self.capacidade = capacidade  # rajada máxima
+        self.caminho = Path(caminho) if caminho is not None else None
+        self.nome = nome
+        self._tokens = capacidade
+        self._ultimo = time.monotonic()
+        self._cond = threading.Condition()
+        self._fila = []
+        self._consumindo = False  # o primeiro da fila está lendo o balde (fora do lock, no SQLite)
+        self._seq = itertools.count()
+        self._stats = {}
+
+    # ---------- Reposição / consumo ----------
+    def _consumir_local(self) -> float:
+        agora = time.monotonic()
+        self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.taxa
+
+    def _consumir_sqlite(self) -> float:
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.caminho, timeout=10, isolation_level=None)
+        try:
+            con.execute("CREATE TABLE IF NOT EXISTS bucket (nome TEXT PRIMARY KEY, tokens REAL, atualizado REAL)")
+            con.execute("BEGIN IMMEDIATE")
+            agora = time.time()
+            row = con.execute("SELECT tokens, atualizado FROM bucket WHERE nome=?", (self.nome,)).fetchone()
+            tokens = self.capacidade if row is None else min(self.capacidade, row[0] + (agora - row[1]) * self.taxa)
+            espera = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                espera = (1 - tokens) / self.taxa
+            con.execute("INSERT OR REPLACE INTO bucket VALUES (?, ?, ?)", (self.nome, tokens, agora))
+            con.execute("COMMIT")
+            return espera
+        finally:
+            con.close()
+
+    def _consumir(self) -> float:
+        """Tenta pegar um token: 0 se conseguiu, senão quantos segundos até o próximo."""
+        return self._consumir_sqlite() if self.caminho is not None else self._consumir_local()
+
+    # ---------- API ----------
+    def adquirir(self, prioridade: int | None = None, ate: float | None = None) -> float:
+        """
+        Bloqueia até haver token para este pedido (respeitando a fila de prioridade).
+        'ate' é um instante time.monotonic(); se chegar antes do token, levanta PrazoEsgotado.
+
+        Returns:
+            tempo de espera na fila (s)
+        """
+        prioridade = prioridade_atual() if prioridade is None else prioridade
+        inicio = time.monotonic()
+        with self._cond:
+            item = (prioridade, next(self._seq))
+            heapq.heappush(self._fila, item)
+        try:
+            while True:
+                with self._cond:
+                    while True:
+                        restante = None if ate is None else ate - time.monotonic()
+                        if restante is not None and restante <= 0:
+                            raise PrazoEsgotado("Prazo esgotado aguardando o limitador de taxa")
+                        if self._fila[0] == item and not self._consumindo:
+                            self._consumindo = True
+                            break
+                        self._cond.wait(restante)
+                # Consumo fora do lock: no modo SQLite é I/O (até 10 s com o arquivo travado)
+                try:
+                    espera = self._consumir()
+                finally:
+                    with self._cond:
+                        self._consumindo = False
+                        self._cond.notify_all()
+                if espera == 0:
+                    break
+                with self._cond:
+                    restante = None if ate is None else ate - time.monotonic()
+                    self._cond.wait(espera if restante is None else max(0.0, min(espera, restante)))
+        finally:
+            with self._cond:
+                self._fila.remove(item)
+                heapq.heapify(self._fila)
+                self._cond.notify_all()
+
+        with self._cond:
+            espera_total = time.monotonic() - inicio
+            st = self._stats.setdefault(prioridade, {"pedidos": 0, "espera_total": 0.0, "espera_max": 0.0})
+            st["pedidos"] += 1
+            st["espera_total"] += espera_total
+            st["espera_max"] = max(st["espera_max"], espera_total)
+        return espera_total
+
+    def estatisticas(self) -> list:
+        """Espera na fila por prioridade: pedidos, média e máximo (ms)."""
+        with self._cond:
+            return [
+                {
+                    "Prioridade": p,
+                    "Pedidos": st["pedidos"],
+                    "Espera média (ms)": round(st["espera_total"] / st["pedidos"] * 1000, 1),
+                    "Espera máx (ms)": round(st["espera_max"] * 1000, 1),
+                    "Na fila": sum(1 for item in self._fila if item[0] == p),
+                }
+                for p, st in sorted(self._stats.items())
+            ]
@@ -0,0 +1,168 @@
+"""
+Simulação de Monte Carlo do PPE
+Sorteia choques correlacionados de preço CBOT, prêmio de exportação e NDF, com a covariância
+estimada do histórico (tabela do backtest, que sai do arquivo de barras e dos históricos de
+prêmio/NDF), e devolve faixas de percentis do "PPE Preço saca origem (R$/sc)" por vencimento.
+Todos os caminhos são calculados em arrays (caminho x vencimento x produto); blocos de caminhos
+podem ser divididos entre processos, que escrevem direto num array em memória compartilhada (sem
+devolver os caminhos ao processo pai por pickle). Com a mesma semente o resultado é o mesmo, com ou
+sem processos.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from ppe_engine import TON_POR_SACA
+
+CAMINHOS_POR_BLOCO = 100_000
+DIAS_PADRAO = 21  # choques de ~1 mês de pregões
+PERCENTIS_PADRAO = (5, 25, 50, 75, 95)
+
+
+# ---------- Covariância ----------
+def choques_historicos(df_bt: pd.DataFrame) -> pd.DataFrame:
+    """
+    Variações diárias de cada fator a partir da tabela do backtest (backtest.backtest_ppe).
+
+    Cada vencimento é comparado com ele mesmo no pregão anterior (sem saltos de rolagem) e a
+    variação do dia é a média entre os vencimentos: CBOT e NDF em log-retorno, prêmio em c$/bu.
+
+    Returns:
+        DataFrame indexado por Data, uma coluna por fator: "CBOT <produto>", "Prêmio <produto>", "NDF"
+    """
+    produtos = list(pd.unique(df_bt["Produto"]))
+    largo = df_bt.pivot_table(index="Data", columns=["Produto", "Vencimento"],
+                              values=["Preço", "Premio", "NDF"], aggfunc="first").sort_index()
+
+    def media(valores, variacao):
+        d = variacao(largo[valores].to_numpy(dtype=float))
+        d = pd.DataFrame(d, index=largo.index[1:], columns=largo[valores].columns)
+        return d.T.groupby(level="Produto").mean().T
+
+    cbot = media("Preço", lambda x: np.diff(np.log(x), axis=0))
+    premio = media("Premio", lambda x: np.diff(x, axis=0))
+    ndf = media("NDF", lambda x: np.diff(np.log(x), axis=0))
+    choques = pd.concat([
+        cbot[produtos].add_prefix("CBOT "),
+        premio[produtos].add_prefix("Prêmio "),
+        ndf[produtos].mean(axis=1).rename("NDF"),
+    ], axis=1)
+    return choques.dropna()
+
+
+def covariancia_historica(df_bt: pd.DataFrame) -> pd.DataFrame:
+    """Covariância diária dos fatores (fator x fator) estimada das variações do backtest."""
+    return choques_historicos(df_bt).cov()
+
+
+def _carga(cov: np.ndarray) -> np.ndarray:
+    """Matriz L com L @ L.T = cov (Cholesky; autovalores se a covariância for só semidefinida)."""
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        w, v = np.linalg.eigh(cov)
+        return v * np.sqrt(np.clip(w, 0, None))
+
+
+# ---------- Simulação ----------
+def _bloco(mercado, carga, colunas, n_caminhos, semente, fobbings, frete_dom):
+    """PPE (R$/sc) de um bloco de caminhos (executável em outro processo): (caminho x vencimento x produto)."""
+    rng = np.random.default_rng(semente)
+    z = rng.standard_normal((n_caminhos, carga.shape[0]))
+    choques = np.concatenate([z @ carga.T, np.zeros((n_caminhos, 1))], axis=1)  # última coluna: fator ausente
+
+    cbot = choques[:, colunas[0]][:, None, :]
+    premio = choques[:, colunas[1]][:, None, :]
+    ndf = choques[:, [colunas[2]]][:, None, :]
+    preco = mercado["preco"] * np.exp(cbot)
+    fob_rs = (preco + mercado["premio"] + premio) * mercado["fator"] * (mercado["ndf"] * np.exp(ndf))
+    return (fob_rs - (fobbings + frete_dom)) * TON_POR_SACA
+
+
+def _bloco_compartilhado(args):
+    """Calcula um bloco e grava nas linhas [inicio, inicio + n) do array compartilhado 'nome'."""
+    nome, forma, inicio, bloco_args = args
+    shm = shared_memory.SharedMemory(name=nome)
+    try:
+        destino = np.ndarray(forma, dtype=np.float64, buffer=shm.buf)
+        destino[inicio:inicio + bloco_args[3]] = _bloco(*bloco_args)
+        del destino
+    finally:
+        shm.close()
+
+
+def simular_ppe(mercado: dict, cov: pd.DataFrame, n_caminhos: int = 100_000, dias: int = DIAS_PADRAO,
+                fobbings=40.0, frete_dom=342.0, semente: int | None = None,
+                processos: int | None = None) -> dict:
+    """
+    Distribuição do PPE sob choques correlacionados de CBOT, prêmio e NDF.
+
+    Cada caminho desloca a curva inteira do produto (mesmo choque em todos os vencimentos):
+    preço CBOT e NDF multiplicados por exp(choque), prêmio somado em c$/bu.
+
+    Args:
+        mercado: retrato de cenarios.mercado_de_longo / mercado_de_tabelas
+        cov: covariância diária dos fatores (covariancia_historica); fator ausente = sem choque
+        dias: pregões até a data avaliada (a covariância é escalada por dias)
+        semente: mesma semente, mesmos caminhos (independe de processos)
+        processos: >1 divide os caminhos em blocos de CAMINHOS_POR_BLOCO entre processos
+
+    Returns:
+        dict com "vencimentos", "produtos" e "saca" (caminho x vencimento x produto, R$/sc)
+    """
+    fatores = list(cov.columns)
+    carga = _carga(cov.to_numpy(dtype=float) * dias)
+    ausente = len(fatores)
+
+    def coluna(nome):
+        return fatores.index(nome) if nome in fatores else ausente
+
+    produtos = list(mercado["produtos"])
+    colunas = (
+        np.array([coluna(f"CBOT {p}") for p in produtos]),
+        np.array([coluna(f"Prêmio {p}") for p in produtos]),
+        coluna("NDF"),
+    )
+
+    tamanhos = [min(CAMINHOS_POR_BLOCO, n_caminhos - i) for i in range(0, n_caminhos, CAMINHOS_POR_BLOCO)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    args = [(mercado, carga, colunas, n, s, float(fobbings), float(frete_dom)) for n, s in zip(tamanhos, sementes)]
+    forma = (n_caminhos, len(mercado["vencimentos"]), len(produtos))
+    inicios = np.cumsum([0] + tamanhos[:-1]).tolist()
+    if processos is not None and processos > 1 and len(args) > 1:
+        shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(forma)) * 8))
+        try:
+            with ProcessPoolExecutor(max_workers=min(processos, len(args))) as pool:
+                list(pool.map(_bloco_compartilhado, [(shm.name, forma, i, a) for i, a in zip(inicios, args)]))
+            saca = np.ndarray(forma, dtype=np.float64, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+    else:
+        saca = np.empty(forma)
+        for i, a in zip(inicios, args):
+            saca[i:i + a[3]] = _bloco(*a)
+    return {
+        "vencimentos": list(mercado["vencimentos"]),
+        "produtos": produtos,
+        "saca": saca,
+    }
+
+
+def bandas_ppe(sim: dict, percentis=PERCENTIS_PADRAO) -> pd.DataFrame:
+    """Faixas de percentis do PPE (R$/sc) por produto x vencimento, com média e desvio-padrão."""
+    saca = sim["saca"]
+    q = np.percentile(saca, percentis, axis=0)  # (percentil x vencimento x produto)
+    p, v = np.indices(saca.shape[:0:-1]).reshape(2, -1)  # produto por produto, vencimentos em ordem
+    df = pd.DataFrame({
+        "Produto": np.asarray(sim["produtos"], dtype=object)[p],
+        "Vencimento": np.asarray(sim["vencimentos"], dtype=object)[v],
+        "Média": saca.mean(axis=0)[v, p],
+        "Desvio": saca.std(axis=0)[v, p],
+    })
+    for i, pc in enumerate(percentis):
+        df[f"P{pc:g}"] = q[i][v, p]
+    return df
@@ -0,0 +1,164 @@
+"""
+Paridade de rotas até a Ásia (CFR China)
+Compara o CFR Ásia do grão brasileiro (Santos) com os concorrentes (Golfo dos EUA e Bahía Blanca)
+em todos os vencimentos de uma vez: arrays vencimento x produto x rota, sem laço por mês.
+Fretes e prêmios das rotas vêm da aba "rotas" da planilha; sem ela, fretes padrão do PPE_completo.
+Concorrentes não têm prêmio padrão: sem a aba, o CFR deles sai NaN e "Fonte do prêmio" diz por quê.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ppe_engine import asof_curva
+from rotulos_mes import parse_rotulos, chave_mm_yyyy
+
+# Frete marítimo padrão até a Ásia ($/ton), os mesmos do PPE_completo.py
+ROTAS = {
+    "Brasil": {"origem": "Santos", "frete": 38.04},
+    "EUA": {"origem": "Golfo", "frete": 53.89},
+    "Argentina": {"origem": "Bahía Blanca", "frete": 44.50},
+}
+ROTA_BASE = "Brasil"  # a rota do PPE: prêmio da curva do motor
+
+# Origem do prêmio de cada (vencimento, produto, rota)
+FONTE_PLANILHA = "aba rotas"
+FONTE_MOTOR = "curva do motor"
+FONTE_AUSENTE = "sem prêmio (falta na aba rotas)"
+
+SAIDAS_ROTA = ["FOB ($/ton)", "Frete ($/ton)", "CFR Ásia ($/ton)", "Basis CFR (c$/bu)"]
+
+
+def _curvas_rotas(mercado: dict, df_rotas: pd.DataFrame, col: str, rotas: list) -> np.ndarray:
+    """Valor de col (prêmio ou frete) por vencimento x produto x rota, "próximo ou último"; NaN sem curva."""
+    n_venc, n_prod = len(mercado["vencimentos"]), len(mercado["produtos"])
+    saida = np.full((n_venc, n_prod, len(rotas)), np.nan)
+    df = df_rotas.dropna(subset=[col])
+    if df.empty:
+        return saida
+
+    # Nome da rota sem diferenciar maiúsculas ("eua" -> "EUA"); rotas fora da lista saem
+    df = df.assign(Rota=df["Rota"].str.lower().map({r.lower(): r for r in rotas})).dropna(subset=["Rota"])
+
+    # Linhas sem produto valem para todos os produtos
+    geral = df["Produto"].eq("")
+    df = pd.concat(
+        [df[~geral]] + [df[geral].assign(Produto=p) for p in mercado["produtos"]],
+        ignore_index=True,
+    )
+    rot = parse_rotulos(df["Mes"])
+    ok = rot["MesNum"].notna().to_numpy()
+    anos = rot["Ano"].to_numpy()[ok].astype(np.int64)
+    meses = rot["MesNum"].to_numpy()[ok].astype(np.int64)
+    curva = pd.DataFrame({
+        "Grupo": (df["Rota"] + "|" + df["Produto"]).to_numpy()[ok],
+        "Ano": anos,
+        "MesNum": meses,
+        "Chave": chave_mm_yyyy(anos, meses).to_numpy(),
+        col: df[col].to_numpy(dtype=float)[ok],
+    })
+
+    # Alvos: todos os (vencimento, produto, rota) achatados numa busca só
+    v, p, r = np.indices(saida.shape).reshape(3, -1)
+    grupos = np.char.add(np.char.add(np.asarray(rotas, dtype=str)[r], "|"), np.asarray(mercado["produtos"], dtype=str)[p])
+    valores, _ = asof_curva(mercado["anos"][v], mercado["meses"][v], curva, col, grupos=grupos, col_grupo="Grupo")
+    return valores.reshape(saida.shape)
+
+
+def paridade_rotas(mercado: dict, df_rotas: pd.DataFrame | None = None, rotas=None) -> dict:
+    """
+    FOB, frete e CFR Ásia por rota para todos os vencimentos e produtos.
+
+    Args:
+        mercado: retrato de cenarios.mercado_de_longo, da tabela longa sem arredondamento (com
+            mercado_de_tabelas o CFR herda as 2 casas do preço e do NDF exibidos)
+        df_rotas: saída de process_rotas (opcional); frete ausente usa ROTAS, prêmio ausente
+            da rota base usa a curva do motor
+
+    Returns:
+        dict com "vencimentos", "anos", "meses", "produtos", "rotas", "Fonte do prêmio" e, para cada
+        saída em SAIDAS_ROTA, um array (vencimento x produto x rota)
+    """
+    rotas = list(ROTAS) if rotas is None else list(rotas)
+    if df_rotas is None:
+        df_rotas = pd.DataFrame(columns=["Rota", "Produto", "Mes", "Premio", "Frete"])
+
+    premio = _curvas_rotas(mercado, df_rotas, "Premio", rotas)
+    frete = _curvas_rotas(mercado, df_rotas, "Frete", rotas)
+    fonte = np.where(np.isnan(premio), FONTE_AUSENTE, FONTE_PLANILHA).astype(object)
+    if ROTA_BASE in rotas:
+        i = rotas.index(ROTA_BASE)
+        fonte[:, :, i] = np.where(np.isnan(premio[:, :, i]), FONTE_MOTOR, FONTE_PLANILHA)
+        premio[:, :, i] = np.where(np.isnan(premio[:, :, i]), mercado["premio"], premio[:, :, i])
+    padrao = np.array([ROTAS.get(r, {}).get("frete", np.nan) for r in rotas])
+    frete = np.where(np.isnan(frete), padrao, frete)
+
+    preco = mercado["preco"][:, :, None]
+    fator = mercado["fator"][None, :, None]
+    fob = (preco + premio) * fator
+    cfr = fob + frete
+    basis_cfr = cfr / fator - preco
+    return {
+        "vencimentos": list(mercado["vencimentos"]),
+        "anos": np.asarray(mercado["anos"]),
+        "meses": np.asarray(mercado["meses"]),
+        "produtos": list(mercado["produtos"]),
+        "rotas": rotas,
+        "preco": mercado["preco"],
+        "fator": mercado["fator"],
+        "Fonte do prêmio": fonte,
+        **dict(zip(SAIDAS_ROTA, (fob, frete, cfr, basis_cfr))),
+    }
+
+
+def tabela_paridade(par: dict) -> pd.DataFrame:
+    """
+    Paridade achatada (uma linha por produto x vencimento x rota) para exibir/exportar, em ordem
+    cronológica de vencimento (Ano, MesNum) e com as rotas na ordem de par["rotas"].
+    """
+    v, p, r = np.indices(par[SAIDAS_ROTA[0]].shape).reshape(3, -1)
+    produtos = np.asarray(par["produtos"], dtype=object)[p]
+    anos, meses = par["anos"][v], par["meses"][v]
+    df = pd.DataFrame({
+        "Produto": produtos,
+        "Vencimento": np.asarray(par["vencimentos"], dtype=object)[v],
+        "Ano": anos,
+        "MesNum": meses,
+        "Rota": np.asarray(par["rotas"], dtype=object)[r],
+        "Fonte do prêmio": par["Fonte do prêmio"].reshape(-1),
+    })
+    for saida in SAIDAS_ROTA:
+        df[saida] = par[saida].reshape(-1)
+    ordem = np.lexsort((r, meses, anos, produtos.astype(str)))
+    return df.iloc[ordem].reset_index(drop=True)
+
+
+def competitividade(par: dict, produto: str, rota_base: str = ROTA_BASE) -> pd.DataFrame:
+    """
+    Competitividade da rota base contra o concorrente mais barato, por vencimento.
+
+    Returns:
+        DataFrame com o CFR de cada rota, "Melhor concorrente", "Vantagem ($/ton)" (CFR do melhor
+        concorrente - CFR da base; positivo = base mais barata) e "Prêmio de paridade (c$/bu)"
+        (prêmio FOB que deixaria a base empatada com o melhor concorrente)
+    """
+    j = par["produtos"].index(produto)
+    b = par["rotas"].index(rota_base)
+    outras = [i for i in range(len(par["rotas"])) if i != b]
+    cfr = par["CFR Ásia ($/ton)"][:, j, :]
+
+    df = pd.DataFrame(cfr, columns=[f"CFR {r}" for r in par["rotas"]])
+    df.insert(0, "Vencimento", par["vencimentos"])
+    if not outras:
+        return df
+
+    cfr_outras = cfr[:, outras]
+    validas = ~np.isnan(cfr_outras).all(axis=1)
+    melhor = np.full(len(cfr), -1)
+    melhor[validas] = np.nanargmin(cfr_outras[validas], axis=1)
+    melhor_cfr = np.where(validas, cfr_outras[np.arange(len(cfr)), np.maximum(melhor, 0)], np.nan)
+
+    fator = par["fator"][j]
+    df["Melhor concorrente"] = np.where(melhor >= 0, np.asarray(par["rotas"], dtype=object)[outras][np.maximum(melhor, 0)], None)
+    df["Vantagem ($/ton)"] = melhor_cfr - cfr[:, b]
+    df["Prêmio de paridade (c$/bu)"] = (melhor_cfr - par["Frete ($/ton)"][:, j, b]) / fator - par["preco"][:, j]
+    return df
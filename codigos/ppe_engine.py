@@ -3,15 +3,32 @@ Motor de cálculo PPE - Versão modularizada
 Extrai a lógica de cálculo do PPE_completo.py para ser reutilizada
 """
 
+import numpy as np
 import pandas as pd
 import re
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from pathlib import Path
 
 # Importa os módulos de dados
-import cotacoes_tradingview_cepea as cot
-import premios_export_soja_milho as premios
+from rotulos_mes import parse_rotulos, chave_mm_yyyy
+from provedores import QuoteProvider, provedor_padrao
+import resiliencia
+from singleflight import SingleFlight
+from cache_resultados import CacheResultados, chave_conteudo, DIR_PADRAO
+from grafo_estagios import GrafoEstagios
+
+# Tempo máximo (s) que um calcular_ppe pode gastar buscando cotações
+ORCAMENTO_COTACOES = 15.0
+
+# Recálculos idênticos simultâneos (vários clientes no mesmo instante) compartilham uma execução
+voo_ppe = SingleFlight("calcular_ppe")
+
+# Versão das fórmulas/layout dos estágios em cache: suba ao mudar base_mercado, aplicar_custos ou as
+# colunas deles, para que os Parquets gravados por uma versão anterior não sejam reaproveitados
+VERSAO_CACHE = 1
+
+# Estágio "mercado" do grafo por conteúdo das entradas (memória + Parquet em cache/resultados/ppe)
+cache_ppe = CacheResultados("ppe", max_itens=256, diretorio=DIR_PADRAO, versao=VERSAO_CACHE)
 
 # Constantes e mapeamentos (copiados do PPE_completo.py)
 MONTH_CODE_TO_NUM = {
@@ -19,25 +36,40 @@ MONTH_CODE_TO_NUM = {
     "N": 7, "Q": 8, "U": 9, "V": 10, "X": 11, "Z": 12,
 }
 
-LISTED_MONTHS = {
-    "ZC": [3, 5, 7, 9, 12],
-    "ZS": [1, 3, 5, 7, 8, 9, 11],
+# Registro de produtos: contrato CBOT, fator c$/bu -> $/ton, meses listados e unidade.
+# Para incluir um produto novo basta uma entrada aqui (e sua curva de prêmios).
+PRODUTOS = {
+    "soja": {"ativo": "ZS", "fator": 0.367437, "meses": [1, 3, 5, 7, 8, 9, 11], "unidade": "c$/bu"},
+    "milho": {"ativo": "ZC", "fator": 0.393687, "meses": [3, 5, 7, 9, 12], "unidade": "c$/bu"},
 }
 
+LISTED_MONTHS = {p["ativo"]: p["meses"] for p in PRODUTOS.values()}
+
+TON_POR_SACA = 0.06   # saca de 60 kg: R$/ton -> R$/sc
+LB_POR_KG = 2.204
+
+COLUNAS_PPE = ["Ativo", "Vencimento", "Preço", "Premio", "NDF", "FOB (c$/bu)",
+               "FOB ($/ton)", "FOB (R$/ton)", "Sobre rodas", "EXW",
+               "PPE Preço saca origem (R$/sc)", "Basis Praça-CBOT (c$/bu)"]
+
+# Entradas que resolver_ppe sabe isolar na fórmula do PPE
+VARIAVEIS_INVERSAO = ["Preço", "Premio", "NDF", "frete_dom"]
+
+# Derivadas do PPE (R$/sc) por unidade de cada entrada: c$/bu (CBOT e prêmio), R$/US$ (NDF), R$/ton (frete)
+COLUNAS_DELTAS = ["dPPE/dCBOT", "dPPE/dPremio", "dPPE/dNDF", "dPPE/dFrete"]
+
 MONTH_NUM_TO_CODE = {
     1: "F", 2: "G", 3: "H", 4: "J", 5: "K", 6: "M",
     7: "N", 8: "Q", 9: "U", 10: "V", 11: "X", 12: "Z",
 }
 
-_MES_PT_TO_NUM = {
-    "Jan": 1, "Fev": 2, "Mar": 3, "Abr": 4, "Mai": 5, "Jun": 6,
-    "Jul": 7, "Ago": 8, "Set": 9, "Out": 10, "Nov": 11, "Dez": 12,
-}
-
-_MES_PT3_TO_NUM = {
-    "Jan":1, "Fev":2, "Mar":3, "Abr":4, "Mai":5, "Jun":6,
-    "Jul":7, "Ago":8, "Set":9, "Out":10, "Nov":11, "Dez":12
-}
+# Ticker explícito (ex.: ZSX2025): raízes e códigos de mês vêm do registro de PRODUTOS
+_RE_TICKER = re.compile(
+    "({})([{}])(\\d{{4}})".format(
+        "|".join(sorted((re.escape(p["ativo"]) for p in PRODUTOS.values()), key=len, reverse=True)),
+        "".join(sorted({MONTH_NUM_TO_CODE[m] for p in PRODUTOS.values() for m in p["meses"]})),
+    )
+)
 
 # Funções auxiliares (copiadas do PPE_completo.py)
 def add_months(year: int, month: int, n: int = 1):
@@ -87,7 +119,7 @@ def generate_explicit_tickers(symbol: str, start_year: int, start_month: int, n:
 
 def parse_explicit_ticker(tk: str):
     s = tk.strip().strip("()").upper()
-    m = re.fullmatch(r"(ZC|ZS)([FGHJKMNQUVXZ])(\d{4})", s)
+    m = _RE_TICKER.fullmatch(s)
     if not m:
         return None
     sym, code, year = m.group(1), m.group(2), int(m.group(3))
@@ -96,9 +128,42 @@ def parse_explicit_ticker(tk: str):
         return None
     return sym, year, month_num
 
+# Quantos contratos explícitos buscar por símbolo (6 cobre ~1 a 1,5 anos à frente)
+NUM_CONTRACTS_PER_SYMBOL = 6
+
+# Meses da grade do PPE a partir do mês de referência
+HORIZONTE_PADRAO = 10
+
+def _contratos_ate_o_fim(ativo: str, ano: int, mes: int, horizonte: int) -> int:
+    """Contratos listados de (ano, mes) até o primeiro vencimento listado no último mês da grade ou depois."""
+    listed = LISTED_MONTHS[ativo]
+    fim = choose_start_month(ativo, *add_months(ano, mes, horizonte - 1))
+    return sum(1 for o in range(ano * 12 + mes - 1, fim[0] * 12 + fim[1]) if o % 12 + 1 in listed)
+
+def contratos_para_horizonte(horizonte: int, ativos=("ZC", "ZS"), ano: int | None = None,
+                             mes: int | None = None) -> dict:
+    """
+    {ativo: contratos} que cobrem a grade de 'horizonte' meses: a faixa vai até o primeiro vencimento
+    listado do ativo no último mês da grade ou depois (o "próximo" contrato do último mês); nunca
+    menos que NUM_CONTRACTS_PER_SYMBOL. Sem (ano, mes), o máximo entre os 12 meses de início.
+    """
+    inicios = [(2000, m) for m in range(1, 13)] if ano is None else [(ano, mes)]
+    return {
+        a: max(NUM_CONTRACTS_PER_SYMBOL, *(_contratos_ate_o_fim(a, y, m, horizonte) for y, m in inicios))
+        for a in ativos
+    }
+
+def contratos_cbot(start_year: int, start_month: int, n=NUM_CONTRACTS_PER_SYMBOL, ativos=("ZC", "ZS")):
+    """
+    Tickers ativos a partir do mês de referência (ex.: ['ZCZ2025', ..., 'ZSX2025', ...]).
+    n: contratos por símbolo (o mesmo para todos) ou {ativo: contratos}
+    """
+    por_ativo = n if isinstance(n, dict) else dict.fromkeys(ativos, n)
+    return [tk for ativo in ativos for tk in generate_explicit_tickers(ativo, start_year, start_month, por_ativo[ativo])]
+
 def build_price_map_from_explicit(explicit_prices: dict):
     price_map = {}
-    units_map = {"ZC": "c$/bu", "ZS": "c$/bu"}
+    units_map = {p["ativo"]: p["unidade"] for p in PRODUTOS.values()}
     
     for tk, px in explicit_prices.items():
         if px is None:
@@ -111,208 +176,379 @@ def build_price_map_from_explicit(explicit_prices: dict):
     
     return price_map, units_map
 
-def build_monthly_series(symbol: str, month_grid: list, price_map: dict, units_map: dict):
-    listed = set(LISTED_MONTHS[symbol])
+def _precos_mensais(symbol: str, anos: np.ndarray, meses: np.ndarray, price_map: dict) -> np.ndarray:
+    """Preço de cada mês da grade: contrato do mês, senão o próximo, senão o último cotado (NaN se nenhum)."""
+    listed = np.array(sorted(LISTED_MONTHS[symbol]))
     
-    listed_nodes = sorted(
-        [(y, m) for (sym, y, m) in price_map.keys() if sym == symbol],
-        key=lambda x: (x[0], x[1])
-    )
+    # Índice dos contratos do símbolo: chave ano*12 + mês ordenada, para busca binária
+    nodes = sorted((y * 12 + m, px) for (sym, y, m), px in price_map.items() if sym == symbol)
+    node_keys = np.array([k for k, _ in nodes], dtype=np.int64)
+    node_prices = np.array([px for _, px in nodes], dtype=float)
+    alvo = anos * 12 + meses
     
-    def find_next_future_price(y0, m0):
-        for (y, m) in listed_nodes:
-            if (y > y0) or (y == y0 and m >= m0):
-                return price_map.get((symbol, y, m))
-        return None
-    
-    rows = []
-    last_price = None
-    
-    for (y, m) in month_grid:
-        if m in listed and (symbol, y, m) in price_map:
-            price_to_use = price_map[(symbol, y, m)]
-            last_price = price_to_use
-        else:
-            next_price = find_next_future_price(y, m)
-            if next_price is not None:
-                price_to_use = next_price
-            else:
-                price_to_use = last_price
-        
-        rows.append({
-            "Ativo": symbol,
-            "Ano": y,
-            "Mês": m,
-            "Vencimento": f"{m:02d}/{y}",
-            "Preço": price_to_use,
-            "Unidade": units_map.get(symbol, "c$/bu")
-        })
+    # Próximo contrato com vencimento >= mês da grade (o próprio, se existir)
+    idx = np.searchsorted(node_keys, alvo, side="left")
+    tem_prox = idx < len(node_keys)
+    prox = np.full(len(alvo), np.nan)
+    prox[tem_prox] = node_prices[idx[tem_prox]]
     
-    return pd.DataFrame(rows)
+    # Sem contrato à frente: repete o último mês listado cotado já visto na grade
+    exato = np.zeros(len(alvo), dtype=bool)
+    exato[tem_prox] = node_keys[idx[tem_prox]] == alvo[tem_prox]
+    exato &= np.isin(meses, listed)
+    ultimo = np.maximum.accumulate(np.where(exato, np.arange(len(alvo)), -1))
+    carry = np.where(ultimo >= 0, prox[np.maximum(ultimo, 0)], np.nan)
+    return np.where(tem_prox, prox, carry)
 
-def _parse_mes_pt(label: str):
-    mes_abbr, ano2 = label.split("/")
-    m = _MES_PT_TO_NUM[mes_abbr.strip().title()]
-    y = 2000 + int(ano2)
-    return y, m
+def _grade_array(month_grid: list):
+    grid = np.asarray(month_grid, dtype=np.int64).reshape(-1, 2)
+    return grid[:, 0], grid[:, 1]
+
+def build_monthly_series(symbol: str, month_grid: list, price_map: dict, units_map: dict):
+    anos, meses = _grade_array(month_grid)
+    return pd.DataFrame({
+        "Ativo": symbol,
+        "Ano": anos,
+        "Mês": meses,
+        "Vencimento": chave_mm_yyyy(anos, meses).to_numpy(),
+        "Preço": _precos_mensais(symbol, anos, meses, price_map),
+        "Unidade": units_map.get(symbol, "c$/bu"),
+    })
 
-def _parse_venc_mm_yyyy(v: str):
-    mm, yyyy = v.split("/")
-    return int(yyyy), int(mm)
+def _curva_com_chave(df: pd.DataFrame, col_rotulo: str, col_valor: str) -> pd.DataFrame:
+    """Curva (prêmio ou NDF) com Ano/MesNum/Chave e o valor; linhas com rótulo inválido saem."""
+    rot = parse_rotulos(df[col_rotulo])
+    ok = rot["MesNum"].notna().to_numpy()
+    anos = rot["Ano"].to_numpy()[ok].astype(np.int64)
+    meses = rot["MesNum"].to_numpy()[ok].astype(np.int64)
+    return pd.DataFrame({
+        "Ano": anos,
+        "MesNum": meses,
+        "Chave": chave_mm_yyyy(anos, meses).to_numpy(),
+        col_valor: pd.to_numeric(df[col_valor], errors="coerce").to_numpy(dtype=float)[ok],
+    })
 
-def _parse_ndf_venc(label: str):
-    mes_txt, ano_txt = str(label).strip().split("/")
-    mes3 = mes_txt.strip().title()[:3]
-    y = int(ano_txt.strip())
-    m = _MES_PT3_TO_NUM[mes3]
-    return y, m
+def asof_curva(anos, meses, curva: pd.DataFrame, col_valor: str, grupos=None, col_grupo: str = "Produto"):
+    """
+    Busca "próximo ou último" numa curva (prêmio, NDF...) para vários meses de uma vez.
+    Para cada (ano, mês) alvo usa o primeiro nó da curva com chave >= alvo; se não houver
+    nó futuro, usa o último nó disponível. Chave = ano*12 + mês.
+    Com 'grupos' (ex.: produto de cada alvo) a busca fica restrita aos nós do mesmo grupo
+    (curva[col_grupo]), ainda numa única searchsorted.
 
-def calcular_ppe(df_soja, df_milho, df_ndf, fobbings=40.0, frete_dom=342.0):
+    Args:
+        curva: DataFrame com colunas "Ano", "MesNum", "Chave" e col_valor (e col_grupo, se houver grupos)
+
+    Returns:
+        tuple: (valores, chaves de origem) como arrays alinhados com os alvos
+    """
+    alvo = np.asarray(anos, dtype=np.int64) * 12 + np.asarray(meses, dtype=np.int64)
+    valores = np.full(len(alvo), np.nan)
+    fontes = np.full(len(alvo), None, dtype=object)
+    if curva.empty:
+        return valores, fontes
+
+    if grupos is None:
+        g_alvo = np.zeros(len(alvo), dtype=np.int64)
+        g_curva = np.zeros(len(curva), dtype=np.int64)
+    else:
+        codigos, nomes = pd.factorize(pd.concat([pd.Series(curva[col_grupo].to_numpy()), pd.Series(np.asarray(grupos))]))
+        g_curva, g_alvo = codigos[:len(curva)].astype(np.int64), codigos[len(curva):].astype(np.int64)
+
+    # Chave composta grupo/mês: grupos ficam em faixas separadas da mesma chave ordenada
+    FAIXA = 1 << 32
+    nos = g_curva * FAIXA + curva["Ano"].to_numpy(dtype=np.int64) * 12 + curva["MesNum"].to_numpy(dtype=np.int64)
+    ordem = np.argsort(nos, kind="stable")
+    nos = nos[ordem]
+    idx = np.searchsorted(nos, g_alvo * FAIXA + alvo, side="left")
+    # Último nó de cada grupo: sem nó futuro no grupo, cai para ele
+    ultimo = np.searchsorted(nos, (g_alvo + 1) * FAIXA, side="left") - 1
+    idx = np.minimum(idx, ultimo)
+    tem_no = (ultimo >= 0) & (nos[np.maximum(ultimo, 0)] // FAIXA == g_alvo)
+
+    valores[tem_no] = curva[col_valor].to_numpy(dtype=float)[ordem][idx[tem_no]]
+    fontes[tem_no] = curva["Chave"].to_numpy(dtype=object)[ordem][idx[tem_no]]
+    return valores, fontes
+
+def calcular_ppe(df_soja, df_milho, df_ndf, fobbings=40.0, frete_dom=342.0,
+                 provedor: QuoteProvider | None = None, data_ref=None,
+                 horizonte: int = HORIZONTE_PADRAO, n_contratos: int | dict | None = None):
     """
     Função principal que executa todo o cálculo do PPE
     
     Args:
         fobbings: Custo FOB Bings em R$/ton
         frete_dom: Frete doméstico em R$/ton
-        frete_int_santos_asia: Frete internacional Santos-Ásia em $/ton
+        provedor: fonte das cotações CBOT (padrão: TradingView; ReplayProvider para rodar offline)
+        data_ref: data de referência da grade de meses (padrão: agora, em São Paulo)
+        horizonte: meses da grade a partir de data_ref
+        n_contratos: contratos CBOT buscados por símbolo, único ou {ativo: n} (padrão: os que cobrem o
+            horizonte em cada ativo)
     
     Returns:
         tuple: (df_ppe_soja, df_ppe_milho)
     """
+    # Alvo "tabelas" do grafo: com as mesmas entradas, nem a separação por produto se repete
+    tabelas = _calcular_voo("tabelas", {"soja": df_soja, "milho": df_milho}, df_ndf, fobbings, frete_dom, provedor,
+                            data_ref, horizonte, n_contratos)
+    return tabelas["soja"], tabelas["milho"]
+
+def calcular_ppe_longo(premios_por_produto: dict, df_ndf, fobbings=40.0, frete_dom=342.0,
+                       provedor: QuoteProvider | None = None, data_ref=None,
+                       horizonte: int = HORIZONTE_PADRAO, n_contratos: int | dict | None = None) -> pd.DataFrame:
+    """
+    PPE de todos os produtos numa tabela longa (uma linha por produto x vencimento).
     
+    Args:
+        premios_por_produto: {"soja": df_premios, "milho": df_premios, ...} (colunas "Mes", "Premio");
+            os produtos precisam estar em PRODUTOS
+    
+    Returns:
+        DataFrame com "Produto" + colunas do PPE (e Ano, MesNum, PremioData, NDFFonte para auditoria)
+    """
+    return _calcular_voo("ppe", premios_por_produto, df_ndf, fobbings, frete_dom, provedor, data_ref, horizonte,
+                         n_contratos)
+
+def _calcular_voo(alvo, premios_por_produto, df_ndf, fobbings, frete_dom, provedor, data_ref, horizonte, n_contratos):
+    """Normaliza as entradas e calcula o estágio 'alvo' do grafo_ppe via single-flight."""
+    provedor = provedor or provedor_padrao
+    ativos = [PRODUTOS[p]["ativo"] for p in premios_por_produto]
+    if n_contratos is None:
+        ref = datetime.now(ZoneInfo("America/Sao_Paulo")) if data_ref is None else pd.Timestamp(data_ref)
+        n_contratos = contratos_para_horizonte(horizonte, ativos, ref.year, ref.month)
+    elif not isinstance(n_contratos, dict):
+        n_contratos = dict.fromkeys(ativos, n_contratos)
+    # ((ativo, n), ...): hashável para a chave do single-flight e para o grafo
+    n_contratos = tuple(sorted((a, int(n_contratos[a])) for a in ativos))
+    # Hash das planilhas uma vez só: serve à chave do single-flight e às versões das entradas do grafo
+    versoes = {"premios": chave_conteudo(premios_por_produto), "df_ndf": chave_conteudo(df_ndf)}
+    chave = (alvo, versoes["premios"], versoes["df_ndf"], float(fobbings), float(frete_dom), id(provedor),
+             None if data_ref is None else str(data_ref), int(horizonte), n_contratos)
+    return voo_ppe.do(chave, _calcular_ppe_longo, premios_por_produto, df_ndf, fobbings, frete_dom, provedor, data_ref,
+                      horizonte, n_contratos, alvo, versoes)
+
+def tabelas_por_produto(df_longo: pd.DataFrame) -> dict:
+    """Separa a tabela longa nas tabelas de exibição por produto (COLUNAS_PPE com 2 casas, deltas com 4)."""
+    casas = {**{c: 2 for c in COLUNAS_PPE}, **{c: 4 for c in COLUNAS_DELTAS}}
+    # Arredonda os arrays uma vez e recorta por produto (DataFrame.round por coluna custa mais que o cálculo)
+    produtos = df_longo["Produto"].to_numpy()
+    colunas = {}
+    for c, n in casas.items():
+        v = df_longo[c].to_numpy()
+        colunas[c] = np.round(v, n) if v.dtype.kind == "f" else v
+    return {p: pd.DataFrame({c: v[produtos == p] for c, v in colunas.items()}) for p in pd.unique(produtos)}
+
+def exposicao(tabelas: dict, sacas=1.0) -> pd.DataFrame:
+    """
+    Exposição agregada da carteira: soma de delta x sacas por produto, mais o total.
+
+    Args:
+        tabelas: {"soja": df_ppe_soja, ...} com as colunas COLUNAS_DELTAS
+        sacas: volume em sacas; escalar, ou {produto: escalar ou array por vencimento}
+
+    Returns:
+        DataFrame (Produto, Sacas e a variação em R$ da carteira por unidade de cada entrada)
+    """
+    linhas = []
+    for produto, df in tabelas.items():
+        vol = sacas.get(produto, 0.0) if isinstance(sacas, dict) else sacas
+        vol = np.broadcast_to(np.asarray(vol, dtype=float), (len(df),))
+        deltas = df[COLUNAS_DELTAS].to_numpy(dtype=float)
+        linhas.append([produto, vol.sum(), *np.nansum(deltas * vol[:, None], axis=0)])
+    colunas = ["Produto", "Sacas", "R$ por c$/bu CBOT", "R$ por c$/bu prêmio", "R$ por R$/US$ NDF", "R$ por R$/ton frete"]
+    df = pd.DataFrame(linhas, columns=colunas)
+    total = df[colunas[1:]].sum().to_frame().T.assign(Produto="Total")
+    return pd.concat([df, total[colunas]], ignore_index=True)
+
+def _fator_linhas(df: pd.DataFrame) -> np.ndarray:
+    """Fator c$/bu -> $/ton de cada linha (pela coluna Produto da tabela longa ou Ativo das tabelas por produto)."""
+    if "Produto" in df:
+        return df["Produto"].map({p: d["fator"] for p, d in PRODUTOS.items()}).to_numpy(dtype=float)
+    return df["Ativo"].map({d["ativo"]: d["fator"] for d in PRODUTOS.values()}).to_numpy(dtype=float)
+
+def resolver_ppe(df: pd.DataFrame, alvo, variavel: str = "Preço", fobbings=40.0, frete_dom=342.0) -> np.ndarray:
+    """
+    Inversa da fórmula do PPE: valor de uma entrada que leva o "PPE Preço saca origem (R$/sc)" ao alvo,
+    mantidas as demais entradas da linha.
+
+    Args:
+        df: tabela do motor com Preço, Premio e NDF; de preferência a longa (calcular_ppe_longo), sem
+            arredondamento: com os valores de 2 casas das tabelas por produto o alvo erra por centavos
+        alvo: R$/sc desejado, escalar ou array de alvos
+        variavel: uma de VARIAVEIS_INVERSAO (Preço e Premio em c$/bu, NDF em R$/US$, frete_dom em R$/ton)
+        fobbings, frete_dom: custos da praça (R$/ton), escalar ou um valor por alvo
+
+    Returns:
+        array (alvo x linha); NaN onde não há solução (ex.: FOB zero ao resolver o NDF)
+    """
+    if variavel not in VARIAVEIS_INVERSAO:
+        raise ValueError(f"Variável '{variavel}' não suportada; use uma de {VARIAVEIS_INVERSAO}")
+    alvo = np.atleast_1d(np.asarray(alvo, dtype=float))[:, None]
+    fobbings = np.atleast_1d(np.asarray(fobbings, dtype=float))[:, None]
+    frete_dom = np.atleast_1d(np.asarray(frete_dom, dtype=float))[:, None]
+    preco = df["Preço"].to_numpy(dtype=float)
+    premio = df["Premio"].to_numpy(dtype=float)
+    ndf = df["NDF"].to_numpy(dtype=float)
+    fator = _fator_linhas(df)
+
+    # PPE = ((Preço + Premio) * fator * NDF - fobbings - frete_dom) * TON_POR_SACA
+    fob_rs = alvo / TON_POR_SACA + fobbings + frete_dom  # FOB (R$/ton) que entrega o alvo
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if variavel == "frete_dom":
+            res = (preco + premio) * fator * ndf - fobbings - alvo / TON_POR_SACA
+        elif variavel == "NDF":
+            res = fob_rs / ((preco + premio) * fator)
+        else:
+            fob_cbu = fob_rs / (fator * ndf)
+            res = fob_cbu - (premio if variavel == "Preço" else preco)
+    return np.where(np.isfinite(res), res, np.nan)
+
+def _calcular_ppe_longo(premios_por_produto, df_ndf, fobbings, frete_dom, provedor, data_ref, horizonte, n_contratos,
+                        alvo="ppe", versoes=None):
     # Determina data atual
     tz = ZoneInfo("America/Sao_Paulo")
-    today = datetime.now(tz)
-    start_year, start_month = today.year, today.month
-    month_grid = generate_month_grid(start_year, start_month, horizon=10)
-    
-    # Gera tickers e busca preços
-    NUM_CONTRACTS_PER_SYMBOL = 6
-    zc_tickers = generate_explicit_tickers("ZC", start_year, start_month, NUM_CONTRACTS_PER_SYMBOL)
-    zs_tickers = generate_explicit_tickers("ZS", start_year, start_month, NUM_CONTRACTS_PER_SYMBOL)
-    
-    explicit_prices = {}
-    for tk in zc_tickers + zs_tickers:
-        try:
-            explicit_prices[tk] = float(cot.fetch_eua(tk))
-        except Exception:
-            explicit_prices[tk] = None
-    
-    # Constrói mapa de preços
-    price_map, units_map = build_price_map_from_explicit(explicit_prices)
+    today = datetime.now(tz) if data_ref is None else pd.Timestamp(data_ref)
     
-    # Monta séries mensais
-    df_zc = build_monthly_series("ZC", month_grid, price_map, units_map)
-    df_zs = build_monthly_series("ZS", month_grid, price_map, units_map)
-    
-    # Cria DataFrames base para PPE
-    df_ppe_soja = df_zs[["Ativo", "Vencimento", "Preço"]].copy()
-    df_ppe_milho = df_zc[["Ativo", "Vencimento", "Preço"]].copy()
-    
-    # --- Adiciona Prêmios ---
-    df_premio_soja = df_soja.copy()
-    df_premio_milho = df_milho.copy()
-    df_ndf = df_ndf.copy()
-    
-    df_premio_soja[["Ano", "MesNum"]] = df_premio_soja["Mes"].apply(lambda s: pd.Series(_parse_mes_pt(s)))
-    df_premio_milho[["Ano", "MesNum"]] = df_premio_milho["Mes"].apply(lambda s: pd.Series(_parse_mes_pt(s)))
-    df_premio_soja["Chave"] = df_premio_soja["MesNum"].astype(int).map(lambda x: f"{x:02d}") + "/" + df_premio_soja["Ano"].astype(int).astype(str)
-    df_premio_milho["Chave"] = df_premio_milho["MesNum"].astype(int).map(lambda x: f"{x:02d}") + "/" + df_premio_milho["Ano"].astype(int).astype(str)
-    
-    prem_soja_sorted = df_premio_soja.sort_values(["Ano", "MesNum"]).reset_index(drop=True)
-    prem_milho_sorted = df_premio_milho.sort_values(["Ano", "MesNum"]).reset_index(drop=True)
-    
-    def _next_or_last_premio(y: int, m: int, prem_sorted: pd.DataFrame):
-        fut = prem_sorted[(prem_sorted["Ano"] > y) | ((prem_sorted["Ano"] == y) & (prem_sorted["MesNum"] >= m))]
-        if not fut.empty:
-            row = fut.iloc[0]
-            return row["Premio"], row["Chave"]
-        past = prem_sorted[(prem_sorted["Ano"] < y) | ((prem_sorted["Ano"] == y) & (prem_sorted["MesNum"] <= m))]
-        if not past.empty:
-            row = past.iloc[-1]
-            return row["Premio"], row["Chave"]
-        return None, None
-    
-    # Aplica prêmios na soja
-    df_ppe_soja[["Ano", "MesNum"]] = df_ppe_soja["Vencimento"].apply(lambda s: pd.Series(_parse_venc_mm_yyyy(s)))
-    premios_soja_vals, premios_soja_src = [], []
-    for y, m in zip(df_ppe_soja["Ano"], df_ppe_soja["MesNum"]):
-        val, src = _next_or_last_premio(y, m, prem_soja_sorted)
-        premios_soja_vals.append(val)
-        premios_soja_src.append(src)
-    df_ppe_soja["Premio"] = premios_soja_vals
-    df_ppe_soja["PremioData"] = premios_soja_src
-    
-    # Aplica prêmios no milho
-    df_ppe_milho[["Ano", "MesNum"]] = df_ppe_milho["Vencimento"].apply(lambda s: pd.Series(_parse_venc_mm_yyyy(s)))
-    premios_milho_vals, premios_milho_src = [], []
-    for y, m in zip(df_ppe_milho["Ano"], df_ppe_milho["MesNum"]):
-        val, src = _next_or_last_premio(y, m, prem_milho_sorted)
-        premios_milho_vals.append(val)
-        premios_milho_src.append(src)
-    df_ppe_milho["Premio"] = premios_milho_vals
-    df_ppe_milho["PremioData"] = premios_milho_src
-    
-    # --- Adiciona NDF ---
-    df_ndf = df_ndf.copy()
-    df_ndf[["Ano","MesNum"]] = df_ndf["Vencimento"].apply(lambda s: pd.Series(_parse_ndf_venc(s)))
-    df_ndf["Chave"] = df_ndf["MesNum"].astype(int).map(lambda x: f"{x:02d}") + "/" + df_ndf["Ano"].astype(int).astype(str)
-    ndf_sorted = df_ndf.sort_values(["Ano","MesNum"]).reset_index(drop=True)
-    
-    def _next_or_last_ndf(y: int, m: int):
-        fut = ndf_sorted[(ndf_sorted["Ano"] > y) | ((ndf_sorted["Ano"] == y) & (ndf_sorted["MesNum"] >= m))]
-        if not fut.empty:
-            row = fut.iloc[0]
-            return float(row["NDF"]), row["Chave"]
-        past = ndf_sorted[(ndf_sorted["Ano"] < y) | ((ndf_sorted["Ano"] == y) & (ndf_sorted["MesNum"] <= m))]
-        if not past.empty:
-            row = past.iloc[-1]
-            return float(row["NDF"]), row["Chave"]
-        return None, None
+    res = grafo_ppe.calcular(
+        alvo,
+        versoes,
+        mes_ref=(today.year, today.month),
+        produtos=tuple(premios_por_produto),
+        provedor=provedor,
+        premios=premios_por_produto,
+        df_ndf=df_ndf,
+        fobbings=float(fobbings),
+        frete_dom=float(frete_dom),
+        horizonte=int(horizonte),
+        n_contratos=n_contratos,
+    )
+    # O grafo guarda os originais
+    if isinstance(res, dict):
+        return {p: df.copy(deep=False) for p, df in res.items()}
+    return res.copy(deep=False)
+
+# ---------- Estágios do cálculo ----------
+def _estagio_tickers(mes_ref, produtos, n_contratos):
+    ativos = [PRODUTOS[p]["ativo"] for p in produtos]
+    return contratos_cbot(mes_ref[0], mes_ref[1], dict(n_contratos), ativos)
+
+def _estagio_cotacoes(tickers, provedor):
+    # Busca todos os contratos em paralelo (falhas/timeout ficam None e o carry cobre)
+    with resiliencia.orcamento(ORCAMENTO_COTACOES):
+        df_cot = provedor.fetch_many(tickers, exchange="CBOT")
+    explicit_prices = {
+        tk: (px if status == "ok" else None)
+        for tk, px, status in zip(df_cot["Ticker"], df_cot["Preço"], df_cot["Status"])
+    }
+    price_map, _ = build_price_map_from_explicit(explicit_prices)
+    return price_map
+
+def _estagio_curvas(premios_por_produto, df_ndf):
+    # Curvas de prêmio (longa, com Produto) e de NDF
+    curva_premios = pd.concat(
+        [_curva_com_chave(df, "Mes", "Premio").assign(Produto=p) for p, df in premios_por_produto.items()],
+        ignore_index=True,
+    )
+    return curva_premios, _curva_com_chave(df_ndf, "Vencimento", "NDF")
+
+def _estagio_mercado(mes_ref, price_map, curvas, produtos, horizonte):
+    return base_mercado(mes_ref[0], mes_ref[1], price_map, curvas[0], curvas[1], produtos, horizonte)
+
+def nucleo_ppe(ano: int, mes: int, price_map: dict, curva_premios: pd.DataFrame, curva_ndf: pd.DataFrame,
+               fobbings: float, frete_dom: float, produtos=tuple(PRODUTOS),
+               horizonte: int = HORIZONTE_PADRAO) -> pd.DataFrame:
+    """
+    Núcleo puro do PPE: sem rede, sem relógio; mesmas entradas -> mesma tabela.
     
-    # Aplica NDF na soja
-    ndf_vals, ndf_src = [], []
-    for y, m in zip(df_ppe_soja["Ano"], df_ppe_soja["MesNum"]):
-        val, src = _next_or_last_ndf(y, m)
-        ndf_vals.append(val)
-        ndf_src.append(src)
-    df_ppe_soja["NDF"] = ndf_vals
-    df_ppe_soja["NDFFonte"] = ndf_src
+    Args:
+        ano, mes: mês de referência (início da grade)
+        price_map: {(ativo, ano, mês): preço c$/bu} (build_price_map_from_explicit)
+        curva_premios: curva longa com "Produto", "Ano", "MesNum", "Chave", "Premio"
+        curva_ndf: curva com "Ano", "MesNum", "Chave", "NDF"
     
-    # Aplica NDF no milho
-    ndf_vals, ndf_src = [], []
-    for y, m in zip(df_ppe_milho["Ano"], df_ppe_milho["MesNum"]):
-        val, src = _next_or_last_ndf(y, m)
-        ndf_vals.append(val)
-        ndf_src.append(src)
-    df_ppe_milho["NDF"] = ndf_vals
-    df_ppe_milho["NDFFonte"] = ndf_src
+    Returns:
+        tabela longa no formato de calcular_ppe_longo
+    """
+    base = base_mercado(ano, mes, price_map, curva_premios, curva_ndf, produtos, horizonte)
+    return aplicar_custos(base, fobbings, frete_dom)
+
+def base_mercado(ano: int, mes: int, price_map: dict, curva_premios: pd.DataFrame, curva_ndf: pd.DataFrame,
+                 produtos=tuple(PRODUTOS), horizonte: int = HORIZONTE_PADRAO) -> pd.DataFrame:
+    """Parte do PPE que só depende do mercado: preço, prêmio, NDF e FOB, por produto x vencimento."""
+    anos_grade, meses_grade = _grade_array(generate_month_grid(ano, mes, horizon=horizonte))
+    produtos = list(produtos)
+    n = len(anos_grade)
     
-    # --- Cálculos finais do PPE ---
-    # Soja
-    df_ppe_soja["FOB (c$/bu)"] = df_ppe_soja["Preço"] + df_ppe_soja["Premio"]
-    df_ppe_soja["FOB ($/ton)"] = df_ppe_soja["FOB (c$/bu)"] * 0.367437
-    df_ppe_soja["FOB (R$/ton)"] = df_ppe_soja["FOB ($/ton)"] * df_ppe_soja["NDF"]
-    df_ppe_soja["Sobre rodas"] = df_ppe_soja["FOB (R$/ton)"] - fobbings
-    df_ppe_soja["EXW"] = df_ppe_soja["Sobre rodas"] - frete_dom
-    df_ppe_soja["PPE Preço saca origem (R$/sc)"] = df_ppe_soja["EXW"] * 0.06
-    df_ppe_soja["Basis Praça-CBOT (c$/bu)"] = ((df_ppe_soja["PPE Preço saca origem (R$/sc)"] / df_ppe_soja["NDF"]) / 2.204 - df_ppe_soja["Preço"]/100)*100
+    # Base longa (produto x vencimento) montada direto em arrays
+    def por_produto(valores):
+        return np.repeat(np.asarray(valores, dtype=object), n)
+    anos = np.tile(anos_grade, len(produtos))
+    meses = np.tile(meses_grade, len(produtos))
+    produto = por_produto(produtos)
+    preco = np.concatenate(
+        [_precos_mensais(PRODUTOS[p]["ativo"], anos_grade, meses_grade, price_map) for p in produtos]
+    ) if produtos else np.array([], dtype=float)
+    fator = np.repeat([PRODUTOS[p]["fator"] for p in produtos], n).astype(float)
     
-    # Milho
-    df_ppe_milho["FOB (c$/bu)"] = df_ppe_milho["Preço"] + df_ppe_milho["Premio"]
-    df_ppe_milho["FOB ($/ton)"] = df_ppe_milho["FOB (c$/bu)"] * 0.393687
-    df_ppe_milho["FOB (R$/ton)"] = df_ppe_milho["FOB ($/ton)"] * df_ppe_milho["NDF"]
-    df_ppe_milho["Sobre rodas"] = df_ppe_milho["FOB (R$/ton)"] - fobbings
-    df_ppe_milho["EXW"] = df_ppe_milho["Sobre rodas"] - frete_dom
-    df_ppe_milho["PPE Preço saca origem (R$/sc)"] = df_ppe_milho["EXW"] * 0.06
-    df_ppe_milho["Basis Praça-CBOT (c$/bu)"] = ((df_ppe_milho["PPE Preço saca origem (R$/sc)"] / df_ppe_milho["NDF"]) / 2.204 - df_ppe_milho["Preço"]/100)*100
+    # --- Prêmios: uma curva longa com todos os produtos, uma única busca ---
+    premio, premio_data = asof_curva(anos, meses, curva_premios, "Premio", grupos=produto)
     
-    # Seleciona colunas finais
-    df_ppe_soja = df_ppe_soja[["Ativo", "Vencimento", "Preço", "Premio", "NDF", "FOB (c$/bu)", 
-                                "FOB ($/ton)", "FOB (R$/ton)", "Sobre rodas", "EXW", 
-                                "PPE Preço saca origem (R$/sc)", "Basis Praça-CBOT (c$/bu)"]]
-    df_ppe_milho = df_ppe_milho[["Ativo", "Vencimento", "Preço", "Premio", "NDF", "FOB (c$/bu)", 
-                                  "FOB ($/ton)", "FOB (R$/ton)", "Sobre rodas", "EXW", 
-                                  "PPE Preço saca origem (R$/sc)", "Basis Praça-CBOT (c$/bu)"]]
+    # --- NDF: curva única para todos os produtos ---
+    ndf, ndf_fonte = asof_curva(anos, meses, curva_ndf, "NDF")
     
-    return df_ppe_soja.round(2), df_ppe_milho.round(2)
\ No newline at end of file
+    # --- FOB (uma passada para todos os produtos) ---
+    fob_cbu = preco + premio
+    fob_usd = fob_cbu * fator
+    return pd.DataFrame({
+        "Produto": produto,
+        "Ativo": por_produto([PRODUTOS[p]["ativo"] for p in produtos]),
+        "Ano": anos,
+        "MesNum": meses,
+        "Vencimento": np.tile(chave_mm_yyyy(anos_grade, meses_grade).to_numpy(dtype=object), len(produtos)),
+        "Preço": preco,
+        "Unidade": por_produto([PRODUTOS[p]["unidade"] for p in produtos]),
+        "Premio": premio,
+        "PremioData": premio_data,
+        "NDF": ndf,
+        "NDFFonte": ndf_fonte,
+        "FOB (c$/bu)": fob_cbu,
+        "FOB ($/ton)": fob_usd,
+        "FOB (R$/ton)": fob_usd * ndf,
+    })
+
+def aplicar_custos(base: pd.DataFrame, fobbings: float, frete_dom: float) -> pd.DataFrame:
+    """Colunas que dependem dos custos (Sobre rodas, EXW, saca, basis) sobre a base de mercado."""
+    fob_rs = base["FOB (R$/ton)"].to_numpy(dtype=float)
+    ndf = base["NDF"].to_numpy(dtype=float)
+    preco = base["Preço"].to_numpy(dtype=float)
+    sobre_rodas = fob_rs - fobbings
+    exw = sobre_rodas - frete_dom
+    saca = exw * TON_POR_SACA
+    # PPE = ((Preço + Premio) * fator * NDF - fobbings - frete) * TON_POR_SACA: derivadas em forma fechada
+    fator = _fator_linhas(base)
+    d_cbu = fator * ndf * TON_POR_SACA
+    custos = {
+        "Sobre rodas": sobre_rodas,
+        "EXW": exw,
+        "PPE Preço saca origem (R$/sc)": saca,
+        "Basis Praça-CBOT (c$/bu)": ((saca / ndf) / LB_POR_KG - preco/100)*100,
+        "dPPE/dCBOT": d_cbu,
+        "dPPE/dPremio": d_cbu,
+        "dPPE/dNDF": base["FOB ($/ton)"].to_numpy(dtype=float) * TON_POR_SACA,
+        "dPPE/dFrete": np.full(len(saca), -TON_POR_SACA),
+    }
+    # Monta a tabela de uma vez (inserir coluna a coluna custa mais que as contas)
+    colunas = ["Produto", "Ano", "MesNum", "Unidade", "PremioData", "NDFFonte"] + COLUNAS_PPE + COLUNAS_DELTAS
+    return pd.DataFrame({c: custos[c] if c in custos else base[c] for c in colunas}, index=base.index)
+
+# Grafo do cálculo: mudar só fobbings/frete_dom reaproveita cotações, curvas e base de mercado
+# (a base também vai para o disco; os custos são baratos demais para valer um arquivo)
+grafo_ppe = (
+    GrafoEstagios("calcular_ppe")
+    .estagio("tickers", _estagio_tickers, ["mes_ref", "produtos", "n_contratos"])
+    .estagio("cotacoes", _estagio_cotacoes, ["tickers", "provedor"], volatil=True)
+    .estagio("curvas", _estagio_curvas, ["premios", "df_ndf"])
+    .estagio("mercado", _estagio_mercado, ["mes_ref", "cotacoes", "curvas", "produtos", "horizonte"], persistir=cache_ppe)
+    .estagio("ppe", aplicar_custos, ["mercado", "fobbings", "frete_dom"])
+    .estagio("tabelas", tabelas_por_produto, ["ppe"])
+)
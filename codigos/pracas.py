@@ -0,0 +1,91 @@
+"""
+Matriz de PPE por praça de origem
+Cada praça tem seu frete até o porto e seu fobbings (aba "pracas" da planilha ou CSV).
+A matriz praça x vencimento x produto sai de uma única avaliação vetorizada do motor de
+cenários (cada praça é um cenário), em vez de uma rodada do motor por praça.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import cenarios
+from premios_export_soja_milho import process_pracas
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PRACAS_CSV = BASE_DIR / "configs" / "pracas.csv"
+
+
+def ler_pracas(fonte=PRACAS_CSV, fobbings_padrao: float = 40.0) -> pd.DataFrame:
+    """Tabela de praças (colunas "Praça", "Frete", "Fobbings") a partir de um CSV ou da aba já lida."""
+    df_raw = fonte if isinstance(fonte, pd.DataFrame) else pd.read_csv(fonte, dtype=str, sep=None, engine="python")
+    df, _ = process_pracas(df_raw, fobbings_padrao)
+    return df
+
+
+def matriz_pracas(mercado: dict, df_pracas: pd.DataFrame, ajuste_premio=0.0) -> dict:
+    """
+    PPE de todas as praças numa passada.
+
+    Args:
+        mercado: retrato de cenarios.mercado_de_longo / mercado_de_tabelas
+        df_pracas: saída de ler_pracas
+
+    Returns:
+        dict com "pracas", "vencimentos", "produtos" e, para cada saída em cenarios.SAIDAS,
+        um array (praça x vencimento x produto)
+    """
+    resultado = cenarios.avaliar_cenarios(
+        mercado,
+        fobbings=df_pracas["Fobbings"].to_numpy(dtype=float),
+        frete_dom=df_pracas["Frete"].to_numpy(dtype=float),
+        ajuste_premio=ajuste_premio,
+    )
+    resultado.update(
+        pracas=df_pracas["Praça"].tolist(),
+        vencimentos=list(mercado["vencimentos"]),
+        produtos=list(mercado["produtos"]),
+    )
+    return resultado
+
+
+def fatia(matriz: dict, pracas=None, vencimentos=None, produtos=None) -> dict:
+    """Recorte da matriz pelos rótulos pedidos (None = todos), sem recalcular."""
+    eixos = []
+    rotulos = {}
+    for nome, pedidos in (("pracas", pracas), ("vencimentos", vencimentos), ("produtos", produtos)):
+        todos = matriz[nome]
+        if pedidos is None:
+            idx = np.arange(len(todos))
+        else:
+            pos = {r: i for i, r in enumerate(todos)}
+            idx = np.array([pos[r] for r in ([pedidos] if isinstance(pedidos, str) else pedidos)], dtype=int)
+        eixos.append(idx)
+        rotulos[nome] = [todos[i] for i in idx]
+    sel = np.ix_(*eixos)
+    return {**rotulos, **{saida: matriz[saida][sel] for saida in cenarios.SAIDAS}}
+
+
+def pivot_pracas(matriz: dict, produto: str, saida: str = "PPE Preço saca origem (R$/sc)") -> pd.DataFrame:
+    """Tabela praça x vencimento de uma saída para um produto (para exibir)."""
+    i = matriz["produtos"].index(produto)
+    return pd.DataFrame(
+        matriz[saida][:, :, i],
+        index=pd.Index(matriz["pracas"], name="Praça"),
+        columns=pd.Index(matriz["vencimentos"], name="Vencimento"),
+    )
+
+
+def tabela_pracas(matriz: dict) -> pd.DataFrame:
+    """Matriz achatada (uma linha por praça x vencimento x produto) para exportar."""
+    n_pracas, n_venc, n_prod = matriz[cenarios.SAIDAS[0]].shape
+    praca, venc, prod = np.indices((n_pracas, n_venc, n_prod)).reshape(3, -1)
+    df = pd.DataFrame({
+        "Praça": np.asarray(matriz["pracas"], dtype=object)[praca],
+        "Produto": np.asarray(matriz["produtos"], dtype=object)[prod],
+        "Vencimento": np.asarray(matriz["vencimentos"], dtype=object)[venc],
+    })
+    for saida in cenarios.SAIDAS:
+        df[saida] = matriz[saida].reshape(-1)
+    return df
@@ -3,26 +3,14 @@
 # =================================================================================
 
 import pandas as pd
-import re
+
+from rotulos_mes import normalizar_rotulos
 
 TAB_SOJA   = "soja"
 TAB_MILHO  = "milho"
 TAB_NDF    = "ndf"
-
-def _fix_mes(label: str) -> str:
-    if not isinstance(label, str):
-        return label
-    s = re.sub(r"\.", "", label.strip())
-    mapa = {
-        'jan':'Jan','fev':'Fev','mar':'Mar','abr':'Abr','mai':'Mai','jun':'Jun',
-        'jul':'Jul','ago':'Ago','set':'Set','out':'Out','nov':'Nov','dez':'Dez'
-    }
-    m = re.match(r"([A-Za-z]{3,})[\/\s\-]?(\d{2}|\d{4})$", s, flags=re.IGNORECASE)
-    if not m:
-        return label
-    mes_raw, ano2 = m.group(1), m.group(2)
-    mes = mapa.get(mes_raw.lower()[:3], mes_raw.title()[:3])
-    return f"{mes}/{ano2}"
+TAB_PRACAS = "pracas"
+TAB_ROTAS  = "rotas"
 
 def _clean_df(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
@@ -43,7 +31,7 @@ def _clean_df(df: pd.DataFrame) -> pd.DataFrame:
             ren[c] = "Premio"
     df = df.rename(columns=ren)
     df = df[["Mes", "Premio"]]
-    df["Mes"] = df["Mes"].astype(str).apply(_fix_mes)
+    df["Mes"] = normalizar_rotulos(df["Mes"].astype(str))
     df["Premio"] = (
         df["Premio"].astype(str)
         .str.replace("+", "", regex=False)
@@ -120,6 +108,94 @@ def process_ndf(df_raw: pd.DataFrame):
     return df, ndf_vencimentos
 
 
+def process_pracas(df_raw: pd.DataFrame, fobbings_padrao: float = 40.0):
+    """
+    Aba de praças: uma linha por origem com "Praça", frete até o porto e (opcional) fobbings, em R$/ton.
+    Praças sem fobbings usam fobbings_padrao.
+    """
+    if df_raw.empty:
+        return pd.DataFrame(columns=["Praça", "Frete", "Fobbings"]), {}
+
+    df = df_raw.copy()
+    df.columns = [
+        str(c).strip()
+         .lower()
+         .replace("ç", "c").replace("ã", "a").replace("á", "a").replace("é", "e") for c in df.columns
+    ]
+    ren = {}
+    for c in df.columns:
+        if c in ["praca", "origem"]:
+            ren[c] = "Praça"
+        elif c.startswith("frete"):
+            ren[c] = "Frete"
+        elif c.startswith("fobbing"):
+            ren[c] = "Fobbings"
+    df = df.rename(columns=ren)
+    if "Fobbings" not in df.columns:
+        df["Fobbings"] = fobbings_padrao
+    df = df[["Praça", "Frete", "Fobbings"]].copy()
+
+    for col in ["Frete", "Fobbings"]:
+        df[col] = pd.to_numeric(
+            df[col].astype(str).str.replace(" ", "", regex=False).str.replace(",", ".", regex=False),
+            errors="coerce",
+        )
+    df["Fobbings"] = df["Fobbings"].fillna(fobbings_padrao)
+    df["Praça"] = df["Praça"].astype(str).str.strip()
+    df = df[df["Praça"].ne("") & df["Praça"].ne("nan")]
+    df = df.dropna(subset=["Frete"]).drop_duplicates("Praça", keep="last").reset_index(drop=True)
+
+    pracas_dados = {row["Praça"]: (float(row["Frete"]), float(row["Fobbings"])) for _, row in df.iterrows()}
+    return df, pracas_dados
+
+
+def process_rotas(df_raw: pd.DataFrame):
+    """
+    Aba de rotas até a Ásia: por linha "Rota" (Brasil/EUA/Argentina), "Mes", frete marítimo ($/ton)
+    e, opcional, "Produto" (vazio = todos) e prêmio FOB da origem (c$/bu).
+    """
+    colunas = ["Rota", "Produto", "Mes", "Premio", "Frete"]
+    if df_raw.empty:
+        return pd.DataFrame(columns=colunas), {}
+
+    df = df_raw.copy()
+    df.columns = [
+        str(c).strip()
+         .lower()
+         .replace("ç", "c").replace("ã", "a").replace("é", "e").replace("ê", "e") for c in df.columns
+    ]
+    ren = {}
+    for c in df.columns:
+        if c in ["rota", "origem"]:
+            ren[c] = "Rota"
+        elif c == "produto":
+            ren[c] = "Produto"
+        elif c in ["mes", "vencimento"]:
+            ren[c] = "Mes"
+        elif c.startswith("premio"):
+            ren[c] = "Premio"
+        elif c.startswith("frete"):
+            ren[c] = "Frete"
+    df = df.rename(columns=ren)
+    for c in colunas:
+        if c not in df.columns:
+            df[c] = pd.NA
+    df = df[colunas].copy()
+
+    df["Rota"] = df["Rota"].astype(str).str.strip()
+    df["Produto"] = df["Produto"].fillna("").astype(str).str.strip().str.lower().replace("nan", "")
+    df["Mes"] = normalizar_rotulos(df["Mes"].astype(str))
+    for col in ["Premio", "Frete"]:
+        df[col] = pd.to_numeric(
+            df[col].astype(str).str.replace("+", "", regex=False).str.replace(",", ".", regex=False).str.strip(),
+            errors="coerce",
+        )
+    df = df.dropna(subset=["Premio", "Frete"], how="all").reset_index(drop=True)
+
+    rotas_dados = {rota: sorted(g["Mes"].unique().tolist()) for rota, g in df.groupby("Rota")}
+    return df, rotas_dados
+
+
 #=======================================================================================#
 
 """
@@ -132,6 +208,8 @@ O QUE ESTE SCRIPT FAZ
 - Lê, em modo SOMENTE LEITURA, duas abas (“soja” e “milho”) de um Google Sheets (SHEET_ID).
 - Padroniza colunas/formatos: “Mes” (ex.: “ago./25” → “Ago/25”) e “Premio” (remove “+”, troca vírgula por ponto).
 - Converte “Premio” para número e elimina linhas inválidas.
+- Aba “pracas” (process_pracas): frete até o porto e fobbings por origem, em R$/ton.
+- Aba “rotas” (process_rotas): frete marítimo até a Ásia e prêmio FOB por rota (Brasil/EUA/Argentina).
 - Entrega 2 DataFrames prontos (df_soja, df_milho) e 2 dicionários (soja_dados, milho_dados).
 - Imprime as tabelas no terminal.
 
@@ -143,7 +221,7 @@ ENTRADAS / REQUISITOS
 PASSO A PASSO (como funciona)
 1) Constantes (SHEET_ID, abas, caminho do JSON e SCOPES somente leitura).
 2) _open_sheet(): carrega credenciais e abre a planilha por ID.
-3) _fix_mes(): normaliza rótulos de mês (ex.: “ago./25” → “Ago/25”).
+3) normalizar_rotulos() (rotulos_mes.py): normaliza rótulos de mês de uma vez (ex.: “ago./25” → “Ago/25”).
 4) _clean_df(): renomeia colunas, seleciona [“Mes”, “Premio”], limpa símbolos e converte tipos.
 5) _read_tab(tab): lê a aba via gspread, aplica limpeza e trata erro 403 com mensagem clara.
 6) Carrega df_soja/df_milho; monta soja_dados/milho_dados; imprime os DataFrames.
@@ -156,7 +234,7 @@ SAÍDAS
 O QUE VOCÊ PODE MODIFICAR (e como)
 1) Planilha/abas: troque SHEET_ID; ajuste TAB_SOJA/TAB_MILHO para outros nomes de abas.
 2) Credenciais: se o JSON estiver em outro local, altere GSHEETS_KEY_PATH; para escrita, mude SCOPES.
-3) Meses: edite o dict ‘mapa’ em _fix_mes; se usar ano com 4 dígitos (“Ago/2025”), ajuste o regex (\d{4}) e a formatação.
+3) Meses: edite o dict MES_NUM em rotulos_mes.py (ano com 2 ou 4 dígitos já é aceito).
 4) Colunas: se a planilha usar nomes diferentes, altere o bloco ‘ren’ e a seleção df[[“Mes”, “Premio”]] em _clean_df.
 5) Números: para manter decimais, remova .astype(int) nos dicionários; para arredondar, use .round(n).
 6) Integração: em vez de print(), retorne os DataFrames (ex.: `return df_soja, df_milho`) ao importar este módulo; ou salve CSVs com .to_csv().
@@ -0,0 +1,113 @@
+"""
+Provedores de cotação para o motor PPE
+O calcular_ppe recebe um QuoteProvider: em produção o TradingView; em benchmark/teste de carga
+um ReplayProvider que lê barras gravadas em arquivo, sem rede e com resultado determinístico.
+"""
+
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+import pandas as pd
+
+import cotacoes_tradingview_cepea as cot
+
+COLUNAS_COTACAO = ["Ticker", "Preço", "Barra", "Status"]
+
+
+class QuoteProvider(Protocol):
+    def fetch_many(self, symbols, exchange: str = "CBOT") -> pd.DataFrame:
+        """Retorna DataFrame com colunas ["Ticker", "Preço", "Barra", "Status"], na ordem de 'symbols'."""
+        ...
+
+
+class TradingViewProvider:
+    """Cotações ao vivo do TradingView (busca em lote + cache por barra)."""
+
+    def __init__(self, prazo: float | None = None):
+        self.prazo = prazo
+
+    def fetch_many(self, symbols, exchange: str = "CBOT") -> pd.DataFrame:
+        prazo = cot.PRAZO_LOTE if self.prazo is None else self.prazo
+        return cot.fetch_many(symbols, exchange, prazo=prazo)
+
+
+def ler_barras(fonte) -> pd.DataFrame:
+    """
+    Lê barras gravadas de um DataFrame, arquivo (.csv/.parquet) ou pasta com vários arquivos.
+    Aceita o formato do tvDatafeed (índice datetime, coluna symbol "CBOT:ZCH2026", close ...)
+    e devolve colunas normalizadas ["exchange", "symbol", "datetime", "close"].
+    """
+    if isinstance(fonte, pd.DataFrame):
+        df = fonte.copy()
+    else:
+        fonte = Path(fonte)
+        arquivos = sorted(fonte.rglob("*")) if fonte.is_dir() else [fonte]
+        partes = []
+        for arq in arquivos:
+            if arq.suffix == ".parquet":
+                partes.append(pd.read_parquet(arq))
+            elif arq.suffix == ".csv":
+                partes.append(pd.read_csv(arq))
+        if not partes:
+            raise FileNotFoundError(f"Nenhuma barra gravada encontrada em {fonte}")
+        df = pd.concat(partes)
+
+    if "datetime" not in df.columns:
+        df = df.reset_index()
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    if "exchange" not in df.columns:
+        partes_sym = df["symbol"].astype(str).str.split(":", n=1, expand=True)
+        df["exchange"] = partes_sym[0]
+        df["symbol"] = partes_sym[1]
+    return df[["exchange", "symbol", "datetime", "close"]].sort_values(["exchange", "symbol", "datetime"])
+
+
+class ReplayProvider:
+    """
+    Reproduz cotações gravadas: para cada símbolo devolve o fechamento da última barra <= data_ref
+    (ou a última barra gravada, se data_ref for None).
+    """
+
+    def __init__(self, fonte, data_ref=None):
+        df = ler_barras(fonte)
+        self._series = {
+            chave: (g["datetime"].to_numpy(), g["close"].to_numpy(dtype=float))
+            for chave, g in df.groupby(["exchange", "symbol"], sort=False)
+        }
+        self._ultimo = {}
+        self.set_data_ref(data_ref)
+
+    def set_data_ref(self, data_ref):
+        """Muda o instante reproduzido; pré-calcula a última barra de cada símbolo."""
+        self.data_ref = None if data_ref is None else pd.Timestamp(data_ref).tz_localize(None)
+        self._ultimo = {}
+        self._respostas = {}
+        for chave, (tempos, closes) in self._series.items():
+            if self.data_ref is None:
+                i = len(tempos) - 1
+            else:
+                i = np.searchsorted(tempos, self.data_ref.to_datetime64(), side="right") - 1
+            if i >= 0:
+                self._ultimo[chave] = (float(closes[i]), pd.Timestamp(tempos[i]))
+
+    def fetch_many(self, symbols, exchange: str = "CBOT") -> pd.DataFrame:
+        # Com data_ref fixa a resposta não muda: monta o DataFrame uma vez por lista de símbolos
+        chave = (exchange, tuple(dict.fromkeys(symbols)))
+        df = self._respostas.get(chave)
+        if df is None:
+            df = self._respostas[chave] = self._montar(*chave)
+        return df.copy(deep=False)
+
+    def _montar(self, exchange, symbols) -> pd.DataFrame:
+        linhas = []
+        for sym in symbols:
+            hit = self._ultimo.get((exchange, sym))
+            if hit is None:
+                linhas.append([sym, None, None, "erro"])
+            else:
+                linhas.append([sym, hit[0], hit[1], "ok"])
+        return pd.DataFrame(linhas, columns=COLUNAS_COTACAO)
+
+
+provedor_padrao = TradingViewProvider()
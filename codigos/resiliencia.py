@@ -0,0 +1,194 @@
+"""
+Camada de resiliência para chamadas externas (TradingView)
+- PoliticaRetry: backoff exponencial com jitter, respeitando um prazo final
+- CircuitBreaker: um por bolsa (CBOT, BMFBOVESPA); após falhas seguidas, falha na hora por um tempo
+- SemDados: resposta vazia (contrato não listado); não repete nem abre o circuito
+- orcamento(): prazo total de latência para um bloco (ex.: um calcular_ppe inteiro)
+"""
+
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+
+class CircuitoAberto(RuntimeError):
+    """Chamada recusada sem tentar: o circuito da bolsa está aberto."""
+
+
+class PrazoEsgotado(RuntimeError):
+    """O orçamento de latência acabou antes de uma resposta válida."""
+
+
+class SemDados(RuntimeError):
+    """A bolsa respondeu sem dados (contrato não listado ou sem negócios): não é falha da bolsa."""
+
+
+# ---------- Orçamento de latência ----------
+_prazo_final = contextvars.ContextVar("prazo_final", default=None)
+
+@contextmanager
+def orcamento(segundos: float):
+    """Limita o tempo total das chamadas dentro do bloco (aninha: vale o prazo mais curto)."""
+    ate = time.monotonic() + segundos
+    atual = _prazo_final.get()
+    token = _prazo_final.set(ate if atual is None else min(atual, ate))
+    try:
+        yield
+    finally:
+        _prazo_final.reset(token)
+
+def prazo_final():
+    """Instante (time.monotonic) em que o orçamento corrente acaba, ou None."""
+    return _prazo_final.get()
+
+def prazo_restante():
+    ate = _prazo_final.get()
+    return None if ate is None else max(0.0, ate - time.monotonic())
+
+
+# ---------- Circuit breaker ----------
+class CircuitBreaker:
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    MEIO_ABERTO = "meio-aberto"
+
+    def __init__(self, nome: str, limite_falhas: int = 5, tempo_abertura: float = 30.0):
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.tempo_abertura = tempo_abertura
+        self._estado = self.FECHADO
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._sondando = False
+        self._lock = threading.Lock()
+
+    @property
+    def estado_atual(self) -> str:
+        with self._lock:
+            if self._estado == self.ABERTO and time.monotonic() - self._aberto_em >= self.tempo_abertura:
+                return self.MEIO_ABERTO
+            return self._estado
+
+    def permitir(self) -> bool:
+        """Se o circuito está aberto, recusa; passado o tempo_abertura deixa passar uma sondagem."""
+        with self._lock:
+            if self._estado == self.FECHADO:
+                return True
+            if self._estado == self.ABERTO and time.monotonic() - self._aberto_em < self.tempo_abertura:
+                return False
+            if self._sondando:
+                return False
+            self._estado = self.MEIO_ABERTO
+            self._sondando = True
+            return True
+
+    def sucesso(self):
+        with self._lock:
+            self._estado = self.FECHADO
+            self._falhas = 0
+            self._sondando = False
+
+    def cancelar(self):
+        """A chamada desistiu sem resultado: libera a sondagem sem contar sucesso nem falha."""
+        with self._lock:
+            self._sondando = False
+
+    def falha(self):
+        with self._lock:
+            self._falhas += 1
+            if self._estado == self.MEIO_ABERTO or self._falhas >= self.limite_falhas:
+                self._estado = self.ABERTO
+                self._aberto_em = time.monotonic()
+            self._sondando = False
+
+    def resumo(self) -> dict:
+        estado = self.estado_atual
+        with self._lock:
+            reabre = max(0.0, self.tempo_abertura - (time.monotonic() - self._aberto_em)) if estado == self.ABERTO else 0.0
+            return {"Bolsa": self.nome, "Estado": estado, "Falhas seguidas": self._falhas, "Reabre em (s)": round(reabre, 1)}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def breaker(nome: str) -> CircuitBreaker:
+    """Breaker compartilhado pelo processo para a bolsa 'nome'."""
+    with _breakers_lock:
+        if nome not in _breakers:
+            _breakers[nome] = CircuitBreaker(nome)
+        return _breakers[nome]
+
+def estado_breakers() -> list:
+    """Resumo de todos os breakers (para exibir na interface)."""
+    with _breakers_lock:
+        todos = list(_breakers.values())
+    return [b.resumo() for b in todos]
+
+
+# ---------- Retry ----------
+class PoliticaRetry:
+    def __init__(self, max_tentativas: int = 3, base: float = 0.5, fator: float = 2.0, teto: float = 4.0,
+                 jitter: bool = True):
+        self.max_tentativas = max_tentativas
+        self.base = base
+        self.fator = fator
+        self.teto = teto
+        self.jitter = jitter
+
+    def espera(self, tentativa: int) -> float:
+        """Espera antes da tentativa seguinte (full jitter: uniforme em [0, base*fator^n])."""
+        limite = min(self.teto, self.base * self.fator ** tentativa)
+        return random.uniform(0, limite) if self.jitter else limite
+
+    def executar(self, fn, breaker: CircuitBreaker | None = None, ate: float | None = None):
+        """
+        Executa fn() com retries. Para na hora se o circuito abrir, e não dorme além de 'ate'
+        (ou do orçamento corrente, o que vier primeiro).
+        O breaker é consultado uma vez e recebe um só resultado por chamada (sucesso, uma falha
+        ou nada), não um por tentativa. SemDados e PrazoEsgotado não são repetidos nem contam
+        como falha da bolsa.
+        """
+        orc = prazo_final()
+        if orc is not None:
+            ate = orc if ate is None else min(ate, orc)
+
+        permitido = False
+        ultimo_erro = None
+        try:
+            for tentativa in range(self.max_tentativas):
+                # Prazo antes do breaker: permitir() no meio-aberto reserva a única sondagem
+                if ate is not None and time.monotonic() >= ate:
+                    break
+                if breaker is not None and not permitido:
+                    if not breaker.permitir():
+                        raise CircuitoAberto(f"Circuito {breaker.nome} aberto")
+                    permitido = True
+                try:
+                    resultado = fn()
+                except (PrazoEsgotado, SemDados):
+                    raise  # falta de tempo ou de dados não é falha da bolsa
+                except Exception as e:
+                    ultimo_erro = e
+                    if tentativa == self.max_tentativas - 1:
+                        break
+                    pausa = self.espera(tentativa)
+                    if ate is not None and time.monotonic() + pausa >= ate:
+                        break
+                    time.sleep(pausa)
+                else:
+                    if permitido:
+                        breaker.sucesso()
+                        permitido = False
+                    return resultado
+        finally:
+            if permitido:
+                # Desistência: uma falha se alguma tentativa falhou; senão só libera a sondagem
+                if ultimo_erro is not None:
+                    breaker.falha()
+                else:
+                    breaker.cancelar()
+        if ultimo_erro is None:
+            raise PrazoEsgotado("Orçamento de latência esgotado")
+        raise ultimo_erro
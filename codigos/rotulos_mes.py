@@ -0,0 +1,80 @@
+"""
+Parser vetorizado de rótulos de mês (prêmios, NDF e vencimentos do grid)
+Formatos aceitos, todos numa passada só:
+  - "Set/25", "ago./25", "Ago 2025"    (mês abreviado PT/EN + ano com 2 ou 4 dígitos)
+  - "setembro/2025"                    (mês por extenso)
+  - "09/2025"                          (MM/YYYY)
+Cada rótulo distinto é interpretado uma única vez (tabela de lookup); as linhas só reaproveitam.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Três primeiras letras (minúsculas, sem acento) -> número do mês; inclui abreviações em inglês
+MES_NUM = {
+    "jan": 1, "fev": 2, "feb": 2, "mar": 3, "abr": 4, "apr": 4, "mai": 5, "may": 5,
+    "jun": 6, "jul": 7, "ago": 8, "aug": 8, "set": 9, "sep": 9, "out": 10, "oct": 10,
+    "nov": 11, "dez": 12, "dec": 12,
+}
+
+MES_ABREV_PT = {1: "Jan", 2: "Fev", 3: "Mar", 4: "Abr", 5: "Mai", 6: "Jun",
+                7: "Jul", 8: "Ago", 9: "Set", 10: "Out", 11: "Nov", 12: "Dez"}
+
+_RE_ROTULO = r"^\s*(?:(?P<mm>\d{1,2})|(?P<nome>[^\W\d_]{3,}))\.?\s*[/\s\-]?\s*(?P<ano>\d{4}|\d{2})\s*$"
+
+
+def _extrair(serie: pd.Series):
+    """(tabela de rótulos únicos extraídos, códigos de cada linha na tabela)."""
+    codigos, unicos = pd.factorize(serie.astype(str), use_na_sentinel=True)
+    return pd.Series(unicos, dtype=object).str.extract(_RE_ROTULO), codigos
+
+
+def parse_rotulos(serie) -> pd.DataFrame:
+    """
+    Converte rótulos de mês em inteiros.
+
+    Returns:
+        DataFrame (mesmo índice da entrada) com colunas "Ano", "MesNum" e "Ordinal" (ano*12 + mês - 1),
+        tipo Int64; rótulos não reconhecidos ficam <NA>
+    """
+    serie = pd.Series(serie)
+    ext, codigos = _extrair(serie)
+
+    # Tabela de lookup (um valor por rótulo distinto), em float com NaN para os inválidos
+    nome3 = ext["nome"].str.lower().str[:3].str.replace("ç", "c", regex=False)
+    mes = nome3.map(MES_NUM).to_numpy(dtype=float, na_value=np.nan)
+    mm = pd.to_numeric(ext["mm"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    mes = np.where(np.isnan(mes), mm, mes)
+    mes[(mes < 1) | (mes > 12)] = np.nan
+    ano = pd.to_numeric(ext["ano"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    ano = np.where(ano < 100, ano + 2000, ano)  # "25" -> 2025
+    ano[np.isnan(mes)] = np.nan
+
+    # -1 (rótulo ausente) aponta para uma posição extra NaN
+    idx = np.where(codigos < 0, len(mes), codigos)
+    mes, ano = np.append(mes, np.nan)[idx], np.append(ano, np.nan)[idx]
+    out = pd.DataFrame({"Ano": ano, "MesNum": mes, "Ordinal": ano * 12 + mes - 1}, index=serie.index)
+    return out.astype("Int64")
+
+
+def normalizar_rotulos(serie) -> pd.Series:
+    """
+    Padroniza rótulos de mês abreviado para "Mmm/AA" (ex.: "ago./25" -> "Ago/25"), mantendo
+    o ano como veio. Rótulos em outro formato voltam inalterados.
+    """
+    serie = pd.Series(serie)
+    ext, codigos = _extrair(serie)
+    nome = ext["nome"]
+    abrev = nome.str.lower().str[:3].str.replace("ç", "c", regex=False).map(MES_NUM).map(MES_ABREV_PT)
+    abrev = abrev.fillna(nome.str.title().str[:3])
+    fixos = (abrev + "/" + ext["ano"]).to_numpy(dtype=object)
+
+    fixos = np.append(fixos, None)
+    out = fixos[np.where(codigos < 0, len(fixos) - 1, codigos)]
+    return pd.Series(out, index=serie.index, dtype=object).where(lambda s: s.notna(), serie)
+
+
+def chave_mm_yyyy(anos, meses) -> pd.Series:
+    """Chave de auditoria "MM/YYYY" a partir de colunas inteiras de ano e mês."""
+    anos, meses = pd.Series(anos), pd.Series(meses)
+    return meses.astype(int).astype(str).str.zfill(2) + "/" + anos.astype(int).astype(str).values
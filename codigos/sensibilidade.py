@@ -0,0 +1,145 @@
+"""
+Cubo de sensibilidade do PPE
+Avalia o PPE (R$/sc) sobre uma grade de quantos eixos se quiser (variação de Chicago, do prêmio e
+do dólar, frete doméstico, fobbings), mais vencimento e produto, numa única conta por broadcasting.
+O cubo fica em cache; fatias 2-D e perfis 1-D saem dele por indexação, sem recalcular.
+A tabela Chicago x dólar da tela (criar_tabela_sensibilidade) também fica aqui, fora do app.
+"""
+
+import numpy as np
+import pandas as pd
+
+from cache_resultados import CacheResultados, chave_conteudo
+from ppe_engine import PRODUTOS, TON_POR_SACA
+
+# Eixos do cubo: CBOT, Premio e NDF são variações sobre a curva; frete_dom e fobbings, valores absolutos
+EIXOS = {
+    "CBOT": "Variação de Chicago (c$/bu)",
+    "Premio": "Variação do prêmio (c$/bu)",
+    "NDF": "Variação do dólar (R$/US$)",
+    "frete_dom": "Frete doméstico (R$/ton)",
+    "fobbings": "Fobbings (R$/ton)",
+}
+MAX_CELULAS = 20_000_000  # ~160 MB em float64
+
+cache_cubos = CacheResultados("cubos_sensibilidade", max_itens=16)
+
+
+class CuboSensibilidade:
+    """PPE (R$/sc) em array somente leitura; dimensões = eixos escolhidos + "Vencimento" + "Produto"."""
+
+    def __init__(self, valores: np.ndarray, eixos: dict, vencimentos, produtos):
+        self.valores = valores
+        self.eixos = {**{n: np.asarray(v, dtype=float) for n, v in eixos.items()},
+                      "Vencimento": np.asarray(vencimentos, dtype=object),
+                      "Produto": np.asarray(produtos, dtype=object)}
+        self.dims = list(self.eixos)
+
+    def _indice(self, dim: str, valor) -> int:
+        rotulos = self.eixos[dim]
+        if rotulos.dtype == object:
+            return list(rotulos).index(valor)
+        return int(np.argmin(np.abs(rotulos - float(valor))))  # ponto mais próximo da grade
+
+    def fatia(self, linhas: str, colunas: str | None = None, **fixos):
+        """
+        Recorte do cubo sem recalcular.
+
+        Args:
+            linhas, colunas: dimensões exibidas (colunas=None devolve o perfil 1-D de linhas)
+            fixos: valor das demais dimensões (padrão: ponto do meio da grade; primeiro vencimento/produto)
+
+        Returns:
+            DataFrame (linhas x colunas) ou Series indexada por linhas
+        """
+        sel = []
+        for dim in self.dims:
+            if dim in (linhas, colunas):
+                sel.append(slice(None))
+            elif dim in fixos:
+                sel.append(self._indice(dim, fixos[dim]))
+            else:
+                sel.append(0 if self.eixos[dim].dtype == object else len(self.eixos[dim]) // 2)
+        recorte = self.valores[tuple(sel)]
+
+        indice = pd.Index(self.eixos[linhas], name=linhas)
+        if colunas is None:
+            return pd.Series(recorte, index=indice, name="PPE Preço saca origem (R$/sc)")
+        if self.dims.index(linhas) > self.dims.index(colunas):
+            recorte = recorte.T
+        return pd.DataFrame(recorte, index=indice, columns=pd.Index(self.eixos[colunas], name=colunas))
+
+
+def _calcular_cubo(mercado: dict, eixos: list, fobbings: float, frete_dom: float) -> CuboSensibilidade:
+    n = len(eixos)
+
+    def eixo(nome, padrao):
+        for i, (nome_eixo, valores) in enumerate(eixos):
+            if nome_eixo == nome:
+                return np.asarray(valores, dtype=float).reshape((-1,) + (1,) * (n - i - 1 + 2))
+        return padrao
+
+    fator = mercado["fator"]
+    preco = mercado["preco"] + eixo("CBOT", 0.0)
+    premio = mercado["premio"] + eixo("Premio", 0.0)
+    ndf = mercado["ndf"] + eixo("NDF", 0.0)
+    custos = eixo("fobbings", fobbings) + eixo("frete_dom", frete_dom)
+    valores = ((preco + premio) * fator * ndf - custos) * TON_POR_SACA
+    valores.setflags(write=False)  # compartilhado pelo cache
+    return CuboSensibilidade(valores, dict(eixos), mercado["vencimentos"], mercado["produtos"])
+
+
+def cubo_sensibilidade(mercado: dict, eixos: dict, fobbings=40.0, frete_dom=342.0) -> CuboSensibilidade:
+    """
+    Cubo do PPE sobre os eixos pedidos (guardado em cache_cubos: mesmas entradas, mesmo cubo).
+
+    Args:
+        mercado: retrato de cenarios.mercado_de_longo / mercado_de_tabelas
+        eixos: {nome em EIXOS: valores}, na ordem das dimensões; eixos ausentes ficam na curva
+            (variação zero) ou nos custos fobbings/frete_dom
+    """
+    desconhecidos = set(eixos) - set(EIXOS)
+    if desconhecidos:
+        raise ValueError(f"Eixos não suportados: {sorted(desconhecidos)}; use {list(EIXOS)}")
+    eixos = [(nome, np.atleast_1d(np.asarray(v, dtype=float))) for nome, v in eixos.items()]
+    n_celulas = int(np.prod([len(v) for _, v in eixos])) * mercado["preco"].size
+    if n_celulas > MAX_CELULAS:
+        raise ValueError(f"Cubo com {n_celulas:,} células passa do limite de {MAX_CELULAS:,}; reduza os eixos")
+
+    chave = chave_conteudo(
+        mercado["vencimentos"], mercado["produtos"], mercado["preco"], mercado["premio"], mercado["ndf"],
+        mercado["fator"], eixos, float(fobbings), float(frete_dom),
+    )
+    return cache_cubos.obter(chave, _calcular_cubo, mercado, eixos, float(fobbings), float(frete_dom))
+
+
+def criar_tabela_sensibilidade(df_ppe, ndf_atual, premio, frete_dom, fobbings, produto,
+                               passo_dolar=0.05, n_dolar=9, chicago=None):
+    """
+    Cria tabela de sensibilidade com Chicago nas linhas e variações do dólar nas colunas
+
+    Args:
+        passo_dolar, n_dolar: colunas do dólar centradas no NDF atual (padrão: NDF ± 0,20 em passos de 0,05)
+        chicago: preços de Chicago das linhas (c$/bu); padrão: o preço de cada vencimento de df_ppe
+    """
+    # Fatores de conversão do motor (c$/bu -> $/ton e R$/ton -> R$/sc)
+    fator = PRODUTOS[produto.lower()]["fator"]
+    dolares = ndf_atual + passo_dolar * (np.arange(n_dolar) - (n_dolar - 1) / 2)
+
+    if chicago is None:
+        chicago_precos = df_ppe["Preço"].to_numpy(dtype=float)
+        indice = pd.Index(df_ppe["Vencimento"], name="Vencimento")
+    else:
+        chicago_precos = np.asarray(chicago, dtype=float)
+        indice = pd.Index([f"{c:.2f}".replace(".", ",") for c in chicago_precos], name="Chicago")
+
+    # Superfície inteira de uma vez: produto externo (Chicago + prêmio) x dólar
+    valores = (np.multiply.outer((chicago_precos + premio) * fator, dolares) - (frete_dom + fobbings)) * TON_POR_SACA
+    casas = max(2, -int(np.floor(np.log10(passo_dolar))))  # passos menores que 0,01 pedem mais casas
+    df_sens = pd.DataFrame(valores, columns=[f"R$ {d:.{casas}f}".replace(".", ",") for d in dolares], index=indice)
+
+    # Adiciona colunas com preços de Chicago e Chicago + prêmio
+    df_sens.insert(0, "Chicago (c$/bu)", chicago_precos)
+    df_sens.insert(1, "Eq. Bushel (c$/bu)", chicago_precos + premio)
+
+    return df_sens
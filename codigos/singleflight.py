@@ -0,0 +1,68 @@
+"""
+Coalescência de requisições (single-flight)
+Chamadas simultâneas com a mesma chave esperam a execução que já está em andamento e recebem
+o mesmo resultado (ou a mesma exceção), em vez de repetirem o trabalho.
+"""
+
+import copy
+import threading
+
+
+class _Voo:
+    __slots__ = ("evento", "resultado", "erro", "seguidores")
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+        self.seguidores = 0
+
+
+class SingleFlight:
+    def __init__(self, nome: str, copiar: bool = True):
+        self.nome = nome
+        self.copiar = copiar  # seguidores recebem cópia (DataFrames são mutáveis)
+        self._em_voo = {}
+        self._lock = threading.Lock()
+        self.execucoes = 0
+        self.colapsadas = 0
+
+    def do(self, chave, fn, *args, **kwargs):
+        with self._lock:
+            voo = self._em_voo.get(chave)
+            if voo is None:
+                voo = self._em_voo[chave] = _Voo()
+                lider = True
+                self.execucoes += 1
+            else:
+                voo.seguidores += 1
+                lider = False
+                self.colapsadas += 1
+
+        if not lider:
+            voo.evento.wait()
+            if voo.erro is not None:
+                raise voo.erro
+            return copy.deepcopy(voo.resultado) if self.copiar else voo.resultado
+
+        try:
+            voo.resultado = fn(*args, **kwargs)
+            return voo.resultado
+        except BaseException as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._em_voo[chave]
+            voo.evento.set()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            total = self.execucoes + self.colapsadas
+            return {
+                "nome": self.nome,
+                "execucoes": self.execucoes,
+                "colapsadas": self.colapsadas,
+                "em_voo": len(self._em_voo),
+                "taxa_colapso": self.colapsadas / total if total else 0.0,
+            }
@@ -0,0 +1,260 @@
+"""
+Cotações em tempo real (streaming) do TradingView
+Um AssinanteCotacoes mantém UMA conexão websocket aberta para os contratos ativos e grava cada
+negócio numa LastPriceStore em memória (thread-safe). O calcular_ppe lê dela via StreamProvider,
+sem ir à rede; opcionalmente um callback recalcula o PPE a cada atualização de preço.
+A URL e a função de conexão são injetáveis, então dá para rodar contra um servidor fake local.
+"""
+
+import json
+import logging
+import random
+import re
+import string
+import threading
+import time
+
+import pandas as pd
+
+from provedores import COLUNAS_COTACAO
+from resiliencia import PoliticaRetry
+
+URL_TV = "wss://data.tradingview.com/socket.io/websocket"
+HEADERS_TV = ["Origin: https://data.tradingview.com"]
+
+_RE_FRAME = re.compile(r"~m~(\d+)~m~")
+
+log = logging.getLogger(__name__)
+
+
+# ---------- Protocolo (framing ~m~<tamanho>~m~<payload>) ----------
+def empacotar(payload: str) -> str:
+    return f"~m~{len(payload)}~m~{payload}"
+
+def mensagem(func: str, params: list) -> str:
+    return empacotar(json.dumps({"m": func, "p": params}, separators=(",", ":")))
+
+def desempacotar(raw: str) -> list:
+    """Separa um frame bruto em payloads (um frame pode trazer várias mensagens)."""
+    out = []
+    pos = 0
+    while True:
+        m = _RE_FRAME.match(raw, pos)
+        if not m:
+            break
+        ini = m.end()
+        fim = ini + int(m.group(1))
+        out.append(raw[ini:fim])
+        pos = fim
+    return out
+
+
+# ---------- Último preço em memória ----------
+class LastPriceStore:
+    """Tabela (bolsa, símbolo) -> (preço, horário); leitura e escrita protegidas por lock."""
+
+    def __init__(self):
+        self._precos = {}
+        self._lock = threading.Lock()
+        self.versao = 0
+        self.atualizado_em = None
+
+    def atualizar(self, exchange: str, symbol: str, preco: float, horario=None):
+        with self._lock:
+            self._precos[(exchange, symbol)] = (float(preco), horario)
+            self.versao += 1
+            self.atualizado_em = time.time()
+
+    def get(self, exchange: str, symbol: str):
+        with self._lock:
+            return self._precos.get((exchange, symbol))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._precos)
+
+
+class StreamProvider:
+    """QuoteProvider que lê da LastPriceStore; símbolos ainda sem negócio vão ao 'fallback' (se houver)."""
+
+    def __init__(self, store: LastPriceStore, fallback=None):
+        self.store = store
+        self.fallback = fallback
+
+    def fetch_many(self, symbols, exchange: str = "CBOT") -> pd.DataFrame:
+        symbols = list(dict.fromkeys(symbols))
+        linhas = {}
+        faltantes = []
+        for sym in symbols:
+            hit = self.store.get(exchange, sym)
+            if hit is None:
+                faltantes.append(sym)
+            else:
+                linhas[sym] = [sym, hit[0], hit[1], "ok"]
+        if faltantes and self.fallback is not None:
+            df_fb = self.fallback.fetch_many(faltantes, exchange)
+            linhas.update({row[0]: list(row) for row in df_fb[COLUNAS_COTACAO].itertuples(index=False)})
+        for sym in faltantes:
+            linhas.setdefault(sym, [sym, None, None, "sem cotação"])
+        return pd.DataFrame([linhas[sym] for sym in symbols], columns=COLUNAS_COTACAO)
+
+
+# ---------- Assinante ----------
+def _conectar_websocket(url, timeout):
+    from websocket import create_connection
+    return create_connection(url, header=HEADERS_TV, timeout=timeout)
+
+def _timeouts():
+    try:
+        from websocket import WebSocketTimeoutException
+        return (TimeoutError, WebSocketTimeoutException)
+    except ImportError:
+        return (TimeoutError,)
+
+
+class AssinanteCotacoes(threading.Thread):
+    """
+    Thread de fundo com uma conexão de cotações (quote session) para 'simbolos'
+    (lista de "BOLSA:SIMBOLO", ex.: "CBOT:ZCH2026"). Reconecta com backoff se a conexão cair.
+    ao_atualizar(exchange, symbol, preco) é chamado (na thread do assinante) a cada negócio.
+    trocar_simbolos() muda a assinatura na mesma conexão (ex.: virada do mês, outro horizonte).
+    """
+
+    def __init__(self, simbolos, store: LastPriceStore | None = None, url: str = URL_TV,
+                 token=None, conectar=_conectar_websocket, ao_atualizar=None, timeout_leitura: float = 1.0):
+        super().__init__(name="assinante-cotacoes", daemon=True)
+        self.simbolos = list(dict.fromkeys(simbolos))
+        self.store = store or LastPriceStore()
+        self.url = url
+        self.token = token
+        self.conectar = conectar
+        self.ao_atualizar = ao_atualizar
+        self.timeout_leitura = timeout_leitura
+        self.conectado = threading.Event()
+        self.reconexoes = 0
+        self.descartadas = 0  # mensagens malformadas ou com erro no callback (não derrubam a conexão)
+        self._parar = threading.Event()
+        self._retry = PoliticaRetry(base=1.0, teto=60.0)
+        self._ws = None
+        self._sessao_q = None
+        self._troca = None
+        self._lock = threading.Lock()
+
+    def trocar_simbolos(self, simbolos):
+        """Passa a assinar 'simbolos' (aplicado pela thread do assinante, sem reconectar)."""
+        novos = list(dict.fromkeys(simbolos))
+        with self._lock:
+            if novos != (self.simbolos if self._troca is None else self._troca):
+                self._troca = novos
+
+    def _aplicar_troca(self, ws):
+        with self._lock:
+            novos, self._troca = self._troca, None
+            if novos is None:
+                return
+            antigos, self.simbolos = self.simbolos, novos
+        removidos = [s for s in antigos if s not in novos]
+        incluidos = [s for s in novos if s not in antigos]
+        if removidos:
+            ws.send(mensagem("quote_remove_symbols", [self._sessao_q, *removidos]))
+        if incluidos:
+            ws.send(mensagem("quote_add_symbols", [self._sessao_q, *incluidos]))
+
+    def parar(self):
+        self._parar.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def _token(self):
+        if self.token is not None:
+            return self.token() if callable(self.token) else self.token
+        import cotacoes_tradingview_cepea as cot
+        return cot.sessao.token
+
+    def _assinar(self, ws):
+        with self._lock:
+            if self._troca is not None:
+                self.simbolos, self._troca = self._troca, None
+        self._sessao_q = sessao_q = "qs_" + "".join(random.choices(string.ascii_lowercase, k=12))
+        ws.send(mensagem("set_auth_token", [self._token()]))
+        ws.send(mensagem("quote_create_session", [sessao_q]))
+        ws.send(mensagem("quote_set_fields", [sessao_q, "lp", "lp_time"]))
+        if self.simbolos:
+            ws.send(mensagem("quote_add_symbols", [sessao_q, *self.simbolos]))
+
+    def _tratar(self, ws, raw: str):
+        for payload in desempacotar(raw):
+            if payload.startswith("~h~"):
+                ws.send(empacotar(payload))  # heartbeat: devolve igual
+                continue
+            try:
+                negocio = self._negocio(payload)
+            except (ValueError, TypeError, KeyError, IndexError, AttributeError):
+                self.descartadas += 1
+                log.warning("Mensagem de cotação malformada descartada: %.200s", payload)
+                continue
+            if negocio is None:
+                continue
+            exchange, symbol, preco, horario = negocio
+            self.store.atualizar(exchange, symbol, preco, horario)
+            if self.ao_atualizar is not None:
+                # Erro no callback é do chamador: registra e segue, sem reconectar
+                try:
+                    self.ao_atualizar(exchange, symbol, preco)
+                except Exception:
+                    self.descartadas += 1
+                    log.exception("Erro no ao_atualizar para %s:%s", exchange, symbol)
+
+    @staticmethod
+    def _negocio(payload: str):
+        """(bolsa, símbolo, preço, horário) de uma mensagem qsd com negócio; None para as demais."""
+        try:
+            msg = json.loads(payload)
+        except ValueError:
+            return None
+        if not isinstance(msg, dict) or msg.get("m") != "qsd":
+            return None
+        dados = msg["p"][1]
+        valores = dados.get("v", {})
+        if dados.get("s") != "ok" or "lp" not in valores:
+            return None
+        exchange, _, symbol = dados["n"].partition(":")
+        horario = pd.Timestamp(valores["lp_time"], unit="s") if "lp_time" in valores else None
+        return exchange, symbol, float(valores["lp"]), horario
+
+    def run(self):
+        timeouts = _timeouts()
+        tentativa = 0
+        while not self._parar.is_set():
+            try:
+                self._ws = ws = self.conectar(self.url, self.timeout_leitura)
+                self._assinar(ws)
+                self.conectado.set()
+                tentativa = 0
+                while not self._parar.is_set():
+                    self._aplicar_troca(ws)
+                    try:
+                        raw = ws.recv()
+                    except timeouts:
+                        continue
+                    if not raw:
+                        raise ConnectionError("Conexão de cotações encerrada")
+                    self._tratar(ws, raw)
+            except Exception:
+                if self._parar.is_set():
+                    break
+                self.conectado.clear()
+                self.reconexoes += 1
+                self._parar.wait(self._retry.espera(tentativa))
+                tentativa += 1
+            finally:
+                self.conectado.clear()
+                try:
+                    if self._ws is not None:
+                        self._ws.close()
+                except Exception:
+                    pass
@@ -4,6 +4,8 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
+import altair as alt
 import json
 from pathlib import Path
 import sys
@@ -13,26 +15,48 @@ import ppe_engine
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR / "codigos"))
 
-# Conexão com o Google Sheets via Streamlit GSheets
-from streamlit_gsheets import GSheetsConnection
-conn = st.connection("gsheets", type=GSheetsConnection)
+import os
+from cache_planilha import CachePlanilha, PlanilhaLocal, versao_drive, id_planilha
 
-# 1. Carregar dados brutos da planilha
-df_soja_bruto = conn.read(worksheet="soja")
-df_milho_bruto = conn.read(worksheet="milho")
-df_ndf_bruto = conn.read(worksheet="ndf")
+# Pasta com <aba>.csv no lugar do Google Sheets (desenvolvimento/testes sem a API)
+PLANILHA_LOCAL = os.environ.get("PPE_PLANILHA_LOCAL")
 
-# 2. Limpar/processar os dados brutos usando funções do módulo
+@st.cache_resource
+def planilha_compartilhada():
+    """Leituras da planilha com cache por processo (compartilhado por todas as sessões): TTL + versão no Drive"""
+    if PLANILHA_LOCAL:
+        local = PlanilhaLocal(PLANILHA_LOCAL)
+        return CachePlanilha(local.ler, local.versao)
+
+    # Conexão com o Google Sheets via Streamlit GSheets
+    from streamlit_gsheets import GSheetsConnection
+    conn = st.connection("gsheets", type=GSheetsConnection)
+
+    def versao():
+        # Metadados do arquivo no Drive pela sessão autorizada do gspread (v6: http_client.session; v5: session).
+        # O caminho até ela é interno ao streamlit_gsheets: se mudar, a falha aparece no diagnóstico
+        try:
+            cliente = conn.client._client
+            sessao = getattr(cliente, "http_client", cliente).session
+        except AttributeError as e:
+            raise RuntimeError(f"sessão do Drive não encontrada no cliente do GSheets ({e})") from e
+        return versao_drive(sessao, id_planilha(st.secrets["connections"]["gsheets"]["spreadsheet"]))
+
+    return CachePlanilha(lambda aba: conn.read(worksheet=aba, ttl=0), versao)
+
+planilha = planilha_compartilhada()
+
+# 1. Carregar e processar os dados da planilha (curvas só são refeitas quando a aba muda)
 from premios_export_soja_milho import process_soja, process_milho, process_ndf
-df_soja_limpo, _ = process_soja(df_soja_bruto)
-df_milho_limpo, _ = process_milho(df_milho_bruto)
-df_ndf_limpo, _ = process_ndf(df_ndf_bruto)
+df_soja_limpo, _ = planilha.ler("soja", process_soja)
+df_milho_limpo, _ = planilha.ler("milho", process_milho)
+df_ndf_limpo, _ = planilha.ler("ndf", process_ndf)
 
-# 3. Definir valores default ou pegar do sidebar/interação
+# 2. Definir valores default ou pegar do sidebar/interação
 fobbings = 40.0      # ou qualquer valor padrão, ou valor do usuário!
 frete_dom = 342.0    # idem
 
-# 4. Agora pode calcular!
+# 3. Agora pode calcular!
 df_soja_final, df_milho_final = ppe_engine.calcular_ppe(
     df_soja_limpo,
     df_milho_limpo,
@@ -50,6 +74,16 @@ LOGO_MAIN = ASSETS_DIR / "Logo_Pine.webp"
 
 import ppe_engine
 import premios_export_soja_milho as premios
+import cotacoes_tradingview_cepea as cot
+import resiliencia
+import streaming
+import cenarios
+import pracas
+import paridade
+import sensibilidade
+from provedores import provedor_padrao
+from datetime import datetime
+from zoneinfo import ZoneInfo
 
 # Configuração da página
 st.set_page_config(
@@ -75,45 +109,42 @@ def load_clientes():
                 return json.load(f)
         return {}
 
-def criar_tabela_sensibilidade(df_ppe, ndf_atual, premio, frete_dom, fobbings, produto):
+@st.cache_resource
+def assinante_cotacoes():
+    """Uma única conexão de streaming por processo (compartilhada por todas as sessões)."""
+    assinante = streaming.AssinanteCotacoes([])
+    assinante.start()
+    return assinante
+
+def assinar_contratos(assinante, ano: int, mes: int, n_contratos: int):
     """
-    Cria tabela de sensibilidade com Chicago nas linhas e variações do dólar nas colunas
+    Inclui na assinatura os contratos desta sessão e descarta os vencidos (virada do mês),
+    mantendo os que outras sessões ainda usam; tudo na mesma conexão.
     """
-    # Define fator de conversão por produto
-    fator = 0.367454 if produto.lower() == "soja" else 0.393687
-    
-    # Cria 9 colunas de dólar (NDF ± 0,20 com steps de 0,05)
-    dolares = [ndf_atual - 0.20 + (i * 0.05) for i in range(9)]
-    
-    # Extrai preços de Chicago e vencimentos
-    chicago_precos = df_ppe["Preço"].tolist()
-    vencimentos = df_ppe["Vencimento"].tolist()
-    
-    # Calcula matriz de resultados
-    resultados = []
-    for chicago in chicago_precos:
-        linha = []
-        for dolar in dolares:
-            valor = (((chicago + premio) * fator) * dolar - (frete_dom + fobbings)) * 0.06
-            linha.append(valor)
-        resultados.append(linha)
-    
-    # Cria DataFrame
-    df_sens = pd.DataFrame(
-        resultados,
-        columns=[f"R$ {d:.2f}".replace(".", ",") for d in dolares],
-        index=vencimentos
-    )
-    df_sens.index.name = "Vencimento"
-
-    # Adiciona coluna com preços de Chicago
-    df_sens.insert(0, "Chicago (c$/bu)", chicago_precos)
-
-    # Adiciona coluna aquivalente preços de Chicago + prêmio
-    eq_bushel = [chicago + premio for chicago in chicago_precos]
-    df_sens.insert(1, "Eq. Bushel (c$/bu)", eq_bushel)
-
-    return df_sens
+    novos = [f"CBOT:{tk}" for tk in ppe_engine.contratos_cbot(ano, mes, n_contratos)]
+    vigentes = []
+    for simbolo in assinante.simbolos:
+        parsed = ppe_engine.parse_explicit_ticker(simbolo.partition(":")[2])
+        if parsed is not None and (parsed[1], parsed[2]) >= (ano, mes):
+            vigentes.append(simbolo)
+    assinante.trocar_simbolos(vigentes + novos)
+
+def heatmap_sensibilidade(df_sens):
+    """Mapa de calor (altair) de uma superfície do PPE: linhas x colunas (padrão: Chicago x dólar), cor = R$/sc"""
+    valores = df_sens.drop(columns=["Chicago (c$/bu)", "Eq. Bushel (c$/bu)"], errors="ignore")
+    nome_x, nome_y = valores.columns.name or "Dólar", valores.index.name
+    linhas, colunas = valores.index.astype(str), valores.columns.astype(str)
+    df_long = pd.DataFrame({
+        nome_y: np.repeat(linhas, len(colunas)),
+        nome_x: np.tile(colunas, len(linhas)),
+        "R$/sc": valores.to_numpy(dtype=float).reshape(-1),
+    })
+    return alt.Chart(df_long).mark_rect().encode(
+        x=alt.X(f"{nome_x}:O", sort=list(colunas), axis=alt.Axis(labelOverlap=True)),
+        y=alt.Y(f"{nome_y}:O", sort=list(linhas), axis=alt.Axis(labelOverlap=True)),
+        color=alt.Color("R$/sc:Q", scale=alt.Scale(scheme="redyellowgreen")),
+        tooltip=[nome_y, nome_x, alt.Tooltip("R$/sc:Q", format=".2f")],
+    ).properties(height=min(800, max(300, 14 * len(linhas))))
 
 def style_tabela_sensibilidade(df):
     """Aplica formatação e cores à tabela de sensibilidade"""
@@ -136,7 +167,7 @@ def style_tabela_sensibilidade(df):
     styled = df.style.format(format_valor)
     
     # Aplica cores
-    styled = styled.applymap(colorir_celula)
+    styled = styled.map(colorir_celula)
     
     # Centraliza texto
     styled = styled.set_properties(**{
@@ -300,19 +331,41 @@ premio = st.sidebar.number_input(
     format="%.2f"
 )
 
+horizonte = st.sidebar.number_input(
+    "Horizonte (meses):",
+    min_value=1,
+    max_value=60,
+    value=ppe_engine.HORIZONTE_PADRAO,
+    step=1
+)
+
+tempo_real = st.sidebar.toggle("📡 Cotações em tempo real", value=False)
+provedor = None
+if tempo_real:
+    hoje = datetime.now(ZoneInfo("America/Sao_Paulo"))
+    assinante = assinante_cotacoes()
+    assinar_contratos(assinante, hoje.year, hoje.month, ppe_engine.contratos_para_horizonte(horizonte, ano=hoje.year, mes=hoje.month))
+    provedor = streaming.StreamProvider(assinante.store, fallback=provedor_padrao)
+    st.sidebar.caption("🟢 Conectado" if assinante.conectado.is_set() else "🟡 Conectando...")
+
 st.sidebar.markdown("---")
 
 # Botão para recalcular
 if st.sidebar.button("🔄 Recalcular PPE", type="primary"):
     with st.spinner("Calculando PPE..."):
         try:
-            df_soja, df_milho = ppe_engine.calcular_ppe(
-                df_soja_limpo,
-                df_milho_limpo,
+            # Tabela longa sem arredondamento: base das contas (preço-alvo, paridade); as tabelas
+            # por produto saem dela e são só para exibir/exportar
+            df_longo = ppe_engine.calcular_ppe_longo(
+                {"soja": df_soja_limpo, "milho": df_milho_limpo},
                 df_ndf_limpo,
                 fobbings=fobbings,
-                frete_dom=frete_dom
+                frete_dom=frete_dom,
+                provedor=provedor,
+                horizonte=horizonte
             )
+            tabelas = ppe_engine.tabelas_por_produto(df_longo)
+            df_soja, df_milho = tabelas["soja"], tabelas["milho"]
 
             st.session_state.ndf_atual = float(df_ndf_limpo.iloc[0]["NDF"])
             
@@ -323,9 +376,11 @@ if st.sidebar.button("🔄 Recalcular PPE", type="primary"):
             
             df_soja.to_excel(output_dir / "PPE_SOJA.xlsx", index=False)
             df_milho.to_excel(output_dir / "PPE_MILHO.xlsx", index=False)
+            df_longo.to_parquet(output_dir / "PPE_LONGO.parquet", index=False)
             
             st.session_state.df_soja = df_soja
             st.session_state.df_milho = df_milho
+            st.session_state.df_longo = df_longo
             st.session_state.recalculado = True
             
             st.success("✅ PPE recalculado com sucesso!")
@@ -333,11 +388,47 @@ if st.sidebar.button("🔄 Recalcular PPE", type="primary"):
         except Exception as e:
             st.error(f"❌ Erro ao calcular: {str(e)}")
 
+# Diagnóstico das cotações (cache compartilhado entre sessões)
+with st.sidebar.expander("🩺 Diagnóstico de cotações"):
+    if cot.cache is not None:
+        stats = cot.cache.estatisticas()
+        st.caption(
+            f"Cache: {stats['hits_memoria']} hits memória | {stats['hits_disco']} hits disco | "
+            f"{stats['misses']} misses ({stats['taxa_acerto']:.0%} acerto)"
+        )
+    r = ppe_engine.cache_ppe.estatisticas()
+    st.caption(
+        f"Resultados PPE: {r['hits_memoria']} hits memória | {r['hits_disco']} hits disco | "
+        f"{r['misses']} cálculos ({r['taxa_acerto']:.0%} acerto)"
+    )
+    p = planilha.estatisticas()
+    st.caption(
+        f"Planilha: {p['leituras']} leituras de abas | {p['consultas_versao']} consultas de versão | "
+        f"{p['reprocessamentos']} curvas processadas"
+    )
+    if not p["deteccao_mudanca"]:
+        st.warning(
+            "Detecção de mudança da planilha desligada: abas relidas a cada "
+            f"{planilha.ttl:.0f} s. {p['erro_versao'] or 'Sem consulta de versão do Drive.'}"
+        )
+    if st.button("🔃 Conferir planilha agora"):
+        planilha.invalidar()
+        st.rerun()
+    for voo in (cot.voo_cotacoes, ppe_engine.voo_ppe):
+        v = voo.estatisticas()
+        st.caption(f"{v['nome']}: {v['execucoes']} execuções | {v['colapsadas']} chamadas coalescidas")
+    st.dataframe(pd.DataFrame(ppe_engine.grafo_ppe.estatisticas()), hide_index=True, use_container_width=True)
+    fila = cot.limitador_tv.estatisticas()
+    if fila:
+        st.dataframe(pd.DataFrame(fila), hide_index=True, use_container_width=True)
+    breakers = resiliencia.estado_breakers()
+    if breakers:
+        st.dataframe(pd.DataFrame(breakers), hide_index=True, use_container_width=True)
+        if any(b["Estado"] != "fechado" for b in breakers):
+            st.warning("TradingView instável: cotações falhando rápido até o circuito fechar.")
 
 # Carrega NDF atual (mais recente)
 if 'ndf_atual' not in st.session_state:
-    df_ndf = conn.read(worksheet="ndf")
-    df_ndf_limpo, _ = process_ndf(df_ndf)
     st.session_state.ndf_atual = float(df_ndf_limpo.iloc[0]["NDF"])  # primeiro valor (mais recente)
 
 
@@ -358,6 +449,8 @@ if 'df_soja' not in st.session_state or 'df_milho' not in st.session_state:
             st.session_state.df_soja = pd.read_excel(output_dir / "PPE_SOJA.xlsx")
         if (output_dir / "PPE_MILHO.xlsx").exists():
             st.session_state.df_milho = pd.read_excel(output_dir / "PPE_MILHO.xlsx")
+        if (output_dir / "PPE_LONGO.parquet").exists():
+            st.session_state.df_longo = pd.read_parquet(output_dir / "PPE_LONGO.parquet")
     except Exception as e:
         st.info("ℹ️ Nenhum dado disponível. Clique em 'Recalcular PPE' para gerar.")
 
@@ -367,46 +460,126 @@ st.markdown("---")
 # ========== TABELAS DE SENSIBILIDADE ==========
 st.header("📈 Análise de Sensibilidade - Dólar x Chicago")
 
+# Tamanho da superfície: colunas de dólar em torno do NDF atual e linhas de Chicago
+col_passo, col_ndolar, col_linhas = st.columns(3)
+with col_passo:
+    passo_dolar = st.number_input("Passo do dólar (R$):", min_value=0.001, value=0.05, step=0.01, format="%.3f")
+with col_ndolar:
+    n_dolar = st.number_input("Colunas de dólar:", min_value=1, max_value=400, value=9, step=1)
+with col_linhas:
+    modo_chicago = st.radio("Linhas de Chicago:", ["Vencimentos", "Faixa de preços"], horizontal=True)
+
+faixa_chicago = None
+if modo_chicago == "Faixa de preços":
+    col_cmin, col_cmax, col_cpasso = st.columns(3)
+    with col_cmin:
+        chicago_min = st.number_input("Chicago mínimo (c$/bu):", value=300.0, step=10.0)
+    with col_cmax:
+        chicago_max = st.number_input("Chicago máximo (c$/bu):", value=1300.0, step=10.0)
+    with col_cpasso:
+        chicago_passo = st.number_input("Passo de Chicago (c$/bu):", min_value=0.25, value=5.0, step=0.25)
+    faixa_chicago = np.arange(chicago_min, chicago_max + chicago_passo / 2, chicago_passo)[:400]
+
+# Tabela formatada só para superfícies pequenas; acima disso, o mapa de calor
+MAX_CELULAS_TABELA = 2000
+alt.data_transformers.disable_max_rows()
+
+def exibir_sensibilidade(df_ppe, produto):
+    df_sens = sensibilidade.criar_tabela_sensibilidade(
+        df_ppe,
+        st.session_state.ndf_atual,
+        premio,
+        frete_dom,
+        fobbings,
+        produto,
+        passo_dolar=passo_dolar,
+        n_dolar=int(n_dolar),
+        chicago=faixa_chicago,
+    )
+    st.altair_chart(heatmap_sensibilidade(df_sens), use_container_width=True)
+    with st.expander("Tabela"):
+        if df_sens.size <= MAX_CELULAS_TABELA:
+            st.dataframe(style_tabela_sensibilidade(df_sens), use_container_width=True)
+        else:
+            st.dataframe(df_sens.round(2), use_container_width=True)
+
 if produto_selecionado in ["Soja", "Soja e Milho"]:
     if 'df_soja' in st.session_state:
         st.subheader("🌱 Sensibilidade - SOJA")
-        
-        df_sens_soja = criar_tabela_sensibilidade(
-            st.session_state.df_soja,
-            st.session_state.ndf_atual,
-            premio,
-            frete_dom,
-            fobbings,
-            "soja"
-        )
-        
-        st.dataframe(
-            style_tabela_sensibilidade(df_sens_soja),
-            use_container_width=True
-        )
-        
+        exibir_sensibilidade(st.session_state.df_soja, "soja")
         st.markdown("---")
 
 if produto_selecionado in ["Milho", "Soja e Milho"]:
     if 'df_milho' in st.session_state:
         st.subheader("🌽 Sensibilidade - MILHO")
-        
-        df_sens_milho = criar_tabela_sensibilidade(
-            st.session_state.df_milho,
-            st.session_state.ndf_atual,
-            premio,
-            frete_dom,
-            fobbings,
-            "milho"
-        )
-        
-        st.dataframe(
-            style_tabela_sensibilidade(df_sens_milho),
-            use_container_width=True
-        )
-        
+        exibir_sensibilidade(st.session_state.df_milho, "milho")
         st.markdown("---")
 
+# ========== CUBO DE SENSIBILIDADE ==========
+tabelas_cubo = {p: st.session_state[f"df_{p}"] for p in ("soja", "milho") if f"df_{p}" in st.session_state}
+if tabelas_cubo:
+    st.header("🧊 Cubo de Sensibilidade")
+    st.caption("O cubo é calculado uma vez por grade; trocar os eixos exibidos só recorta o cubo.")
+
+    # Grade de cada eixo: (mínimo, máximo, passo) padrão
+    grades_padrao = {
+        "CBOT": (-100.0, 100.0, 10.0),
+        "Premio": (-50.0, 50.0, 10.0),
+        "NDF": (-0.50, 0.50, 0.05),
+        "frete_dom": (frete_dom - 100.0, frete_dom + 100.0, 20.0),
+        "fobbings": (fobbings - 20.0, fobbings + 20.0, 5.0),
+    }
+    eixos_cubo = st.multiselect(
+        "Eixos do cubo:", options=list(sensibilidade.EIXOS), default=["CBOT", "NDF"],
+        format_func=lambda e: sensibilidade.EIXOS[e], key="eixos_cubo"
+    )
+    grades = {}
+    with st.expander("Grade dos eixos"):
+        for eixo in eixos_cubo:
+            ini, fim, passo = grades_padrao[eixo]
+            col_ini, col_fim, col_passo = st.columns(3)
+            with col_ini:
+                ini = st.number_input(f"{sensibilidade.EIXOS[eixo]} - mínimo:", value=ini, key=f"cubo_ini_{eixo}")
+            with col_fim:
+                fim = st.number_input(f"{sensibilidade.EIXOS[eixo]} - máximo:", value=fim, key=f"cubo_fim_{eixo}")
+            with col_passo:
+                passo = st.number_input(f"{sensibilidade.EIXOS[eixo]} - passo:", min_value=0.001, value=passo,
+                                        key=f"cubo_passo_{eixo}")
+            grades[eixo] = np.round(np.arange(ini, fim + passo / 2, passo), 6)
+
+    try:
+        cubo = sensibilidade.cubo_sensibilidade(
+            cenarios.mercado_de_tabelas(tabelas_cubo), grades, fobbings=fobbings, frete_dom=frete_dom
+        )
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        cubo = None
+
+    if cubo is not None:
+        col_lin, col_col = st.columns(2)
+        with col_lin:
+            dim_linhas = st.selectbox("Linhas:", options=cubo.dims, index=0, key="cubo_linhas")
+        with col_col:
+            opcoes_colunas = ["— (perfil 1-D)"] + [d for d in cubo.dims if d != dim_linhas]
+            dim_colunas = st.selectbox("Colunas:", options=opcoes_colunas, index=1, key="cubo_colunas")
+        dim_colunas = None if dim_colunas == opcoes_colunas[0] else dim_colunas
+
+        # Demais dimensões fixas num ponto da grade
+        fixos = {}
+        outras = [d for d in cubo.dims if d not in (dim_linhas, dim_colunas)]
+        for col, dim in zip(st.columns(max(1, len(outras))), outras):
+            with col:
+                rotulos = list(cubo.eixos[dim])
+                padrao = rotulos[0] if dim in ("Vencimento", "Produto") else rotulos[len(rotulos) // 2]
+                fixos[dim] = st.select_slider(f"{dim}:", options=rotulos, value=padrao, key=f"cubo_fixo_{dim}")
+
+        recorte = cubo.fatia(dim_linhas, dim_colunas, **fixos)
+        if dim_colunas is None:
+            st.line_chart(recorte)
+        else:
+            st.altair_chart(heatmap_sensibilidade(recorte), use_container_width=True)
+    st.markdown("---")
+
 # ========== TABELAS PPE ORIGINAIS ==========
 st.header("📊 Tabelas Detalhadas PPE")
 
@@ -480,6 +653,153 @@ if produto_selecionado in ["Milho", "Soja e Milho"]:
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
 
+# ========== EXPOSIÇÃO (DELTAS) ==========
+tabelas_delta = {
+    p: st.session_state[f"df_{p}"] for p in ("soja", "milho")
+    if f"df_{p}" in st.session_state and set(ppe_engine.COLUNAS_DELTAS) <= set(st.session_state[f"df_{p}"].columns)
+}
+if tabelas_delta:
+    st.markdown("---")
+    st.header("⚖️ Exposição da Carteira")
+    st.caption("Variação em R$ da carteira por unidade de cada entrada (deltas do motor x sacas por vencimento).")
+
+    # Sacas por vencimento e produto (editável)
+    vencimentos = list(dict.fromkeys(v for df in tabelas_delta.values() for v in df["Vencimento"]))
+    df_sacas = st.data_editor(
+        pd.DataFrame({"Vencimento": vencimentos, **{p: 1000.0 for p in tabelas_delta}}),
+        hide_index=True,
+        use_container_width=True,
+        disabled=["Vencimento"],
+        key="sacas_exposicao"
+    )
+    sacas = {
+        p: df["Vencimento"].map(df_sacas.set_index("Vencimento")[p]).fillna(0.0).to_numpy(dtype=float)
+        for p, df in tabelas_delta.items()
+    }
+    st.dataframe(ppe_engine.exposicao(tabelas_delta, sacas).round(2), hide_index=True, use_container_width=True)
+
+# ========== PPE POR PRAÇA ==========
+def carregar_pracas():
+    """Aba "pracas" da planilha; sem ela, o CSV local configs/pracas.csv (se existir)."""
+    try:
+        return planilha.ler(premios.TAB_PRACAS, pracas.ler_pracas, fobbings)
+    except Exception:
+        if pracas.PRACAS_CSV.exists():
+            return pracas.ler_pracas(pracas.PRACAS_CSV, fobbings_padrao=fobbings)
+    return None
+
+tabelas_ppe = {p: st.session_state[f"df_{p}"] for p in ("soja", "milho") if f"df_{p}" in st.session_state}
+
+def mercado_atual():
+    """Retrato do mercado para praças e paridade: da tabela longa sem arredondamento, se houver."""
+    df_longo = st.session_state.get("df_longo")
+    if df_longo is not None and set(tabelas_ppe) <= set(df_longo["Produto"]):
+        return cenarios.mercado_de_longo(df_longo[df_longo["Produto"].isin(list(tabelas_ppe))])
+    return cenarios.mercado_de_tabelas(tabelas_ppe)  # saídas antigas: valores com 2 casas
+
+df_pracas = carregar_pracas() if tabelas_ppe else None
+if df_pracas is not None and not df_pracas.empty:
+    st.markdown("---")
+    st.header("🗺️ PPE por Praça")
+
+    matriz = pracas.matriz_pracas(mercado_atual(), df_pracas)
+    col_prod, col_saida = st.columns(2)
+    with col_prod:
+        produto_praca = st.selectbox("Produto:", options=matriz["produtos"], key="produto_praca")
+    with col_saida:
+        saida_praca = st.selectbox("Valor:", options=cenarios.SAIDAS, index=2, key="saida_praca")
+    pracas_sel = st.multiselect("Praças:", options=matriz["pracas"], default=matriz["pracas"], key="pracas_sel")
+
+    if pracas_sel:
+        recorte = pracas.fatia(matriz, pracas=pracas_sel)
+        st.dataframe(
+            pracas.pivot_pracas(recorte, produto_praca, saida_praca).style.format("{:.2f}"),
+            use_container_width=True,
+        )
+
+    buffer_pracas = BytesIO()
+    with pd.ExcelWriter(buffer_pracas, engine='openpyxl') as writer:
+        pracas.tabela_pracas(matriz).to_excel(writer, index=False, sheet_name='PPE_Pracas')
+    buffer_pracas.seek(0)
+
+    st.download_button(
+        label="📥 Download Excel - Praças",
+        data=buffer_pracas,
+        file_name=f"PPE_PRACAS_{st.session_state.cliente_nome}.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+# ========== PREÇO-ALVO (BREAKEVEN) ==========
+if tabelas_ppe:
+    st.markdown("---")
+    st.header("🎯 Preço-Alvo - Quanto precisa para R$ X/sc")
+
+    unidades = {"Preço": "c$/bu", "Premio": "c$/bu", "NDF": "R$/US$", "frete_dom": "R$/ton"}
+    col_prod, col_var, col_praca = st.columns(3)
+    with col_prod:
+        produto_alvo = st.selectbox("Produto:", options=list(tabelas_ppe), key="produto_alvo")
+    with col_var:
+        variavel_alvo = st.selectbox(
+            "Resolver para:", options=ppe_engine.VARIAVEIS_INVERSAO,
+            format_func=lambda v: f"{v} ({unidades[v]})", key="variavel_alvo"
+        )
+    with col_praca:
+        opcoes_praca = ["Parâmetros da barra lateral"] + ([] if df_pracas is None else df_pracas["Praça"].tolist())
+        praca_alvo = st.selectbox("Praça:", options=opcoes_praca, key="praca_alvo")
+
+    custos_alvo = {"fobbings": fobbings, "frete_dom": frete_dom}
+    if df_pracas is not None and praca_alvo in df_pracas["Praça"].tolist():
+        linha = df_pracas[df_pracas["Praça"] == praca_alvo].iloc[0]
+        custos_alvo = {"fobbings": float(linha["Fobbings"]), "frete_dom": float(linha["Frete"])}
+
+    col_ini, col_fim, col_passo = st.columns(3)
+    with col_ini:
+        alvo_ini = st.number_input("Alvo inicial (R$/sc):", value=100.0, step=1.0, key="alvo_ini")
+    with col_fim:
+        alvo_fim = st.number_input("Alvo final (R$/sc):", value=140.0, step=1.0, key="alvo_fim")
+    with col_passo:
+        alvo_passo = st.number_input("Passo (R$/sc):", min_value=0.01, value=5.0, step=1.0, key="alvo_passo")
+
+    alvos = np.arange(alvo_ini, alvo_fim + alvo_passo / 2, alvo_passo)[:200]
+    # Inverte a partir dos valores sem arredondamento (a tabela exibida tem NDF e preços com 2 casas);
+    # saídas antigas, sem a tabela longa, caem na tabela exibida
+    df_longo = st.session_state.get("df_longo")
+    if df_longo is not None and produto_alvo in set(df_longo["Produto"]):
+        df_base = df_longo[df_longo["Produto"] == produto_alvo]
+    else:
+        df_base = tabelas_ppe[produto_alvo]
+    resolvido = ppe_engine.resolver_ppe(df_base, alvos, variavel_alvo, **custos_alvo)
+    st.dataframe(
+        pd.DataFrame(resolvido.T, index=pd.Index(df_base["Vencimento"], name="Vencimento"),
+                     columns=[f"{a:.2f} R$/sc" for a in alvos]).style.format("{:.2f}"),
+        use_container_width=True,
+    )
+    st.caption(f"{variavel_alvo} ({unidades[variavel_alvo]}) necessário para cada alvo, mantidas as demais entradas.")
+
+# ========== PARIDADE CFR ÁSIA ==========
+def carregar_rotas():
+    """Aba "rotas" (frete marítimo e prêmio FOB por rota); sem ela, só os fretes padrão."""
+    try:
+        df_rotas, _ = planilha.ler(premios.TAB_ROTAS, premios.process_rotas)
+        return df_rotas
+    except Exception:
+        return None
+
+if tabelas_ppe:
+    st.markdown("---")
+    st.header("🚢 Paridade CFR Ásia - Brasil x EUA x Argentina")
+
+    par = paridade.paridade_rotas(mercado_atual(), carregar_rotas())
+    produto_rota = st.selectbox("Produto:", options=par["produtos"], key="produto_rota")
+    df_comp = paridade.competitividade(par, produto_rota)
+    st.dataframe(df_comp.style.format(precision=2), use_container_width=True, hide_index=True)
+    sem_premio = sorted({
+        r for r, f in zip(par["rotas"], par["Fonte do prêmio"][:, par["produtos"].index(produto_rota), :].T)
+        if (f == paridade.FONTE_AUSENTE).all()
+    })
+    if sem_premio:
+        st.info(f"ℹ️ Sem prêmios na aba 'rotas' para {', '.join(sem_premio)}: CFR indisponível.")
+
 # ========== TABELAS AUXILIARES ==========
 st.markdown("---")
 st.header("📋 Dados de Referência")
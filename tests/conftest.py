@@ -0,0 +1,26 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "codigos"))
+
+
+@pytest.fixture(scope="session")
+def ppe_longo(tmp_path_factory):
+    """Tabela longa do motor sobre os dados sintéticos dos benchmarks (ReplayProvider, sem rede)."""
+    import ppe_engine
+    from benchmarks import dados_sinteticos
+    from provedores import ReplayProvider
+
+    cache = ppe_engine.cache_ppe
+    original = cache.diretorio
+    cache.diretorio = tmp_path_factory.mktemp("resultados") / cache.nome  # não suja cache/resultados
+    try:
+        df_soja, df_milho, df_ndf, df_barras = dados_sinteticos()
+        yield ppe_engine.calcular_ppe_longo({"soja": df_soja, "milho": df_milho}, df_ndf, fobbings=40.0,
+                                            frete_dom=342.0, provedor=ReplayProvider(df_barras),
+                                            data_ref="2025-10-15")
+    finally:
+        cache.diretorio = original
+        ppe_engine.grafo_ppe.limpar()
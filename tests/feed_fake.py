@@ -0,0 +1,175 @@
+"""
+Servidor fake de cotações (websocket em 127.0.0.1) no protocolo do TradingView
+Para testar o AssinanteCotacoes sem rede: aceita conexões websocket reais, registra as mensagens
+recebidas (set_auth_token, quote_add_symbols, ...) e publica negócios e heartbeats sob comando.
+Só biblioteca padrão; uso: FeedFake().iniciar() e AssinanteCotacoes(..., url=feed.url, token="x").
+"""
+
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+
+from streaming import empacotar, mensagem, desempacotar
+
+_GUID_WS = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _ler_exato(conn, n: int) -> bytes:
+    dados = b""
+    while len(dados) < n:
+        parte = conn.recv(n - len(dados))
+        if not parte:
+            raise ConnectionError("Cliente desconectou")
+        dados += parte
+    return dados
+
+
+def _ler_frame(conn):
+    """(opcode, payload) de um frame do cliente (sempre mascarado, sem fragmentação)."""
+    b0, b1 = _ler_exato(conn, 2)
+    tamanho = b1 & 0x7F
+    if tamanho == 126:
+        tamanho = struct.unpack(">H", _ler_exato(conn, 2))[0]
+    elif tamanho == 127:
+        tamanho = struct.unpack(">Q", _ler_exato(conn, 8))[0]
+    mascara = _ler_exato(conn, 4) if b1 & 0x80 else b"\0\0\0\0"
+    dados = _ler_exato(conn, tamanho)
+    return b0 & 0x0F, bytes(c ^ mascara[i % 4] for i, c in enumerate(dados))
+
+
+def _frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    n = len(payload)
+    if n < 126:
+        cab = struct.pack(">BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        cab = struct.pack(">BBH", 0x80 | opcode, 126, n)
+    else:
+        cab = struct.pack(">BBQ", 0x80 | opcode, 127, n)
+    return cab + payload
+
+
+class FeedFake:
+    def __init__(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen()
+        self.url = f"ws://127.0.0.1:{self._sock.getsockname()[1]}/socket.io/websocket"
+        self.recebidas = []  # payloads recebidos (já sem o framing ~m~)
+        self.conexoes = 0
+        self._clientes = []
+        self._lock = threading.RLock()  # esperar() reavalia condições que chamam mensagens()
+        self._mudou = threading.Condition(self._lock)
+        self._parar = threading.Event()
+
+    # ---------- Ciclo de vida ----------
+    def iniciar(self):
+        threading.Thread(target=self._aceitar, name="feed-fake", daemon=True).start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        self.derrubar()
+        self._sock.close()
+
+    def derrubar(self):
+        """Fecha as conexões abertas (o assinante deve reconectar)."""
+        with self._lock:
+            clientes, self._clientes = self._clientes, []
+        for conn in clientes:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+                conn.close()
+            except OSError:
+                pass
+
+    def _aceitar(self):
+        while not self._parar.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._atender, args=(conn,), daemon=True).start()
+
+    def _atender(self, conn):
+        try:
+            pedido = b""
+            while b"\r\n\r\n" not in pedido:
+                pedido += _ler_exato(conn, 1)
+            cabecalhos = dict(
+                linha.split(": ", 1) for linha in pedido.decode().split("\r\n")[1:] if ": " in linha
+            )
+            chave = next(v for k, v in cabecalhos.items() if k.lower() == "sec-websocket-key")
+            aceite = base64.b64encode(hashlib.sha1((chave + _GUID_WS).encode()).digest()).decode()
+            conn.sendall(
+                "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {aceite}\r\n\r\n".encode()
+            )
+            with self._lock:
+                self._clientes.append(conn)
+                self.conexoes += 1
+                self._mudou.notify_all()
+            while True:
+                opcode, dados = _ler_frame(conn)
+                if opcode == 0x8:  # close
+                    conn.sendall(_frame(b"", 0x8))
+                    break
+                if opcode == 0x9:  # ping
+                    conn.sendall(_frame(dados, 0xA))
+                    continue
+                with self._lock:
+                    self.recebidas.extend(desempacotar(dados.decode()))
+                    self._mudou.notify_all()
+        except (ConnectionError, OSError, StopIteration):
+            pass
+        finally:
+            with self._lock:
+                if conn in self._clientes:
+                    self._clientes.remove(conn)
+            conn.close()
+
+    # ---------- Envio ----------
+    def enviar(self, raw: str):
+        """Manda um frame bruto (já com framing ~m~) a todos os clientes."""
+        with self._lock:
+            clientes = list(self._clientes)
+        for conn in clientes:
+            conn.sendall(_frame(raw.encode()))
+
+    def publicar(self, simbolo: str, preco: float, horario: int | None = None, status: str = "ok"):
+        """Negócio (qsd) para "BOLSA:SIMBOLO"."""
+        valores = {"lp": preco} if horario is None else {"lp": preco, "lp_time": horario}
+        self.enviar(mensagem("qsd", ["qs_fake", {"n": simbolo, "s": status, "v": valores}]))
+
+    def heartbeat(self, n: int):
+        self.enviar(empacotar(f"~h~{n}"))
+
+    # ---------- Espera (para testes) ----------
+    def esperar(self, condicao, timeout: float = 5.0) -> bool:
+        """Espera até condicao(feed) ser verdadeira (reavaliada a cada mensagem/conexão e a cada 50 ms)."""
+        limite = time.monotonic() + timeout
+        with self._mudou:
+            while not condicao(self):
+                resta = limite - time.monotonic()
+                if resta <= 0:
+                    return False
+                self._mudou.wait(min(resta, 0.05))
+            return True
+
+    def mensagens(self, func: str) -> list:
+        """Parâmetros de cada mensagem 'func' recebida do cliente."""
+        with self._lock:
+            recebidas = list(self.recebidas)
+        out = []
+        for payload in recebidas:
+            try:
+                msg = json.loads(payload)
+            except ValueError:
+                continue
+            if msg.get("m") == func:
+                out.append(msg["p"])
+        return out
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+import arquivo_barras
+from arquivo_barras import atualizar, atualizar_varios, barras_necessarias, ler
+
+
+class _Bolsa:
+    """fetch_hist fake: as últimas n_bars barras de 15 min até 'agora' (a última ainda em formação)."""
+
+    def __init__(self, agora):
+        self.agora = pd.Timestamp(agora)
+        self.pedidos = []
+        self.falhas = set()
+
+    def fetch_hist(self, symbol, exchange="CBOT", intervalo="in_15_minute", n_bars=4, cliente=None):
+        self.pedidos.append((symbol, n_bars))
+        if symbol in self.falhas:
+            raise RuntimeError("falha na bolsa")
+        n = min(n_bars, arquivo_barras.MAX_BARRAS)
+        idx = pd.date_range(end=self.agora.floor("15min"), periods=n, freq="15min", name="datetime")
+        close = (idx - pd.Timestamp("2025-01-01")) / pd.Timedelta(minutes=15)  # preço = nº da barra
+        return pd.DataFrame({"symbol": f"{exchange}:{symbol}", "open": close, "high": close, "low": close,
+                             "close": close.astype(float), "volume": 1.0}, index=idx)
+
+
+@pytest.fixture
+def bolsa(monkeypatch):
+    b = _Bolsa("2025-10-15 12:00")
+    monkeypatch.setattr(arquivo_barras.cot, "fetch_hist", b.fetch_hist)
+    return b
+
+
+def test_barras_necessarias():
+    assert barras_necessarias(None) == arquivo_barras.MAX_BARRAS
+    assert barras_necessarias("2025-10-15 11:00", "2025-10-15 12:00") == 4 + 2
+    assert barras_necessarias("2025-10-15 12:00", "2025-10-15 12:00") == 2
+    assert barras_necessarias("2020-01-01", "2025-10-15") == arquivo_barras.MAX_BARRAS
+
+
+def test_so_acrescenta_barras_novas(bolsa, tmp_path):
+    assert atualizar("ZSX2025", raiz=tmp_path, agora=bolsa.agora) == arquivo_barras.MAX_BARRAS - 1
+    df = ler("ZSX2025", raiz=tmp_path)
+    assert df.index[-1] == bolsa.agora - pd.Timedelta(minutes=15)  # barra em formação não é gravada
+
+    bolsa.agora += pd.Timedelta(hours=1)
+    assert atualizar("ZSX2025", raiz=tmp_path, agora=bolsa.agora) == 4
+    assert bolsa.pedidos[-1] == ("ZSX2025", 5 + 2)
+    df = ler("ZSX2025", raiz=tmp_path)
+    assert df.index.is_unique and df.index.is_monotonic_increasing
+    assert (df.index.to_series().diff().dropna() == pd.Timedelta(minutes=15)).all()
+    assert len(ler("ZSX2025", raiz=tmp_path, inicio="2025-10-15 11:00", fim="2025-10-15 12:00")) == 5
+
+
+def test_simbolo_sem_arquivo(tmp_path):
+    df = ler("ZCZ2025", raiz=tmp_path)
+    assert df.empty and list(df.columns) == arquivo_barras.COLUNAS
+
+
+def test_arquivo_atrasado_alem_do_limite_registra_lacuna(bolsa, tmp_path, caplog):
+    atualizar("ZSX2025", raiz=tmp_path, agora=bolsa.agora)
+    ultima = ler("ZSX2025", raiz=tmp_path).index[-1]
+    bolsa.agora += pd.Timedelta(days=90)  # ~8.600 barras de 15 min: mais que MAX_BARRAS
+
+    lacunas = []
+    with caplog.at_level("WARNING", logger="arquivo_barras"):
+        n = atualizar("ZSX2025", raiz=tmp_path, agora=bolsa.agora, lacunas=lacunas)
+    assert n == arquivo_barras.MAX_BARRAS - 1
+    assert lacunas == [(ultima, bolsa.agora.floor("15min") - pd.Timedelta(minutes=15) * (arquivo_barras.MAX_BARRAS - 1))]
+    assert "Lacuna" in caplog.text
+
+    # Dentro do limite não há lacuna
+    bolsa.agora += pd.Timedelta(hours=2)
+    lacunas = []
+    atualizar("ZSX2025", raiz=tmp_path, agora=bolsa.agora, lacunas=lacunas)
+    assert lacunas == []
+
+
+def test_atualizar_varios_marca_lacuna_e_erro(bolsa, tmp_path):
+    atualizar("ZSX2025", raiz=tmp_path, agora=bolsa.agora)
+    bolsa.agora += pd.Timedelta(days=90)
+    bolsa.falhas = {"ZCZ2025"}
+    df = atualizar_varios(["ZSX2025", "ZCZ2025", "ZSF2026"], raiz=tmp_path)
+    assert df["Status"].tolist() == ["lacuna", "erro", "ok"]
+    assert df["Novas barras"].tolist()[1] == 0
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import arquivo_barras
+import backtest
+import ppe_engine
+from benchmarks import arquivo_sintetico
+
+INICIO, FIM = "2024-01-01", "2024-06-30"
+NUMERICAS = ["Preço", "Premio", "NDF", "FOB (c$/bu)", "FOB ($/ton)", "FOB (R$/ton)", "Sobre rodas", "EXW",
+             "PPE Preço saca origem (R$/sc)", "Basis Praça-CBOT (c$/bu)"]
+
+
+@pytest.fixture(scope="module")
+def arquivo(tmp_path_factory):
+    raiz = tmp_path_factory.mktemp("barras")
+    hist_premios, hist_ndf = arquivo_sintetico(raiz)
+    return raiz, hist_premios, hist_ndf
+
+
+@pytest.fixture(scope="module")
+def df_bt(arquivo):
+    raiz, hist_premios, hist_ndf = arquivo
+    return backtest.backtest_ppe(INICIO, FIM, hist_premios, hist_ndf, raiz=raiz)
+
+
+def _rodada_do_motor(d, raiz, hist_premios, hist_ndf):
+    """Referência: o que o motor calcularia no dia d (último fechamento do dia e retratos publicados até d)."""
+    n = ppe_engine.contratos_para_horizonte(ppe_engine.HORIZONTE_PADRAO, ano=d.year, mes=d.month)
+    precos = {}
+    for tk in ppe_engine.contratos_cbot(d.year, d.month, n):
+        barras = arquivo_barras.ler(tk, raiz=raiz).loc[: d.normalize() + pd.Timedelta(hours=23, minutes=59)]
+        if len(barras):
+            precos[tk] = float(barras["close"].iloc[-1])
+    price_map, _ = ppe_engine.build_price_map_from_explicit(precos)
+
+    def retrato(h):
+        return h[h["Data"] == h["Data"][h["Data"] <= d].max()]
+    curva_premios = pd.concat([
+        ppe_engine._curva_com_chave(retrato(h), "Mes", "Premio").assign(Produto=p) for p, h in hist_premios.items()
+    ], ignore_index=True)
+    curva_ndf = ppe_engine._curva_com_chave(retrato(hist_ndf), "Vencimento", "NDF")
+    return ppe_engine.nucleo_ppe(d.year, d.month, price_map, curva_premios, curva_ndf, 40.0, 342.0,
+                                 tuple(hist_premios))
+
+
+def test_formato(df_bt):
+    assert df_bt.columns.tolist() == backtest.COLUNAS_BACKTEST
+    datas = pd.bdate_range(INICIO, FIM)
+    assert df_bt["Data"].nunique() == len(datas)
+    n_por_data = df_bt.groupby("Data").size()
+    assert (n_por_data == 2 * ppe_engine.HORIZONTE_PADRAO).all()
+
+
+@pytest.mark.parametrize("data", ["2024-01-02", "2024-02-29", "2024-03-15", "2024-05-01", "2024-06-28"])
+def test_linhas_iguais_a_uma_rodada_do_motor_por_data(arquivo, df_bt, data):
+    raiz, hist_premios, hist_ndf = arquivo
+    d = pd.Timestamp(data)
+    ref = _rodada_do_motor(d, raiz, hist_premios, hist_ndf)
+    linhas = df_bt[df_bt["Data"] == d]
+    junto = linhas.merge(ref, on=["Produto", "Ano", "MesNum"], suffixes=("", "_ref"), validate="1:1")
+    assert len(junto) == len(ref) == len(linhas)
+    assert (junto["Ativo"] == junto["Ativo_ref"]).all()
+    for col in NUMERICAS:
+        np.testing.assert_allclose(junto[col].to_numpy(dtype=float), junto[f"{col}_ref"].to_numpy(dtype=float),
+                                   rtol=1e-12, atol=1e-9, err_msg=col)
+
+
+def test_processos_igual_a_serial(arquivo, df_bt, monkeypatch):
+    raiz, hist_premios, hist_ndf = arquivo
+    monkeypatch.setattr(backtest, "DATAS_POR_BLOCO", 40)
+    paralelo = backtest.backtest_ppe(INICIO, FIM, hist_premios, hist_ndf, raiz=raiz, processos=2)
+    pd.testing.assert_frame_equal(paralelo, df_bt)
+
+
+def test_backtest_pracas(df_bt):
+    df_pracas = pd.DataFrame({"Praça": ["Base", "Sorriso"], "Frete": [342.0, 420.0], "Fobbings": [40.0, 35.0]})
+    out = backtest.backtest_pracas(df_bt, df_pracas)
+    assert len(out) == 2 * len(df_bt)
+    base = out[out["Praça"] == "Base"].reset_index(drop=True)
+    sorriso = out[out["Praça"] == "Sorriso"].reset_index(drop=True)
+    # praça com os custos do backtest reproduz as colunas do próprio backtest
+    for col in ["EXW", "PPE Preço saca origem (R$/sc)", "Basis Praça-CBOT (c$/bu)"]:
+        np.testing.assert_allclose(base[col], df_bt[col], rtol=1e-12, err_msg=col)
+    # e cada R$/ton a mais de custo sai inteiro do EXW
+    np.testing.assert_allclose(sorriso["EXW"], df_bt["EXW"] - (420.0 + 35.0 - 342.0 - 40.0), rtol=1e-12)
+
+
+def test_periodo_vazio(arquivo):
+    raiz, hist_premios, hist_ndf = arquivo
+    out = backtest.backtest_ppe("2024-01-06", "2024-01-07", hist_premios, hist_ndf, raiz=raiz)  # fim de semana
+    assert out.empty and out.columns.tolist() == backtest.COLUNAS_BACKTEST
@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+from cache_cotacoes import CacheCotacoes, fechamento_barra
+
+T0 = 1_760_000_400  # múltiplo de 15 min
+
+
+def _linhas(caminho):
+    con = sqlite3.connect(caminho)
+    try:
+        return sorted(con.execute("SELECT symbol, fechamento FROM cotacoes").fetchall())
+    finally:
+        con.close()
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    return tmp_path / "cotacoes.sqlite"
+
+
+def test_chave_e_o_fechamento_da_barra():
+    assert fechamento_barra(T0) == T0
+    assert fechamento_barra(T0 + 899) == T0
+    assert fechamento_barra(T0 + 900) == T0 + 900
+    assert CacheCotacoes(None).chave_barra(T0 + 10) == T0
+
+
+def test_cotacao_vale_so_na_propria_barra(caminho):
+    cache = CacheCotacoes(caminho)
+    cache.put("CBOT", "ZSX2025", 1012.5, "2025-10-15 12:00:00", T0)
+    assert cache.get("CBOT", "ZSX2025", T0) == (1012.5, "2025-10-15 12:00:00")
+    assert cache.get("CBOT", "ZSX2025", T0 + 900) is None
+    assert cache.get("CBOT", "ZCZ2025", T0) is None
+    assert cache.estatisticas()["hits_memoria"] == 1
+
+
+def test_disco_compartilhado_entre_instancias(caminho):
+    CacheCotacoes(caminho).put("CBOT", "ZSX2025", 1012.5, None, T0)
+    outro = CacheCotacoes(caminho)  # outro processo: memória vazia
+    assert outro.get("CBOT", "ZSX2025", T0) == (1012.5, None)
+    assert outro.get("CBOT", "ZSX2025", T0) == (1012.5, None)
+    stats = outro.estatisticas()
+    assert (stats["hits_disco"], stats["hits_memoria"], stats["misses"]) == (1, 1, 0)
+
+
+def test_barras_vencidas_saem_do_disco_uma_vez_por_barra(caminho, monkeypatch):
+    cache = CacheCotacoes(caminho)
+    cache.put("CBOT", "A", 1.0, None, T0)
+    cache.put("CBOT", "B", 1.0, None, T0 + 900)
+    assert _linhas(caminho) == [("A", T0), ("B", T0 + 900)]  # a barra anterior ainda fica
+
+    deletes = []
+    conectar = cache._conectar
+
+    def _conectar():
+        con = conectar()
+        con.set_trace_callback(lambda sql: deletes.append(sql) if sql.startswith("DELETE") else None)
+        return con
+
+    monkeypatch.setattr(cache, "_conectar", _conectar)
+    for sym in "CDE":
+        cache.put("CBOT", sym, 1.0, None, T0 + 1800)
+    assert len(deletes) == 1
+    assert [s for s, _ in _linhas(caminho)] == ["B", "C", "D", "E"]
+    assert CacheCotacoes(caminho).get("CBOT", "A", T0) is None
@@ -0,0 +1,92 @@
+import os
+
+import pandas as pd
+import pytest
+
+from cache_planilha import CachePlanilha, PlanilhaLocal
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def _gravar(pasta, aba, premio, mtime=None):
+    arq = pasta / f"{aba}.csv"
+    pd.DataFrame({"Mes": ["JAN/26"], "Premio": [premio]}).to_csv(arq, index=False)
+    if mtime is not None:
+        os.utime(arq, ns=(mtime, mtime))
+
+
+def _dobrar(df):
+    return df["Premio"].astype(float) * 2
+
+
+@pytest.fixture
+def planilha(tmp_path):
+    _gravar(tmp_path, "soja", "1.5", mtime=1_000_000_000)
+    local = PlanilhaLocal(tmp_path)
+    relogio = _Relogio()
+    cache = CachePlanilha(local.ler, local.versao, ttl=60, relogio=relogio)
+    return cache, local, relogio, tmp_path
+
+
+def test_dentro_do_ttl_nao_consulta_nada(planilha):
+    cache, local, relogio, pasta = planilha
+    assert cache.ler("soja", _dobrar).tolist() == [3.0]
+    _gravar(pasta, "soja", "2.0", mtime=2_000_000_000)
+    relogio.agora = 59
+    assert cache.ler("soja", _dobrar).tolist() == [3.0]
+    assert (local.leituras, cache.consultas_versao) == (1, 1)
+
+    relogio.agora = 61  # TTL vencido: versão mudou, relê
+    assert cache.ler("soja", _dobrar).tolist() == [4.0]
+    assert (local.leituras, cache.consultas_versao, cache.reprocessamentos) == (2, 2, 2)
+
+
+def test_versao_igual_nao_rele_a_aba(planilha):
+    cache, local, relogio, _ = planilha
+    cache.ler("soja", _dobrar)
+    relogio.agora = 61
+    cache.ler("soja", _dobrar)
+    assert (local.leituras, cache.consultas_versao, cache.reprocessamentos) == (1, 2, 1)
+
+
+def test_versao_nova_com_mesmo_conteudo_mantem_processados(planilha):
+    cache, local, relogio, pasta = planilha
+    primeiro = cache.ler("soja", _dobrar)
+    _gravar(pasta, "soja", "1.5", mtime=2_000_000_000)  # salvo de novo sem mudar nada
+    relogio.agora = 61
+    assert cache.ler("soja", _dobrar) is primeiro
+    assert (local.leituras, cache.reprocessamentos) == (2, 1)
+
+
+def test_erro_da_aba_fica_em_cache(planilha):
+    cache, local, relogio, pasta = planilha
+    for _ in range(2):
+        with pytest.raises(FileNotFoundError):
+            cache.ler("milho")
+    assert local.leituras == 1
+
+    _gravar(pasta, "milho", "0.8")
+    relogio.agora = 61
+    assert cache.ler("milho")["Premio"].tolist() == ["0.8"]
+
+
+def test_falha_na_versao_desliga_a_deteccao(planilha):
+    cache, local, relogio, _ = planilha
+
+    def versao():
+        raise RuntimeError("sem Drive")
+
+    cache.fn_versao = versao
+    cache.ler("soja")
+    stats = cache.estatisticas()
+    assert not stats["deteccao_mudanca"]
+    assert "sem Drive" in stats["erro_versao"]
+    relogio.agora = 61  # sem versão: relê a cada TTL
+    cache.ler("soja")
+    assert local.leituras == 2
@@ -0,0 +1,36 @@
+import pandas as pd
+
+from cache_resultados import CacheResultados, chave_conteudo
+
+
+def test_disco_separado_por_versao(tmp_path):
+    chave = chave_conteudo("mercado", 1)
+    df = pd.DataFrame({"Preço": [1.0, 2.0]})
+    CacheResultados("ppe", diretorio=tmp_path, versao=1).put(chave, df)
+
+    assert CacheResultados("ppe", diretorio=tmp_path, versao=2).get(chave) is None
+    pd.testing.assert_frame_equal(CacheResultados("ppe", diretorio=tmp_path, versao=1).get(chave), df)
+
+
+def test_alterar_o_resultado_nao_mexe_no_cache(tmp_path):
+    cache = CacheResultados("ppe", diretorio=tmp_path)
+    cache.put("k", pd.DataFrame({"Preço": [1.0, 2.0]}))
+    df = cache.get("k")
+    df.loc[0, "Preço"] = 99.0
+    assert cache.get("k")["Preço"].tolist() == [1.0, 2.0]
+
+
+def test_disco_limita_o_numero_de_arquivos(tmp_path, monkeypatch):
+    cache = CacheResultados("ppe", diretorio=tmp_path, max_arquivos=10)
+    varreduras = []
+    podar = cache._podar_disco
+    monkeypatch.setattr(cache, "_podar_disco", lambda: (varreduras.append(1), podar()))
+    df = pd.DataFrame({"Preço": [1.0]})
+    for i in range(30):
+        cache.put(f"k{i}", df)
+        cache.put(f"k{i}", df)  # regravar a mesma chave não conta arquivo novo
+    pasta = tmp_path / "ppe"
+    assert len(list(pasta.glob("*.parquet"))) <= 10
+    assert len(varreduras) <= 30 // 2  # poda com folga, não a cada gravação
+    # Os mais recentes ficam
+    assert CacheResultados("ppe", diretorio=tmp_path).get("k29") is not None
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+import cenarios
+import ppe_engine
+
+
+def test_grade_e_o_produto_cartesiano():
+    grade = cenarios.grade_cenarios(fobbings=[30, 40], frete_dom=range(250, 280, 10))
+    assert grade["fobbings"].tolist() == [30, 30, 30, 40, 40, 40]
+    assert grade["frete_dom"].tolist() == [250, 260, 270] * 2
+
+
+def test_cenarios_iguais_ao_motor(ppe_longo):
+    mercado = cenarios.mercado_de_longo(ppe_longo)
+    grade = cenarios.grade_cenarios(fobbings=[30.0, 40.0, 55.0], frete_dom=[250.0, 342.0])
+    res = cenarios.avaliar_cenarios(mercado, **grade)
+    assert res["EXW"].shape == (6, len(mercado["vencimentos"]), len(mercado["produtos"]))
+
+    for i, (fob, frete) in enumerate(zip(grade["fobbings"], grade["frete_dom"])):
+        motor = ppe_engine.aplicar_custos(ppe_longo, fob, frete)
+        largo = motor.pivot(index=["Ano", "MesNum"], columns="Produto").sort_index()
+        for saida in cenarios.SAIDAS:
+            np.testing.assert_allclose(res[saida][i], largo[saida][mercado["produtos"]].to_numpy(), rtol=1e-12)
+
+
+def test_ajuste_de_premio(ppe_longo):
+    mercado = cenarios.mercado_de_longo(ppe_longo)
+    base = cenarios.avaliar_cenarios(mercado)
+    res = cenarios.avaliar_cenarios(mercado, fobbings=[40.0, 40.0], ajuste_premio=[0.0, 10.0])
+    np.testing.assert_allclose(res["EXW"][0], base["EXW"][0])
+    # +10 c$/bu no prêmio = +10 x dPPE/dPremio em R$/sc
+    dppe = (mercado["fator"] * mercado["ndf"] * ppe_engine.TON_POR_SACA) * 10
+    np.testing.assert_allclose(res["PPE Preço saca origem (R$/sc)"][1] - res["PPE Preço saca origem (R$/sc)"][0], dppe)
+
+
+def test_tabela_cenarios(ppe_longo):
+    mercado = cenarios.mercado_de_longo(ppe_longo)
+    grade = cenarios.grade_cenarios(fobbings=[30.0, 40.0], frete_dom=[300.0])
+    res = cenarios.avaliar_cenarios(mercado, **grade)
+    df = cenarios.tabela_cenarios(mercado, res, grade)
+    n_venc, n_prod = len(mercado["vencimentos"]), len(mercado["produtos"])
+    assert len(df) == 2 * n_venc * n_prod
+    assert df.groupby("Cenário")["fobbings"].first().tolist() == [30.0, 40.0]
+    linha = df[(df["Cenário"] == 1) & (df["Produto"] == "milho")].iloc[0]
+    j = mercado["produtos"].index("milho")
+    assert linha["EXW"] == pytest.approx(res["EXW"][1, 0, j])
@@ -0,0 +1,134 @@
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import cotacoes_tradingview_cepea as cot
+import resiliencia
+from limitador import TokenBucket
+from resiliencia import CircuitBreaker, PoliticaRetry
+
+
+CODIGOS_DIR = Path(cot.__file__).resolve().parent
+
+# Processo limpo com a rede bloqueada: o import não pode logar nem buscar cotação
+_SCRIPT_IMPORT = r"""
+import socket, sys
+
+def _sem_rede(*args, **kwargs):
+    raise RuntimeError("acesso à rede durante o import")
+socket.socket.connect = _sem_rede
+socket.create_connection = _sem_rede
+
+sys.path.insert(0, {codigos!r})
+import cotacoes_tradingview_cepea as cot
+print(cot.sessao.conectada, "tvDatafeed" in sys.modules)
+"""
+
+
+class _ClienteFake:
+    """get_hist com barras para qualquer símbolo, exceto os de 'vazios' (contratos não listados)."""
+
+    def __init__(self, vazios=()):
+        self.vazios = set(vazios)
+        self.chamadas = {}
+        self._lock = threading.Lock()
+
+    def get_hist(self, symbol, exchange, interval, n_bars):
+        with self._lock:
+            self.chamadas[symbol] = self.chamadas.get(symbol, 0) + 1
+        if symbol in self.vazios:
+            return None
+        idx = pd.date_range("2025-10-15 10:00", periods=4, freq="15min")
+        return pd.DataFrame({"symbol": f"{exchange}:{symbol}", "open": 1.0, "high": 1.0, "low": 1.0,
+                             "close": [430.0, 431.0, 432.0, 433.0], "volume": 1.0}, index=idx)
+
+
+class _WsFake:
+    def __init__(self):
+        self.fechado = threading.Event()
+
+    def abort(self):
+        self.fechado.set()
+
+
+class _ClienteTravado(_ClienteFake):
+    """Como o TvDatafeed: o get_hist de 'travados' fica preso no recv até o websocket ser fechado."""
+
+    def __init__(self, travados):
+        super().__init__()
+        self.travados = set(travados)
+        self.ws = None
+
+    def get_hist(self, symbol, exchange, interval, n_bars):
+        self.ws = ws = _WsFake()
+        if symbol in self.travados and not ws.fechado.wait(10):
+            raise AssertionError("websocket nunca foi fechado")
+        return super().get_hist(symbol, exchange, interval, n_bars)
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    c = _ClienteFake()
+    monkeypatch.setattr(cot, "_intervalo", lambda nome: nome)
+    monkeypatch.setattr(cot, "_tv_thread", lambda: c)
+    monkeypatch.setattr(cot, "cache", None)
+    monkeypatch.setattr(cot, "limitador_tv", TokenBucket(taxa=1e6, capacidade=1e6))
+    monkeypatch.setattr(cot, "politica", PoliticaRetry(max_tentativas=3, base=0.001))
+    monkeypatch.setattr(resiliencia, "_breakers", {})
+    return c
+
+
+def test_import_sem_rede_nem_login():
+    script = _SCRIPT_IMPORT.format(codigos=str(CODIGOS_DIR))
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=60)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.split() == ["False", "False"]
+
+
+def test_sessao_sem_credenciais_falha_na_primeira_busca(monkeypatch):
+    monkeypatch.setattr(cot, "_carregar_credenciais", lambda: (None, None))
+    sessao = cot.SessaoTradingView()
+    assert not sessao.conectada
+    with pytest.raises(RuntimeError, match="Credenciais"):
+        sessao.cliente()
+    assert not sessao.conectada
+
+
+def test_contratos_sem_barras_nao_abrem_o_circuito(cliente):
+    zc = [f"ZC{m}{a}" for a in (2026, 2027, 2028) for m in "HKNUZ"][:12]
+    cliente.vazios = {"ZCH2030", "ZCK2030"}
+
+    df = cot.fetch_many(zc + ["ZCH2030", "ZCK2030"], "CBOT")
+    assert df.set_index("Ticker").loc[["ZCH2030", "ZCK2030"], "Status"].tolist() == ["sem dados"] * 2
+    assert (df["Status"] == "ok").sum() == 12
+    assert cliente.chamadas["ZCH2030"] == 1  # sem dados não é repetido
+    assert resiliencia.breaker("CBOT").estado_atual == CircuitBreaker.FECHADO
+
+    zs = [f"ZS{m}2026" for m in "FHKNQUX"]
+    assert (cot.fetch_many(zs, "CBOT")["Status"] == "ok").all()
+
+
+def test_ticker_travado_nao_prende_o_pool(cliente, monkeypatch):
+    local = threading.local()
+
+    def _tv_thread():
+        if not hasattr(local, "tv"):
+            local.tv = _ClienteTravado({"ZSX2025"})
+        return local.tv
+
+    monkeypatch.setattr(cot, "_tv_thread", _tv_thread)
+    monkeypatch.setattr(cot, "MAX_WORKERS", 1)  # uma thread só: se ela ficar presa, o próximo lote não roda
+    monkeypatch.setattr(cot, "_executor", None)
+    try:
+        df = cot.fetch_many(["ZSX2025", "ZSF2026"], "CBOT", prazo=0.2)
+        assert df["Status"].tolist() == ["timeout", "timeout"]
+
+        df = cot.fetch_many(["ZCZ2025"], "CBOT", prazo=2.0)
+        assert df["Status"].tolist() == ["ok"]
+        assert df["Preço"].tolist() == [432.0]
+    finally:
+        cot._executor.shutdown(wait=True)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import ppe_engine
+from cenarios import avaliar_cenarios, mercado_de_longo
+
+SACA = "PPE Preço saca origem (R$/sc)"
+
+
+def _saca_com(ppe_longo, **entradas):
+    """PPE recalculado com as entradas de mercado trocadas (mesmo caminho dos cenários), na ordem da tabela longa."""
+    mercado = mercado_de_longo(ppe_longo.assign(**entradas))
+    saca = np.asarray(avaliar_cenarios(mercado, 40.0, 342.0)[SACA], dtype=float)  # cenário x vencimento x produto
+    return saca[0].T.ravel()
+
+
+@pytest.mark.parametrize("variavel, delta", [("Preço", "dPPE/dCBOT"), ("Premio", "dPPE/dPremio"),
+                                             ("NDF", "dPPE/dNDF")])
+def test_delta_igual_a_diferenca_finita(ppe_longo, variavel, delta):
+    h = 0.5 if variavel != "NDF" else 0.01
+    base = ppe_longo[variavel].to_numpy(dtype=float)
+    diff = (_saca_com(ppe_longo, **{variavel: base + h}) - _saca_com(ppe_longo, **{variavel: base - h})) / (2 * h)
+    np.testing.assert_allclose(ppe_longo[delta], diff, rtol=1e-9, atol=1e-9)
+
+
+def test_delta_frete_igual_a_diferenca_finita(ppe_longo):
+    sobe = ppe_engine.aplicar_custos(ppe_longo, 40.0, 352.0)[SACA]
+    desce = ppe_engine.aplicar_custos(ppe_longo, 40.0, 332.0)[SACA]
+    np.testing.assert_allclose(ppe_longo["dPPE/dFrete"], (sobe - desce) / 20.0, rtol=1e-12)
+
+
+def test_tabelas_por_produto_levam_os_deltas(ppe_longo):
+    tabelas = ppe_engine.tabelas_por_produto(ppe_longo)
+    for p, df in tabelas.items():
+        assert set(ppe_engine.COLUNAS_DELTAS) <= set(df.columns)
+        ref = ppe_longo.loc[ppe_longo["Produto"] == p, ppe_engine.COLUNAS_DELTAS].to_numpy(dtype=float)
+        np.testing.assert_allclose(df[ppe_engine.COLUNAS_DELTAS].to_numpy(dtype=float), np.round(ref, 4))
+
+
+def test_exposicao_soma_delta_vezes_sacas(ppe_longo):
+    tabelas = ppe_engine.tabelas_por_produto(ppe_longo)
+    vol_soja = np.arange(len(tabelas["soja"]), dtype=float) * 100
+    expo = ppe_engine.exposicao(tabelas, {"soja": vol_soja, "milho": 1000.0})
+    assert expo["Produto"].tolist() == [*tabelas, "Total"]
+
+    esperado = {
+        "soja": (tabelas["soja"][ppe_engine.COLUNAS_DELTAS].to_numpy(dtype=float) * vol_soja[:, None]).sum(axis=0),
+        "milho": tabelas["milho"][ppe_engine.COLUNAS_DELTAS].to_numpy(dtype=float).sum(axis=0) * 1000.0,
+    }
+    numericas = expo.columns[2:]
+    for p, v in esperado.items():
+        np.testing.assert_allclose(expo.loc[expo["Produto"] == p, numericas].to_numpy(dtype=float)[0], v)
+    assert expo.loc[expo["Produto"] == "milho", "Sacas"].item() == 1000.0 * len(tabelas["milho"])
+    total = expo.iloc[-1]
+    np.testing.assert_allclose(total[expo.columns[1:]].to_numpy(dtype=float),
+                               expo.iloc[:-1][expo.columns[1:]].sum().to_numpy(dtype=float))
+
+
+def test_exposicao_de_um_produto_fora_do_dict_e_zero(ppe_longo):
+    tabelas = ppe_engine.tabelas_por_produto(ppe_longo)
+    expo = ppe_engine.exposicao(tabelas, {"soja": 1.0})
+    assert (expo.loc[expo["Produto"] == "milho", expo.columns[1:]].to_numpy() == 0).all()
+    # variação de 1 R$/ton no frete por saca
+    assert expo.loc[expo["Produto"] == "soja", "R$ por R$/ton frete"].item() == pytest.approx(
+        -ppe_engine.TON_POR_SACA * len(tabelas["soja"]))
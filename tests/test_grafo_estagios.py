@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+
+from cache_resultados import CacheResultados
+from grafo_estagios import GrafoEstagios
+
+
+class _Contador:
+    def __init__(self):
+        self.chamadas = []
+
+    def __call__(self, nome, fn):
+        def rodar(*args):
+            self.chamadas.append(nome)
+            return fn(*args)
+        return rodar
+
+
+def _grafo(contador, persistir=None):
+    # "provedor" é uma função sem argumentos chamada a cada cálculo (estágio volátil)
+    return (
+        GrafoEstagios("teste")
+        .estagio("cotacoes", contador("cotacoes", lambda prov: prov()), ["provedor"], volatil=True)
+        .estagio("mercado", contador("mercado", lambda cot, premio: pd.DataFrame({"FOB": [cot + premio]})),
+                 ["cotacoes", "premio"], persistir=persistir)
+        .estagio("ppe", contador("ppe", lambda mercado, frete: float(mercado["FOB"].iloc[0]) - frete),
+                 ["mercado", "frete"])
+    )
+
+
+def test_mudar_so_o_custo_recalcula_so_o_que_depende_dele():
+    c = _Contador()
+    grafo = _grafo(c)
+    entradas = {"provedor": lambda: 1000.0, "premio": 80.0}
+    assert grafo.calcular("ppe", frete=300.0, **entradas) == 780.0
+    assert c.chamadas == ["cotacoes", "mercado", "ppe"]
+
+    c.chamadas.clear()
+    assert grafo.calcular("ppe", frete=310.0, **entradas) == 770.0
+    assert c.chamadas == ["cotacoes", "ppe"]  # cotação volátil roda, mas veio igual: mercado reaproveitado
+
+    c.chamadas.clear()
+    assert grafo.calcular("ppe", frete=300.0, **entradas) == 780.0
+    assert c.chamadas == ["cotacoes"]
+
+    c.chamadas.clear()
+    assert grafo.calcular("ppe", frete=300.0, **{**entradas, "premio": 90.0}) == 790.0
+    assert c.chamadas == ["cotacoes", "mercado", "ppe"]
+
+
+def test_cotacao_nova_recalcula_abaixo_dela():
+    c = _Contador()
+    grafo = _grafo(c)
+    precos = iter([1000.0, 1000.0, 1005.0])
+    for esperado in (780.0, 780.0, 785.0):
+        assert grafo.calcular("ppe", provedor=lambda: next(precos), premio=80.0, frete=300.0) == esperado
+    assert c.chamadas.count("mercado") == 2
+    est = {e["Estágio"]: e for e in grafo.estatisticas()}
+    assert (est["cotacoes"]["Execuções"], est["mercado"]["Reaproveitados"], est["ppe"]["Reaproveitados"]) == (3, 1, 1)
+
+
+def test_versoes_externas_dispensam_o_hash():
+    c = _Contador()
+    grafo = _grafo(c)
+    grafo.calcular("ppe", {"premio": "v1"}, provedor=lambda: 1000.0, premio=80.0, frete=300.0)
+    c.chamadas.clear()
+    # mesma versão declarada: o valor não é olhado de novo
+    assert grafo.calcular("ppe", {"premio": "v1"}, provedor=lambda: 1000.0, premio=99.0, frete=300.0) == 780.0
+    assert c.chamadas == ["cotacoes"]
+
+
+def test_estagio_persistido_sobrevive_a_um_grafo_novo(tmp_path):
+    entradas = {"provedor": lambda: 1000.0, "premio": 80.0, "frete": 300.0}
+    _grafo(_Contador(), CacheResultados("mercado", diretorio=tmp_path)).calcular("ppe", **entradas)
+
+    c = _Contador()  # outro processo: memória vazia, mesmo disco
+    grafo = _grafo(c, CacheResultados("mercado", diretorio=tmp_path))
+    assert grafo.calcular("ppe", **entradas) == 780.0
+    assert c.chamadas == ["cotacoes", "ppe"]
+
+
+def test_entrada_faltando():
+    with pytest.raises(KeyError, match="frete"):
+        _grafo(_Contador()).calcular("ppe", provedor=lambda: 1000.0, premio=80.0)
+
+
+def test_memoria_limitada_por_estagio():
+    c = _Contador()
+    grafo = _grafo(c)
+    grafo.max_itens = 2
+    for frete in (1.0, 2.0, 3.0, 1.0):
+        grafo.calcular("ppe", provedor=lambda: 1000.0, premio=80.0, frete=frete)
+    assert c.chamadas.count("ppe") == 4  # frete=1 saiu da memória quando entrou o 3
+    assert {e["Estágio"]: e["Guardados"] for e in grafo.estatisticas()}["ppe"] == 2
+
+
+def test_motor_so_recalcula_os_custos(ppe_longo):
+    import ppe_engine
+    from benchmarks import dados_sinteticos
+    from provedores import ReplayProvider
+
+    df_soja, df_milho, df_ndf, df_barras = dados_sinteticos()
+    args = ({"soja": df_soja, "milho": df_milho}, df_ndf)
+    provedor = ReplayProvider(df_barras)
+    ppe_engine.calcular_ppe_longo(*args, frete_dom=300.0, provedor=provedor, data_ref="2025-10-15")
+    antes = {e["Estágio"]: e["Execuções"] for e in ppe_engine.grafo_ppe.estatisticas()}
+    df = ppe_engine.calcular_ppe_longo(*args, frete_dom=250.0, provedor=provedor, data_ref="2025-10-15")
+    depois = {e["Estágio"]: e["Execuções"] for e in ppe_engine.grafo_ppe.estatisticas()}
+    assert {k: depois[k] - antes[k] for k in depois} == {
+        "tickers": 0, "cotacoes": 1, "curvas": 0, "mercado": 0, "ppe": 1, "tabelas": 0}
+    pd.testing.assert_frame_equal(df, ppe_engine.aplicar_custos(ppe_longo, 40.0, 250.0))
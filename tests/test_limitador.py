@@ -0,0 +1,54 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from limitador import TokenBucket
+from resiliencia import PrazoEsgotado
+
+
+def test_sqlite_travado_nao_prende_o_lock(tmp_path):
+    caminho = tmp_path / "balde.sqlite"
+    balde = TokenBucket(taxa=100.0, capacidade=5, caminho=caminho)
+    con = sqlite3.connect(caminho, isolation_level=None)
+    con.execute("CREATE TABLE bucket (nome TEXT PRIMARY KEY, tokens REAL, atualizado REAL)")
+    con.execute("BEGIN IMMEDIATE")  # outro processo segurando o arquivo
+
+    pedido = threading.Thread(target=balde.adquirir)
+    pedido.start()
+    time.sleep(0.2)
+    t0 = time.monotonic()
+    balde.estatisticas()
+    assert time.monotonic() - t0 < 0.1
+    con.execute("ROLLBACK")
+    con.close()
+    pedido.join(timeout=5)
+    assert not pedido.is_alive()
+    assert balde.estatisticas()[0]["Pedidos"] == 1
+
+
+def test_prioridade_dentro_do_processo():
+    balde = TokenBucket(taxa=20.0, capacidade=1)
+    balde.adquirir()  # esvazia o balde
+    ordem = []
+
+    def pedir(p):
+        balde.adquirir(prioridade=p)
+        ordem.append(p)
+
+    fundo = threading.Thread(target=pedir, args=(10,))
+    fundo.start()
+    time.sleep(0.01)
+    interativo = threading.Thread(target=pedir, args=(0,))
+    interativo.start()
+    fundo.join(timeout=5)
+    interativo.join(timeout=5)
+    assert ordem == [0, 10]
+
+
+def test_prazo_no_modo_sqlite(tmp_path):
+    balde = TokenBucket(taxa=1.0, capacidade=1, caminho=tmp_path / "balde.sqlite")
+    balde.adquirir()
+    with pytest.raises(PrazoEsgotado):
+        balde.adquirir(ate=time.monotonic() + 0.1)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+import montecarlo
+
+
+def _mercado():
+    return {
+        "vencimentos": ["11/2025", "12/2025", "01/2026"],
+        "produtos": ["soja", "milho"],
+        "preco": np.array([[1000.0, 430.0], [1010.0, 432.0], [1020.0, 435.0]]),
+        "premio": np.array([[80.0, 40.0], [85.0, 42.0], [90.0, 45.0]]),
+        "ndf": np.full((3, 2), 5.5),
+        "fator": np.array([0.367437, 0.393683]),
+    }
+
+
+def _cov():
+    fatores = ["CBOT soja", "CBOT milho", "Prêmio soja", "Prêmio milho", "NDF"]
+    a = np.random.default_rng(1).standard_normal((200, len(fatores))) * [0.01, 0.012, 2.0, 1.5, 0.005]
+    return pd.DataFrame(a, columns=fatores).cov()
+
+
+def test_mesma_semente_mesmas_bandas_com_e_sem_processos(monkeypatch):
+    monkeypatch.setattr(montecarlo, "CAMINHOS_POR_BLOCO", 1_000)
+    args = (_mercado(), _cov(), 3_500)
+    serial = montecarlo.simular_ppe(*args, semente=7)
+    paralelo = montecarlo.simular_ppe(*args, semente=7, processos=3)
+
+    assert serial["saca"].shape == (3_500, 3, 2)
+    np.testing.assert_array_equal(serial["saca"], paralelo["saca"])
+    pd.testing.assert_frame_equal(montecarlo.bandas_ppe(serial), montecarlo.bandas_ppe(paralelo))
+
+
+def test_sementes_diferentes_mudam_os_caminhos():
+    a = montecarlo.simular_ppe(_mercado(), _cov(), 500, semente=1)
+    b = montecarlo.simular_ppe(_mercado(), _cov(), 500, semente=2)
+    assert not np.array_equal(a["saca"], b["saca"])
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+import paridade
+import ppe_engine
+from cenarios import mercado_de_longo
+
+
+def _mercado():
+    meses = [(2025, 11), (2025, 12), (2026, 1), (2026, 3)]
+    return mercado_de_longo(pd.DataFrame({
+        "Produto": "soja",
+        "Ano": [a for a, _ in meses],
+        "MesNum": [m for _, m in meses],
+        "Preço": [1000.0, 1010.0, 1020.0, 1030.0],
+        "Premio": [80.0, 85.0, 90.0, 95.0],
+        "NDF": 5.5,
+    }))
+
+
+def test_tabela_em_ordem_cronologica():
+    df = paridade.tabela_paridade(paridade.paridade_rotas(_mercado()))
+    assert list(pd.unique(df["Vencimento"])) == ["11/2025", "12/2025", "01/2026", "03/2026"]
+    assert df["Rota"].tolist()[:3] == list(paridade.ROTAS)
+
+
+def test_concorrentes_sem_aba_rotas_ficam_marcados():
+    df = paridade.tabela_paridade(paridade.paridade_rotas(_mercado()))
+    base = df["Rota"].eq(paridade.ROTA_BASE)
+    assert df.loc[base, "Fonte do prêmio"].eq(paridade.FONTE_MOTOR).all()
+    assert df.loc[base, "CFR Ásia ($/ton)"].notna().all()
+    assert df.loc[~base, "Fonte do prêmio"].eq(paridade.FONTE_AUSENTE).all()
+    assert df.loc[~base, "CFR Ásia ($/ton)"].isna().all()
+
+
+def test_premio_da_aba_rotas():
+    rotas = pd.DataFrame({"Rota": ["EUA"], "Produto": [""], "Mes": ["JAN/26"], "Premio": [60.0], "Frete": [np.nan]})
+    par = paridade.paridade_rotas(_mercado(), rotas)
+    j = par["rotas"].index("EUA")
+    assert (par["Fonte do prêmio"][:, 0, j] == paridade.FONTE_PLANILHA).all()
+    assert np.isfinite(par["CFR Ásia ($/ton)"][:, 0, j]).all()
+
+
+def test_fob_da_rota_base_igual_ao_do_motor(ppe_longo):
+    longo = ppe_longo
+    par = paridade.paridade_rotas(mercado_de_longo(longo))
+    df = paridade.tabela_paridade(par)
+    base = df[df["Rota"] == paridade.ROTA_BASE].merge(longo, on=["Produto", "Ano", "MesNum"], suffixes=("", "_motor"))
+    assert len(base) == len(longo)
+    np.testing.assert_allclose(base["FOB ($/ton)"], base["FOB ($/ton)_motor"], rtol=0, atol=1e-9)
+    frete = paridade.ROTAS[paridade.ROTA_BASE]["frete"]
+    fator = base["Produto"].map({p: d["fator"] for p, d in ppe_engine.PRODUTOS.items()})
+    np.testing.assert_allclose(base["Basis CFR (c$/bu)"], (base["FOB ($/ton)_motor"] + frete) / fator - base["Preço"],
+                               rtol=0, atol=1e-9)
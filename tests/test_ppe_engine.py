@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import ppe_engine
+
+
+@pytest.mark.parametrize("produto", list(ppe_engine.PRODUTOS))
+def test_tickers_gerados_de_cada_produto_sao_lidos_de_volta(produto):
+    ativo = ppe_engine.PRODUTOS[produto]["ativo"]
+    for tk in ppe_engine.generate_explicit_tickers(ativo, 2025, 10, 12):
+        sym, ano, mes = ppe_engine.parse_explicit_ticker(tk)
+        assert sym == ativo
+        assert ppe_engine.MONTH_NUM_TO_CODE[mes] + str(ano) == tk[len(ativo):]
+
+
+@pytest.mark.parametrize("horizonte", [10, 12, 24, 36, 48, 60])
+@pytest.mark.parametrize("mes", range(1, 13))
+@pytest.mark.parametrize("ativo", sorted(ppe_engine.LISTED_MONTHS))
+def test_faixa_de_contratos_cobre_a_grade(ativo, mes, horizonte):
+    n = ppe_engine.contratos_para_horizonte(horizonte, [ativo], 2026, mes)[ativo]
+    ords = [a * 12 + m for _, a, m in map(ppe_engine.parse_explicit_ticker,
+                                           ppe_engine.generate_explicit_tickers(ativo, 2026, mes, n))]
+    fim = 2026 * 12 + mes + horizonte - 1  # último mês da grade
+    assert ords[-1] >= fim
+    if n > ppe_engine.NUM_CONTRACTS_PER_SYMBOL:
+        assert ords[-2] < fim  # para no primeiro vencimento do último mês em diante
+    # Sem mês de início: cobre qualquer início
+    assert ppe_engine.contratos_para_horizonte(horizonte, [ativo])[ativo] >= n
+
+
+@pytest.mark.parametrize("variavel", ppe_engine.VARIAVEIS_INVERSAO)
+def test_resolver_e_recalcular_volta_ao_alvo(ppe_longo, variavel):
+    from cenarios import avaliar_cenarios, mercado_de_longo
+
+    alvos = np.array([95.0, 120.0, 137.5])
+    resolvido = ppe_engine.resolver_ppe(ppe_longo, alvos, variavel, fobbings=40.0, frete_dom=342.0)
+    assert np.isfinite(resolvido).all()
+    for alvo, valores in zip(alvos, resolvido):
+        if variavel == "frete_dom":
+            # um frete por vencimento, direto nos custos do motor
+            saca = ppe_engine.aplicar_custos(ppe_longo, 40.0, valores)["PPE Preço saca origem (R$/sc)"]
+        else:
+            mercado = mercado_de_longo(ppe_longo.assign(**{variavel: valores}))
+            saca = avaliar_cenarios(mercado, 40.0, 342.0)["PPE Preço saca origem (R$/sc)"]
+        np.testing.assert_allclose(saca, alvo, rtol=0, atol=1e-9)
+
+
+def _ano_mes(chaves):
+    """Chave ano*12 + mês -> (ano, mês)."""
+    chaves = np.asarray(chaves)
+    return (chaves - 1) // 12, (chaves - 1) % 12 + 1
+
+
+def _curva(chaves, valores, **extra):
+    anos, meses = _ano_mes(chaves)
+    return pd.DataFrame({"Ano": anos, "MesNum": meses, "Premio": valores,
+                         "Chave": [f"{m:02d}/{a}" for a, m in zip(anos, meses)], **extra})
+
+
+def _proximo_ou_ultimo(alvos, chaves, valores):
+    """Referência linha a linha (como as antigas máscaras por mês): primeiro nó >= alvo, senão o último."""
+    nos = sorted(zip(chaves, valores))
+    return [next(((c, v) for c, v in nos if c >= a), nos[-1]) for a in alvos]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_asof_curva_igual_a_busca_linha_a_linha(seed):
+    rng = np.random.default_rng(seed)
+    chaves = rng.choice(np.arange(24300, 24600), 40, replace=False)  # fora de ordem, de propósito
+    valores = rng.normal(60, 20, len(chaves))
+    alvos = rng.integers(chaves.min() - 12, chaves.max() + 12, 200)  # antes do primeiro e depois do último nó
+    v, fontes = ppe_engine.asof_curva(*_ano_mes(alvos), _curva(chaves, valores), "Premio")
+    ref = _proximo_ou_ultimo(alvos, chaves, valores)
+    np.testing.assert_array_equal(v, [r[1] for r in ref])
+    assert fontes.tolist() == _curva([r[0] for r in ref], 0.0)["Chave"].tolist()
+
+
+def test_asof_curva_por_grupo():
+    curva = pd.concat([
+        _curva([24300, 24302], [10.0, 12.0], Produto="soja"),
+        _curva([24301], [7.0], Produto="milho"),
+    ], ignore_index=True)
+    alvos = [24300, 24301, 24303, 24300, 24305, 24300]
+    grupos = ["soja", "soja", "soja", "milho", "milho", "trigo"]
+    v, fontes = ppe_engine.asof_curva(*_ano_mes(alvos), curva, "Premio", grupos=grupos)
+    np.testing.assert_array_equal(v[:5], [10.0, 12.0, 12.0, 7.0, 7.0])
+    assert np.isnan(v[5]) and fontes[5] is None  # grupo sem curva
+
+
+def test_asof_curva_vazia():
+    v, fontes = ppe_engine.asof_curva([2025], [10], _curva([], []), "Premio")
+    assert np.isnan(v).all() and fontes.tolist() == [None]
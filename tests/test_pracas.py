@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+import cenarios
+import ppe_engine
+import pracas
+
+
+def _pracas():
+    bruto = pd.DataFrame({
+        "Praça": ["Sorriso", "Rio Verde", " ", "Cascavel", "Sorriso"],
+        "Frete (R$/ton)": ["420,5", "310", "100", "x", "415"],
+        "Fobbings": ["", "35", "", "", "38,5"],
+    })
+    return pracas.ler_pracas(bruto, fobbings_padrao=40.0)
+
+
+def test_ler_pracas():
+    df = _pracas()
+    # praça vazia e frete inválido saem; repetida fica com a última linha; fobbings vazio usa o padrão
+    assert df["Praça"].tolist() == ["Rio Verde", "Sorriso"]
+    assert df["Frete"].tolist() == [310.0, 415.0]
+    assert df["Fobbings"].tolist() == [35.0, 38.5]
+
+
+def test_ler_pracas_de_csv(tmp_path):
+    arq = tmp_path / "pracas.csv"
+    arq.write_text("Origem;Frete\nLRV;380,0\nSinop;450\n", encoding="utf-8")
+    df = pracas.ler_pracas(arq, fobbings_padrao=42.0)
+    assert df.to_dict("list") == {"Praça": ["LRV", "Sinop"], "Frete": [380.0, 450.0], "Fobbings": [42.0, 42.0]}
+
+
+def test_cada_praca_igual_a_uma_rodada_do_motor(ppe_longo):
+    df_pracas = _pracas()
+    matriz = pracas.matriz_pracas(cenarios.mercado_de_longo(ppe_longo), df_pracas)
+    tabela = pracas.tabela_pracas(matriz)
+    assert len(tabela) == len(df_pracas) * len(ppe_longo)
+
+    for _, praca in df_pracas.iterrows():
+        motor = ppe_engine.aplicar_custos(ppe_longo, praca["Fobbings"], praca["Frete"])
+        linhas = tabela[tabela["Praça"] == praca["Praça"]].merge(
+            motor[["Produto", "Vencimento"] + cenarios.SAIDAS], on=["Produto", "Vencimento"], suffixes=("", "_motor"))
+        assert len(linhas) == len(motor)
+        for saida in cenarios.SAIDAS:
+            np.testing.assert_allclose(linhas[saida], linhas[f"{saida}_motor"], rtol=1e-12)
+
+
+def test_fatia_e_pivot(ppe_longo):
+    matriz = pracas.matriz_pracas(cenarios.mercado_de_longo(ppe_longo), _pracas())
+    venc = matriz["vencimentos"][2]
+    rec = pracas.fatia(matriz, pracas="Sorriso", vencimentos=[venc], produtos=["milho", "soja"])
+    assert rec["pracas"] == ["Sorriso"] and rec["produtos"] == ["milho", "soja"]
+    assert rec["EXW"].shape == (1, 1, 2)
+    i_milho = matriz["produtos"].index("milho")
+    assert rec["EXW"][0, 0, 0] == matriz["EXW"][1, 2, i_milho]
+
+    piv = pracas.pivot_pracas(matriz, "milho", "EXW")
+    assert piv.shape == (2, len(matriz["vencimentos"]))
+    assert piv.loc["Sorriso", venc] == matriz["EXW"][1, 2, i_milho]
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from provedores import COLUNAS_COTACAO, ReplayProvider
+
+
+@pytest.fixture
+def barras():
+    return pd.DataFrame({
+        "datetime": pd.to_datetime(["2025-10-13", "2025-10-14", "2025-10-16", "2025-10-14"]),
+        "symbol": ["CBOT:ZSX2025", "CBOT:ZSX2025", "CBOT:ZSX2025", "CBOT:ZCZ2025"],
+        "close": [1000.0, 1010.0, 1020.0, 420.0],
+    })
+
+
+def _linha(df, ticker):
+    return df.set_index("Ticker").loc[ticker].tolist()
+
+
+def test_sem_data_ref_usa_a_ultima_barra(barras):
+    df = ReplayProvider(barras).fetch_many(["ZSX2025", "ZCZ2025"])
+    assert list(df.columns) == COLUNAS_COTACAO
+    assert _linha(df, "ZSX2025") == [1020.0, pd.Timestamp("2025-10-16"), "ok"]
+    assert _linha(df, "ZCZ2025") == [420.0, pd.Timestamp("2025-10-14"), "ok"]
+
+
+def test_as_of_na_barra_e_entre_barras(barras):
+    provedor = ReplayProvider(barras, data_ref="2025-10-14")
+    assert _linha(provedor.fetch_many(["ZSX2025"]), "ZSX2025")[:2] == [1010.0, pd.Timestamp("2025-10-14")]
+    provedor.set_data_ref("2025-10-15 12:00")
+    assert _linha(provedor.fetch_many(["ZSX2025"]), "ZSX2025")[:2] == [1010.0, pd.Timestamp("2025-10-14")]
+    provedor.set_data_ref(pd.Timestamp("2025-10-16", tz="America/Sao_Paulo"))
+    assert _linha(provedor.fetch_many(["ZSX2025"]), "ZSX2025")[:2] == [1020.0, pd.Timestamp("2025-10-16")]
+
+
+def test_simbolo_desconhecido(barras):
+    df = ReplayProvider(barras).fetch_many(["ZSX2025", "ZSF2026", "ZSX2025"])
+    assert df["Ticker"].tolist() == ["ZSX2025", "ZSF2026"]
+    preco, barra, status = _linha(df, "ZSF2026")
+    assert pd.isna(preco) and pd.isna(barra) and status == "erro"
+    # Outra bolsa: mesmo código, símbolo desconhecido
+    assert ReplayProvider(barras).fetch_many(["ZSX2025"], exchange="CME")["Status"].tolist() == ["erro"]
+
+
+def test_data_ref_antes_da_primeira_barra(barras):
+    provedor = ReplayProvider(barras, data_ref="2025-10-13")
+    assert provedor.fetch_many(["ZSX2025", "ZCZ2025"])["Status"].tolist() == ["ok", "erro"]
+    provedor.set_data_ref("2025-10-01")
+    assert provedor.fetch_many(["ZSX2025", "ZCZ2025"])["Status"].tolist() == ["erro", "erro"]
+
+
+def test_resposta_guardada_nao_vaza_alteracoes(barras):
+    provedor = ReplayProvider(barras)
+    df = provedor.fetch_many(["ZSX2025"])
+    df.loc[0, "Preço"] = 0.0
+    assert provedor.fetch_many(["ZSX2025"])["Preço"].tolist() == [1020.0]
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from resiliencia import CircuitBreaker, PoliticaRetry, PrazoEsgotado, SemDados
+
+
+def _meio_aberto():
+    b = CircuitBreaker("teste", limite_falhas=1, tempo_abertura=0.0)
+    b.falha()
+    assert b.estado_atual == CircuitBreaker.MEIO_ABERTO
+    return b
+
+
+def test_prazo_esgotado_no_meio_aberto_nao_prende_a_sondagem():
+    b = _meio_aberto()
+    politica = PoliticaRetry(max_tentativas=3, jitter=False)
+
+    with pytest.raises(PrazoEsgotado):
+        politica.executar(lambda: "ok", breaker=b, ate=time.monotonic() - 1)
+
+    # A sondagem continua livre: a próxima chamada com prazo passa e fecha o circuito
+    assert politica.executar(lambda: "ok", breaker=b) == "ok"
+    assert b.estado_atual == CircuitBreaker.FECHADO
+
+
+def test_sondagem_com_falha_reabre_o_circuito():
+    b = _meio_aberto()
+
+    def falha():
+        raise ValueError("sem barras")
+
+    with pytest.raises(ValueError):
+        PoliticaRetry(max_tentativas=1).executar(falha, breaker=b)
+    b.tempo_abertura = 60.0
+    assert b.estado_atual == CircuitBreaker.ABERTO
+    assert not b.permitir()
+
+
+def test_uma_falha_por_chamada_nao_por_tentativa():
+    b = CircuitBreaker("teste", limite_falhas=2)
+    tentativas = []
+
+    def falha():
+        tentativas.append(1)
+        raise ValueError("bolsa fora")
+
+    with pytest.raises(ValueError):
+        PoliticaRetry(max_tentativas=3, base=0.001).executar(falha, breaker=b)
+    assert len(tentativas) == 3
+    assert b.resumo()["Falhas seguidas"] == 1
+    assert b.estado_atual == CircuitBreaker.FECHADO
+
+
+def test_sem_dados_nao_repete_nem_conta_falha():
+    b = _meio_aberto()
+    tentativas = []
+
+    def vazio():
+        tentativas.append(1)
+        raise SemDados("sem barras")
+
+    with pytest.raises(SemDados):
+        PoliticaRetry(max_tentativas=3, base=0.001).executar(vazio, breaker=b)
+    assert len(tentativas) == 1
+    # A sondagem foi liberada sem reabrir o circuito
+    assert b.estado_atual == CircuitBreaker.MEIO_ABERTO
+    assert b.permitir()
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rotulos_mes import MES_ABREV_PT, chave_mm_yyyy, normalizar_rotulos, parse_rotulos
+
+_MESES_EXTENSO = ["janeiro", "fevereiro", "março", "abril", "maio", "junho", "julho",
+                  "agosto", "setembro", "outubro", "novembro", "dezembro"]
+
+
+@pytest.mark.parametrize("rotulo, ano, mes", [
+    ("Set/25", 2025, 9),
+    ("ago./25", 2025, 8),
+    ("Ago 2025", 2025, 8),
+    ("Sep-26", 2026, 9),
+    (" dez/2030 ", 2030, 12),
+    ("setembro/2025", 2025, 9),
+    ("março/2026", 2026, 3),
+    ("09/2025", 2025, 9),
+    ("1/2027", 2027, 1),
+])
+def test_formatos_aceitos(rotulo, ano, mes):
+    out = parse_rotulos([rotulo])
+    assert (out.loc[0, "Ano"], out.loc[0, "MesNum"], out.loc[0, "Ordinal"]) == (ano, mes, ano * 12 + mes - 1)
+
+
+@pytest.mark.parametrize("rotulo", ["13/2025", "00/2025", "Xyz/25", "", "2025", None, np.nan])
+def test_rotulos_invalidos_ficam_na(rotulo):
+    out = parse_rotulos(pd.Series([rotulo, "Set/25"], dtype=object))
+    assert out.iloc[0].isna().all()
+    assert out.iloc[1].tolist() == [2025, 9, 2025 * 12 + 8]
+
+
+def test_tres_formatos_misturados_em_lote():
+    rng = np.random.default_rng(0)
+    anos = rng.integers(2024, 2031, 5000)
+    meses = rng.integers(1, 13, 5000)
+    formato = rng.integers(0, 3, 5000)
+    rotulos = [
+        f"{MES_ABREV_PT[m]}/{a % 100:02d}" if f == 0 else (f"{m:02d}/{a}" if f == 1 else f"{_MESES_EXTENSO[m - 1]}/{a}")
+        for a, m, f in zip(anos, meses, formato)
+    ]
+    out = parse_rotulos(pd.Series(rotulos, index=np.arange(5000) * 3))
+    assert out.index.tolist() == (np.arange(5000) * 3).tolist()
+    assert out.dtypes.tolist() == ["Int64"] * 3
+    np.testing.assert_array_equal(out["Ano"].to_numpy(dtype=np.int64), anos)
+    np.testing.assert_array_equal(out["MesNum"].to_numpy(dtype=np.int64), meses)
+
+
+def test_normalizar_rotulos():
+    entrada = pd.Series(["ago./25", "SET/26", "setembro/2025", "09/2025", None], dtype=object)
+    assert normalizar_rotulos(entrada).tolist() == ["Ago/25", "Set/26", "Set/2025", "09/2025", None]
+
+
+def test_chave_mm_yyyy():
+    assert chave_mm_yyyy([2025, 2026], [9, 1]).tolist() == ["09/2025", "01/2026"]
+
+
+def test_premios_da_planilha_saem_com_rotulo_padrao():
+    from premios_export_soja_milho import process_soja
+
+    bruto = pd.DataFrame({"Mês ": ["ago./25", "SET/25", "out 25", "total"], "Prêmio": ["+45,5", "50", "-3", "x"]})
+    df, _ = process_soja(bruto)
+    assert df["Mes"].tolist() == ["Ago/25", "Set/25", "Out/25"]  # "total" sai: prêmio não numérico
+    assert df["Premio"].tolist() == [45.5, 50.0, -3.0]
+    assert parse_rotulos(df["Mes"])["MesNum"].tolist() == [8, 9, 10]
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import sensibilidade
+from cenarios import avaliar_cenarios, mercado_de_longo
+
+SACA = "PPE Preço saca origem (R$/sc)"
+COLUNAS_CHICAGO = ["Chicago (c$/bu)", "Eq. Bushel (c$/bu)"]
+
+
+@pytest.mark.parametrize("produto", ["soja", "milho"])
+def test_tabela_no_dolar_atual_igual_ao_motor(ppe_longo, produto):
+    df = ppe_longo[ppe_longo["Produto"] == produto].reset_index(drop=True)
+    for i, linha in df.iterrows():
+        tabela = sensibilidade.criar_tabela_sensibilidade(df.iloc[[i]], linha["NDF"], linha["Premio"], 342.0, 40.0,
+                                                          produto.capitalize())
+        centro = tabela.drop(columns=COLUNAS_CHICAGO).iloc[0, 4]  # 9 colunas (padrão): a do meio é o NDF atual
+        assert centro == pytest.approx(linha[SACA], rel=1e-12)
+
+
+@pytest.mark.parametrize("n_dolar, passo, casas", [(9, 0.05, 2), (5, 0.1, 2), (21, 0.005, 3), (1, 0.05, 2)])
+def test_tabela_redimensionavel(ppe_longo, n_dolar, passo, casas):
+    df = ppe_longo[ppe_longo["Produto"] == "soja"]
+    chicago = np.arange(900.0, 1200.0, 2.5)
+    tabela = sensibilidade.criar_tabela_sensibilidade(df, 5.40, 80.0, 342.0, 40.0, "soja",
+                                                      passo_dolar=passo, n_dolar=n_dolar, chicago=chicago)
+    valores = tabela.drop(columns=COLUNAS_CHICAGO)
+    assert valores.shape == (len(chicago), n_dolar)
+    assert tabela.index.name == "Chicago" and tabela.index[0] == "900,00"
+    # colunas centradas no NDF atual, com casas suficientes para o passo
+    assert valores.columns[n_dolar // 2] == "R$ " + f"{5.40:.{casas}f}".replace(".", ",")
+    np.testing.assert_allclose(tabela["Eq. Bushel (c$/bu)"], chicago + 80.0)
+
+    # cada célula pela fórmula escalar do PPE
+    fator = sensibilidade.PRODUTOS["soja"]["fator"]
+    dolares = 5.40 + passo * (np.arange(n_dolar) - (n_dolar - 1) / 2)
+    for i in (0, len(chicago) // 2, len(chicago) - 1):
+        for j in range(n_dolar):
+            ref = ((chicago[i] + 80.0) * fator * dolares[j] - 382.0) * sensibilidade.TON_POR_SACA
+            assert valores.iat[i, j] == pytest.approx(ref, rel=1e-12)
+
+
+def test_tabela_por_vencimento(ppe_longo):
+    df = ppe_longo[ppe_longo["Produto"] == "milho"]
+    tabela = sensibilidade.criar_tabela_sensibilidade(df, 5.40, 50.0, 342.0, 40.0, "Milho")
+    assert tabela.index.name == "Vencimento"
+    assert tabela.index.tolist() == df["Vencimento"].tolist()
+    np.testing.assert_allclose(tabela["Chicago (c$/bu)"], df["Preço"])
+
+
+EIXOS = {"CBOT": [-20.0, 0.0, 15.0], "Premio": [-10.0, 5.0], "NDF": [-0.2, 0.0, 0.1, 0.3],
+         "frete_dom": [300.0, 342.0], "fobbings": [35.0, 40.0, 45.0]}
+
+
+@pytest.fixture
+def cubo(ppe_longo):
+    sensibilidade.cache_cubos.limpar()
+    yield sensibilidade.cubo_sensibilidade(mercado_de_longo(ppe_longo), EIXOS), ppe_longo
+    sensibilidade.cache_cubos.limpar()
+
+
+def _motor(ppe_longo, cbot, premio, ndf, frete, fobbings):
+    """Uma rodada do motor com as entradas deslocadas: vencimento x produto."""
+    mercado = mercado_de_longo(ppe_longo.assign(**{"Preço": ppe_longo["Preço"] + cbot,
+                                                   "Premio": ppe_longo["Premio"] + premio,
+                                                   "NDF": ppe_longo["NDF"] + ndf}))
+    return avaliar_cenarios(mercado, fobbings, frete)[SACA][0]
+
+
+def test_cubo_formato(cubo):
+    cubo, ppe_longo = cubo
+    assert cubo.dims == [*EIXOS, "Vencimento", "Produto"]
+    n_venc = ppe_longo["Vencimento"].nunique()
+    assert cubo.valores.shape == (*map(len, EIXOS.values()), n_venc, 2)
+    assert not cubo.valores.flags.writeable
+
+
+def test_cada_celula_do_cubo_igual_ao_motor(cubo):
+    cubo, ppe_longo = cubo
+    for idx in [(0, 0, 0, 0, 0), (1, 1, 1, 1, 1), (2, 0, 3, 1, 2), (0, 1, 2, 0, 1)]:
+        valores = [EIXOS[n][i] for n, i in zip(EIXOS, idx)]
+        np.testing.assert_allclose(cubo.valores[idx], _motor(ppe_longo, *valores), rtol=1e-12)
+
+
+def test_fatias(cubo):
+    cubo, ppe_longo = cubo
+    # 2-D nas duas ordens de eixos; demais dimensões nos valores pedidos
+    fatia = cubo.fatia("CBOT", "NDF", Premio=5.0, frete_dom=342.0, fobbings=40.0, Produto="milho")
+    assert fatia.shape == (3, 4)
+    assert fatia.index.name == "CBOT" and fatia.columns.name == "NDF"
+    pd.testing.assert_frame_equal(cubo.fatia("NDF", "CBOT", Premio=5.0, frete_dom=342.0, fobbings=40.0,
+                                             Produto="milho"), fatia.T)
+    ref = _motor(ppe_longo, 15.0, 5.0, 0.1, 342.0, 40.0)
+    assert fatia.loc[15.0, 0.1] == pytest.approx(ref[0, 1], rel=1e-12)  # primeiro vencimento (padrão), milho
+
+    # valor fora da grade vai para o ponto mais próximo; dimensões omitidas ficam no meio da grade
+    perfil = cubo.fatia("Vencimento", CBOT=14.0, NDF=0.12, fobbings=41.0)
+    assert perfil.name == SACA and len(perfil) == cubo.valores.shape[-2]
+    ref = _motor(ppe_longo, 15.0, 5.0, 0.1, 342.0, 40.0)  # Premio e frete_dom: índice len // 2
+    np.testing.assert_allclose(perfil.to_numpy(), ref[:, 0], rtol=1e-12)
+
+
+def test_cubo_em_cache(cubo):
+    cubo, ppe_longo = cubo
+    antes = sensibilidade.cache_cubos.estatisticas()
+    mesmo = sensibilidade.cubo_sensibilidade(mercado_de_longo(ppe_longo), EIXOS)
+    assert mesmo is cubo
+    assert sensibilidade.cache_cubos.estatisticas()["hits_memoria"] == antes["hits_memoria"] + 1
+    outro = sensibilidade.cubo_sensibilidade(mercado_de_longo(ppe_longo), EIXOS, fobbings=41.0)
+    assert outro is not cubo
+
+
+def test_cubo_sem_eixos_igual_ao_motor(ppe_longo):
+    cubo = sensibilidade.cubo_sensibilidade(mercado_de_longo(ppe_longo), {}, fobbings=38.0, frete_dom=350.0)
+    assert cubo.dims == ["Vencimento", "Produto"]
+    np.testing.assert_allclose(cubo.valores, _motor(ppe_longo, 0.0, 0.0, 0.0, 350.0, 38.0), rtol=1e-12)
+
+
+def test_cubo_eixos_invalidos(ppe_longo, monkeypatch):
+    mercado = mercado_de_longo(ppe_longo)
+    with pytest.raises(ValueError, match="Eixos não suportados"):
+        sensibilidade.cubo_sensibilidade(mercado, {"Frete": [1.0]})
+    monkeypatch.setattr(sensibilidade, "MAX_CELULAS", 100)
+    with pytest.raises(ValueError, match="limite"):
+        sensibilidade.cubo_sensibilidade(mercado, {"CBOT": np.arange(10.0)})
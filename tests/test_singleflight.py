@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pandas as pd
+
+from singleflight import SingleFlight
+
+
+def _em_paralelo(voo, n, fn, chave="k"):
+    """Dispara n chamadas com a mesma chave e solta o líder só depois que todos os seguidores chegaram."""
+    liberar = threading.Event()
+    resultados, erros = [None] * n, [None] * n
+
+    def lider_espera():
+        assert liberar.wait(5)
+        return fn()
+
+    def chamar(i):
+        try:
+            resultados[i] = voo.do(chave, lider_espera)
+        except Exception as e:
+            erros[i] = e
+
+    threads = [threading.Thread(target=chamar, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    limite = time.monotonic() + 5
+    while voo.estatisticas()["colapsadas"] < n - 1 and time.monotonic() < limite:
+        time.sleep(0.001)
+    liberar.set()
+    for t in threads:
+        t.join(5)
+    return resultados, erros
+
+
+def test_chamadas_simultaneas_executam_uma_vez():
+    voo = SingleFlight("teste")
+    execucoes = []
+    resultados, erros = _em_paralelo(voo, 8, lambda: execucoes.append(1) or pd.DataFrame({"Preço": [1.0]}))
+    assert execucoes == [1]
+    assert erros == [None] * 8
+    assert all(r["Preço"].tolist() == [1.0] for r in resultados)
+    stats = voo.estatisticas()
+    assert (stats["execucoes"], stats["colapsadas"], stats["em_voo"]) == (1, 7, 0)
+
+
+def test_seguidores_recebem_copia_profunda():
+    voo = SingleFlight("teste")
+    resultados, _ = _em_paralelo(voo, 4, lambda: {"soja": pd.DataFrame({"Preço": [1.0]})})
+    resultados[1]["soja"].loc[0, "Preço"] = 99.0
+    resultados[2]["milho"] = None
+    assert [r["soja"]["Preço"].tolist() for r in resultados].count([1.0]) == 3
+    assert sum("milho" in r for r in resultados) == 1
+    assert len({id(r) for r in resultados}) == 4
+
+
+def test_sem_copia_todos_recebem_o_mesmo_objeto():
+    voo = SingleFlight("teste", copiar=False)
+    resultados, _ = _em_paralelo(voo, 4, lambda: object())
+    assert len({id(r) for r in resultados}) == 1
+
+
+def test_excecao_chega_a_todos_e_a_chave_e_liberada():
+    voo = SingleFlight("teste")
+
+    def falhar():
+        raise ValueError("bolsa fora")
+
+    _, erros = _em_paralelo(voo, 4, falhar)
+    assert all(isinstance(e, ValueError) for e in erros)
+    assert voo.do("k", lambda: 42) == 42  # próxima chamada roda de novo
+    assert voo.estatisticas()["execucoes"] == 2
+
+
+def test_chaves_diferentes_nao_se_esperam():
+    voo = SingleFlight("teste")
+    assert [voo.do(k, lambda k=k: k * 2) for k in (1, 2)] == [2, 4]
+    assert voo.estatisticas()["colapsadas"] == 0
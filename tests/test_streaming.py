@@ -0,0 +1,128 @@
+import pandas as pd
+import pytest
+
+from feed_fake import FeedFake
+from provedores import COLUNAS_COTACAO
+from streaming import AssinanteCotacoes, LastPriceStore, StreamProvider, mensagem
+
+pytest.importorskip("websocket")
+
+
+@pytest.fixture
+def feed():
+    f = FeedFake().iniciar()
+    yield f
+    f.parar()
+
+
+@pytest.fixture
+def assinante(feed):
+    a = AssinanteCotacoes(["CBOT:ZSX2025", "CBOT:ZCZ2025"], url=feed.url, token="tk", timeout_leitura=0.05)
+    a.start()
+    assert feed.esperar(lambda f: f.mensagens("quote_add_symbols"))
+    yield a
+    a.parar()
+    a.join(timeout=5)
+
+
+class _FallbackFake:
+    def __init__(self):
+        self.pedidos = []
+
+    def fetch_many(self, symbols, exchange="CBOT"):
+        self.pedidos.append(list(symbols))
+        return pd.DataFrame([[s, 400.0, None, "ok"] for s in symbols], columns=COLUNAS_COTACAO)
+
+
+def test_assina_os_simbolos(feed, assinante):
+    assert feed.mensagens("set_auth_token") == [["tk"]]
+    (sessao,) = feed.mensagens("quote_create_session")[0]
+    assert feed.mensagens("quote_add_symbols") == [[sessao, "CBOT:ZSX2025", "CBOT:ZCZ2025"]]
+
+
+def test_negocio_vai_para_o_store(feed, assinante):
+    feed.publicar("CBOT:ZSX2025", 1012.5, 1_760_000_000)
+    feed.publicar("CBOT:ZCZ2025", 420.0, status="error")
+    # várias mensagens no mesmo frame
+    feed.enviar(
+        mensagem("qsd", ["qs", {"n": "CBOT:ZCZ2025", "s": "ok", "v": {"lp": 421.25}}])
+        + mensagem("qsd", ["qs", {"n": "CBOT:ZSX2025", "s": "ok", "v": {"lp": 1013.0}}])
+    )
+    assert feed.esperar(lambda f: assinante.store.versao >= 3)
+    assert assinante.store.get("CBOT", "ZCZ2025") == (421.25, None)
+    assert assinante.store.get("CBOT", "ZSX2025")[0] == 1013.0
+    assert assinante.store.versao == 3
+
+
+def test_mensagem_malformada_e_descartada_sem_reconectar(feed, assinante):
+    feed.enviar(
+        mensagem("qsd", ["qs"])  # sem p[1]
+        + mensagem("qsd", ["qs", {"n": "CBOT:ZSX2025", "s": "ok", "v": None}])
+        + mensagem("qsd", ["qs", {"s": "ok", "v": {"lp": 1.0}}])  # sem símbolo
+        + mensagem("qsd", ["qs", {"n": "CBOT:ZSX2025", "s": "ok", "v": {"lp": 1015.0}}])
+    )
+    assert feed.esperar(lambda f: assinante.store.versao >= 1)
+    assert assinante.store.get("CBOT", "ZSX2025")[0] == 1015.0
+    assert assinante.descartadas == 3
+    assert assinante.reconexoes == 0 and feed.conexoes == 1
+
+
+def test_erro_no_callback_nao_derruba_a_conexao(feed):
+    recebidos = []
+
+    def ao_atualizar(exchange, symbol, preco):
+        recebidos.append(preco)
+        raise RuntimeError("falha do chamador")
+
+    a = AssinanteCotacoes(["CBOT:ZSX2025"], url=feed.url, token="tk", ao_atualizar=ao_atualizar,
+                          timeout_leitura=0.05)
+    a.start()
+    try:
+        assert feed.esperar(lambda f: f.mensagens("quote_add_symbols"))
+        feed.publicar("CBOT:ZSX2025", 1012.5)
+        feed.publicar("CBOT:ZSX2025", 1013.0)
+        assert feed.esperar(lambda f: len(recebidos) == 2)
+        assert a.store.get("CBOT", "ZSX2025")[0] == 1013.0
+        assert a.descartadas == 2
+        assert a.reconexoes == 0 and feed.conexoes == 1
+    finally:
+        a.parar()
+        a.join(timeout=5)
+
+
+def test_heartbeat_devolvido(feed, assinante):
+    feed.heartbeat(7)
+    assert feed.esperar(lambda f: "~h~7" in f.recebidas)
+
+
+def test_trocar_simbolos_na_mesma_conexao(feed, assinante):
+    (sessao,) = feed.mensagens("quote_create_session")[0]
+    assinante.trocar_simbolos(["CBOT:ZCZ2025", "CBOT:ZCH2026"])
+    assert feed.esperar(lambda f: len(f.mensagens("quote_add_symbols")) == 2)
+    assert feed.mensagens("quote_remove_symbols") == [[sessao, "CBOT:ZSX2025"]]
+    assert feed.mensagens("quote_add_symbols")[1] == [sessao, "CBOT:ZCH2026"]
+    assert feed.conexoes == 1
+
+
+def test_reconecta_e_reassina(feed, assinante):
+    feed.derrubar()
+    assinante._retry.base = 0.01
+    assert feed.esperar(lambda f: len(f.mensagens("quote_add_symbols")) == 2, timeout=10)
+    assert feed.conexoes == 2
+    assert assinante.reconexoes >= 1
+
+
+def test_stream_provider_usa_fallback_so_para_faltantes():
+    store = LastPriceStore()
+    store.atualizar("CBOT", "ZSX2025", 1010.0)
+    fallback = _FallbackFake()
+    df = StreamProvider(store, fallback=fallback).fetch_many(["ZSX2025", "ZCZ2025", "ZSX2025"])
+    assert list(df.columns) == COLUNAS_COTACAO
+    assert df["Ticker"].tolist() == ["ZSX2025", "ZCZ2025"]
+    assert df["Preço"].tolist() == [1010.0, 400.0]
+    assert fallback.pedidos == [["ZCZ2025"]]
+
+
+def test_stream_provider_sem_fallback():
+    df = StreamProvider(LastPriceStore()).fetch_many(["ZSX2025"])
+    assert df.iloc[0].tolist()[1:] == [None, None, "sem cotação"]